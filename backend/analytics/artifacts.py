@@ -0,0 +1,127 @@
+"""
+Content-addressed report files.
+
+A report's file depends only on its type, format, date range and
+parameters, plus the data it reads. ``content_hash`` hashes those inputs
+(canonicalised, so key order and the case of names do not matter)
+together with a watermark of the source data: the latest ``updated_at``
+and row count of the rows the report covers, and of the employee and
+department tables it takes names from. The row count catches deletions;
+bulk updates must set ``updated_at`` to be seen, as the rest of the code
+does.
+
+Generated files are stored once per hash as ``ReportArtifact`` rows and
+every report with the same hash points at the same file, so an identical
+request is answered without generating anything. Artifacts are evicted
+least recently used first once their total size exceeds
+``REPORT_CACHE_MAX_BYTES``; reports using an evicted file go back to
+Draft.
+"""
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.files import File
+from django.db import IntegrityError, transaction
+from django.db.models import Count, Max
+from django.utils import timezone
+
+from employees.models import Department, Employee
+from .models import Report, ReportArtifact
+
+
+def _canonical(value):
+    if isinstance(value, dict):
+        return {str(key): _canonical(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_canonical(item) for item in value]
+    if isinstance(value, str):
+        return value.strip().lower()
+    return value
+
+
+def data_watermark(rows):
+    """Latest change and row count of ``rows`` and of the employee and department tables."""
+    return [
+        queryset.order_by().aggregate(latest=Max('updated_at'), rows=Count('id'))
+        for queryset in (rows, Employee.objects.all(), Department.objects.all())
+    ]
+
+
+def content_hash(report, rows):
+    """Hash of what ``report``'s file depends on; ``rows`` are the source rows it covers."""
+    inputs = {
+        'report_type': report.report_type,
+        'format': report.format.lower(),
+        'start': report.date_range_start,
+        'end': report.date_range_end,
+        'parameters': _canonical(report.parameters or {}),
+        'data': data_watermark(rows),
+    }
+    return hashlib.sha256(json.dumps(inputs, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def find_artifact(key):
+    """The stored artifact for ``key``, marked as just used, or ``None``."""
+    artifact = ReportArtifact.objects.filter(content_hash=key).first()
+    if artifact is None:
+        return None
+    if not artifact.file.storage.exists(artifact.file.name):
+        evict([artifact.pk])
+        return None
+    artifact.last_used_at = timezone.now()
+    ReportArtifact.objects.filter(pk=artifact.pk).update(last_used_at=artifact.last_used_at)
+    return artifact
+
+
+def store_artifact(key, path, extension):
+    """Store the file at ``path`` as the artifact for ``key`` (or return the one a concurrent run stored)."""
+    artifact = ReportArtifact(content_hash=key)
+    with open(path, 'rb') as generated:
+        artifact.file.save(f'{key}.{extension}', File(generated), save=False)
+    artifact.file_size = artifact.file.size
+    try:
+        with transaction.atomic():
+            artifact.save()
+    except IntegrityError:
+        artifact.file.delete(save=False)
+        return ReportArtifact.objects.get(content_hash=key)
+    return artifact
+
+
+def attach(report, artifact):
+    """Point ``report`` at ``artifact``'s file and mark it Generated."""
+    report.artifact = artifact
+    report.file_path = artifact.file.name
+    report.file_size = artifact.file_size
+    report.generated_at = timezone.now()
+    report.status = Report.ReportStatus.GENERATED
+    report.error_message = ''
+    report.save(update_fields=[
+        'artifact', 'file_path', 'file_size', 'generated_at', 'status', 'error_message', 'updated_at'
+    ])
+    return report
+
+
+def evict(pks):
+    """Delete the artifacts ``pks`` and their files; reports that used them go back to Draft."""
+    artifacts = list(ReportArtifact.objects.filter(pk__in=pks))
+    for artifact in artifacts:
+        artifact.file.delete(save=False)
+    Report.objects.filter(artifact__in=pks).update(
+        artifact=None, file_path=None, file_size=None, generated_at=None,
+        status=Report.ReportStatus.DRAFT, updated_at=timezone.now()
+    )
+    ReportArtifact.objects.filter(pk__in=pks).delete()
+    return len(artifacts)
+
+
+def evict_least_recently_used(max_bytes=None, keep=()):
+    """Evict the least recently used artifacts beyond ``max_bytes`` in total; returns how many."""
+    max_bytes = settings.REPORT_CACHE_MAX_BYTES if max_bytes is None else max_bytes
+    total, stale = 0, []
+    for pk, size in ReportArtifact.objects.order_by('-last_used_at', '-pk').values_list('pk', 'file_size'):
+        total += size
+        if total > max_bytes and pk not in keep:
+            stale.append(pk)
+    return evict(stale) if stale else 0
@@ -0,0 +1,20 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from analytics.pipeline import run_pipeline
+
+
+class Command(BaseCommand):
+    help = 'Compute dashboard metrics from employees, attendance, leave and reviews for the periods changed since the last run.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true', help='Recompute every period, not only changed ones.')
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        run = run_pipeline(full=options['full'])
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Wrote {run.metrics} metric(s) for {run.periods} period(s) in {elapsed:.1f}s.'
+        ))
@@ -0,0 +1,60 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from analytics.reports import reclaim_stale_reports
+from analytics.scheduling import CLAIM_BATCH_SIZE, SchedulerMetrics, run_due_reports, schedule_status
+
+
+class Command(BaseCommand):
+    help = (
+        'Generate scheduled reports as they fall due. Several runners can share the work; '
+        'each due report is claimed by exactly one of them. Unscheduled reports abandoned '
+        'in progress (see REPORT_STALE_MINUTES) are queued again.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval', type=float, default=30,
+            help='Seconds to wait between polls when nothing is due (default 30).'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=CLAIM_BATCH_SIZE,
+            help=f'Reports claimed per poll (default {CLAIM_BATCH_SIZE}).'
+        )
+        parser.add_argument('--once', action='store_true', help='Run the reports due now and exit.')
+
+    def handle(self, *args, **options):
+        if options['interval'] <= 0:
+            raise CommandError('--interval must be positive.')
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be positive.')
+
+        metrics = SchedulerMetrics()
+        started = time.monotonic()
+        try:
+            while True:
+                reclaimed = reclaim_stale_reports(options['batch_size'])
+                if reclaimed and options['verbosity'] > 1:
+                    self.stdout.write(f'Queued {len(reclaimed)} abandoned report(s) again.')
+                claimed = run_due_reports(options['batch_size'], metrics)
+                if claimed and options['verbosity'] > 1:
+                    self.stdout.write(f'Ran {claimed} report(s); {self.format_metrics(metrics.summary())}')
+                if options['once'] and claimed < options['batch_size']:
+                    break
+                if not claimed:
+                    time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            pass
+        elapsed = time.monotonic() - started
+        status = schedule_status()
+        self.stdout.write(self.style.SUCCESS(
+            f'Ran {metrics.runs} scheduled report(s) in {elapsed:.1f}s; {self.format_metrics(metrics.summary())}; '
+            f"{status['due']} due, queue lag {status['queue_lag']}s."
+        ))
+
+    def format_metrics(self, summary):
+        return (
+            f"{summary['failures']} failed, lag avg {summary['lag_avg']}s max {summary['lag_max']}s, "
+            f"duration avg {summary['duration_avg']}s max {summary['duration_max']}s"
+        )
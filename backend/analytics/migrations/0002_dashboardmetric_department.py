@@ -0,0 +1,84 @@
+from collections import Counter
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count
+
+
+# Frozen copy of the department name matching at the time of this migration.
+def department_key(value):
+    return ' '.join((value or '').split()).casefold()
+
+
+def link_department_names(Department, queryset, source, target):
+    """Point ``target`` at the department named by ``source``, creating one per distinct spelling."""
+    rows = list(queryset.values_list(source).annotate(rows=Count('pk')).order_by())
+    spellings = {}
+    for value, count in rows:
+        key = department_key(value)
+        if key:
+            spellings.setdefault(key, Counter())[' '.join(value.split())] += count
+
+    departments = {department_key(department.name): department for department in Department.objects.all()}
+    for key, variants in spellings.items():
+        if key not in departments:
+            name = min(variants.items(), key=lambda item: (-item[1], item[0]))[0]
+            departments[key] = Department.objects.create(name=name)
+
+    linked = 0
+    for value, _ in rows:
+        key = department_key(value)
+        if key:
+            linked += queryset.filter(**{source: value}).update(**{target: departments[key]})
+    return linked
+
+
+def link_metric_departments(apps, schema_editor):
+    Department = apps.get_model('employees', 'Department')
+    DashboardMetric = apps.get_model('analytics', 'DashboardMetric')
+    link_department_names(Department, DashboardMetric.objects.all(), 'department', 'department_ref')
+
+
+def restore_metric_departments(apps, schema_editor):
+    DashboardMetric = apps.get_model('analytics', 'DashboardMetric')
+    for row in DashboardMetric.objects.exclude(department_ref=None).select_related('department_ref'):
+        DashboardMetric.objects.filter(pk=row.pk).update(department=row.department_ref.name)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0001_initial'),
+        ('employees', '0004_department'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='dashboardmetric',
+            name='analytics_d_categor_a07e44_idx',
+        ),
+        migrations.AddField(
+            model_name='dashboardmetric',
+            name='department_ref',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='employees.department'),
+        ),
+        migrations.RunPython(link_metric_departments, restore_metric_departments),
+        migrations.RemoveField(
+            model_name='dashboardmetric',
+            name='department',
+        ),
+        migrations.RenameField(
+            model_name='dashboardmetric',
+            old_name='department_ref',
+            new_name='department',
+        ),
+        migrations.AlterField(
+            model_name='dashboardmetric',
+            name='department',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='dashboard_metrics', to='employees.department'),
+        ),
+        migrations.AddIndex(
+            model_name='dashboardmetric',
+            index=models.Index(fields=['category', 'department'], name='analytics_d_categor_d9d1a4_idx'),
+        ),
+    ]
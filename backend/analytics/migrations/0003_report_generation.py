@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-17 23:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0002_dashboardmetric_department'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='report',
+            name='error_message',
+            field=models.TextField(blank=True, verbose_name='error message'),
+        ),
+        migrations.AlterField(
+            model_name='report',
+            name='status',
+            field=models.CharField(choices=[('Draft', 'Draft'), ('Queued', 'Queued'), ('Generating', 'Generating'), ('Generated', 'Generated'), ('Scheduled', 'Scheduled'), ('Failed', 'Failed')], default='Draft', max_length=20, verbose_name='status'),
+        ),
+    ]
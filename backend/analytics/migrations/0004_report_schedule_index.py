@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-17 23:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0003_report_generation'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='report',
+            index=models.Index(fields=['is_scheduled', 'next_run'], name='analytics_r_is_sche_8fb398_idx'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-17 23:09
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0004_report_schedule_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReportArtifact',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('content_hash', models.CharField(max_length=64, unique=True, verbose_name='content hash')),
+                ('file', models.FileField(upload_to='reports/artifacts/', verbose_name='file')),
+                ('file_size', models.PositiveIntegerField(verbose_name='file size')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='created at')),
+                ('last_used_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now, verbose_name='last used at')),
+            ],
+            options={
+                'ordering': ['-last_used_at'],
+            },
+        ),
+        migrations.AddField(
+            model_name='report',
+            name='artifact',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='reports', to='analytics.reportartifact', verbose_name='artifact'),
+        ),
+    ]
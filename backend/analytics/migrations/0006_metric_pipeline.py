@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-17 23:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0005_report_artifacts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MetricRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('started_at', models.DateTimeField(db_index=True, verbose_name='started at')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='finished at')),
+                ('full', models.BooleanField(default=False, verbose_name='full')),
+                ('periods', models.PositiveIntegerField(default=0, verbose_name='periods')),
+                ('metrics', models.PositiveIntegerField(default=0, verbose_name='metrics')),
+            ],
+            options={
+                'ordering': ['-started_at'],
+            },
+        ),
+        migrations.AddField(
+            model_name='dashboardmetric',
+            name='metric_key',
+            field=models.CharField(blank=True, editable=False, max_length=100, null=True, unique=True, verbose_name='metric key'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-17 23:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0007_alter_dashboardmetric_department'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StalePeriod',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period_start', models.DateField(verbose_name='period start')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='created at')),
+            ],
+        ),
+    ]
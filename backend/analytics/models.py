@@ -1,4 +1,5 @@
 from django.db import models
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
 
@@ -35,11 +36,16 @@ class DashboardMetric(models.Model):
     period_end = models.DateField(_('period end'), null=True, blank=True)
 
     # Department filter (optional)
-    department = models.CharField(_('department'), max_length=100, blank=True)
+    department = models.ForeignKey(
+        'employees.Department', on_delete=models.SET_NULL, null=True, blank=True, related_name='dashboard_metrics',
+        verbose_name=_('department')
+    )
 
     # Metadata
     is_active = models.BooleanField(_('is active'), default=True)
     data_source = models.CharField(_('data source'), max_length=100, blank=True)
+    # Identifies rows written by analytics.pipeline (type, department, period); empty for manual metrics.
+    metric_key = models.CharField(_('metric key'), max_length=100, null=True, blank=True, unique=True, editable=False)
 
     created_at = models.DateTimeField(_('created at'), auto_now_add=True)
     updated_at = models.DateTimeField(_('updated at'), auto_now=True)
@@ -68,6 +74,8 @@ class Report(models.Model):
 
     class ReportStatus(models.TextChoices):
         DRAFT = 'Draft', _('Draft')
+        QUEUED = 'Queued', _('Queued')
+        GENERATING = 'Generating', _('Generating')
         GENERATED = 'Generated', _('Generated')
         SCHEDULED = 'Scheduled', _('Scheduled')
         FAILED = 'Failed', _('Failed')
@@ -86,6 +94,11 @@ class Report(models.Model):
     file_path = models.FileField(_('file path'), upload_to='reports/', null=True, blank=True)
     file_size = models.PositiveIntegerField(_('file size'), null=True, blank=True)
     generated_at = models.DateTimeField(_('generated at'), null=True, blank=True)
+    error_message = models.TextField(_('error message'), blank=True)
+    artifact = models.ForeignKey(
+        'ReportArtifact', on_delete=models.SET_NULL, null=True, blank=True,
+        related_name='reports', verbose_name=_('artifact')
+    )
 
     # Scheduling
     is_scheduled = models.BooleanField(_('is scheduled'), default=False)
@@ -101,6 +114,52 @@ class Report(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Due scheduled reports (see analytics.scheduling).
+            models.Index(fields=['is_scheduled', 'next_run']),
+        ]
 
     def __str__(self):
         return f"{self.title} ({self.report_type})"
+
+
+class MetricRun(models.Model):
+    """One run of the dashboard metric pipeline; the next run recomputes periods changed since it started."""
+
+    started_at = models.DateTimeField(_('started at'), db_index=True)
+    finished_at = models.DateTimeField(_('finished at'), null=True, blank=True)
+    full = models.BooleanField(_('full'), default=False)
+    periods = models.PositiveIntegerField(_('periods'), default=0)
+    metrics = models.PositiveIntegerField(_('metrics'), default=0)
+
+    class Meta:
+        ordering = ['-started_at']
+
+    def __str__(self):
+        return f"Metric run {self.started_at:%Y-%m-%d %H:%M}"
+
+
+class StalePeriod(models.Model):
+    """A metric period that lost source rows (moved to another period or deleted); the next run recomputes it."""
+
+    period_start = models.DateField(_('period start'))
+    created_at = models.DateTimeField(_('created at'), auto_now_add=True)
+
+    def __str__(self):
+        return f"Stale period {self.period_start}"
+
+
+class ReportArtifact(models.Model):
+    """A generated report file, shared by every report with the same inputs (see analytics.artifacts)."""
+
+    content_hash = models.CharField(_('content hash'), max_length=64, unique=True)
+    file = models.FileField(_('file'), upload_to='reports/artifacts/')
+    file_size = models.PositiveIntegerField(_('file size'))
+    created_at = models.DateTimeField(_('created at'), auto_now_add=True)
+    last_used_at = models.DateTimeField(_('last used at'), default=timezone.now, db_index=True)
+
+    class Meta:
+        ordering = ['-last_used_at']
+
+    def __str__(self):
+        return self.content_hash
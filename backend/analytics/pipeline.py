@@ -0,0 +1,327 @@
+"""
+Dashboard metrics computed from the source tables.
+
+Each metric type the pipeline produces has one calculator registered in
+``CALCULATORS``. For a list of monthly periods a calculator returns
+``{(department_id, period start): (numerator, denominator)}`` from
+grouped queries (denominator ``None`` for plain counts); the pipeline adds a company-wide row (department
+``None``) summing every group, including employees without a
+department (except for attendance, read from the department-by-day
+rollup), and writes all rows with one ``bulk_create(update_conflicts=
+True)`` keyed on ``DashboardMetric.metric_key``. ``data_source`` is the
+calculator's name.
+
+``run_pipeline`` is incremental: it only recomputes the periods whose
+source rows changed (by ``updated_at``, including the employee of a
+review, whose department may have moved) since the last finished
+``MetricRun`` started, so it can run often and the dashboard only ever
+reads ``DashboardMetric``. A changed row only names its current period,
+so the signals in ``analytics.signals`` record the period a row moved out
+of, or was deleted from, as a ``StalePeriod``; the next run recomputes
+those periods too. A full run recomputes every period.
+
+Employees have no hire date, so headcount counts employees created before
+a period ended, less Inactive ones whose status changed before it began
+(``Employee.status_changed_at``), and leavers are employees made Inactive
+during the period.
+"""
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, DateField, F, Min, Q, Sum
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+from attendance.models import DepartmentAttendanceDaily, LeaveRequest
+from employees.models import Employee
+from performance.models import PerformanceReview
+from performance.trends import bucket_start, next_bucket
+from .models import DashboardMetric, MetricRun, StalePeriod
+
+PERIOD = 'month'
+
+UPDATE_FIELDS = [
+    'title', 'category', 'value', 'unit', 'date_recorded', 'period_start', 'period_end',
+    'department', 'data_source', 'updated_at',
+]
+
+CALCULATORS = {}
+
+
+def register(calculator):
+    CALCULATORS[calculator.metric_type] = calculator()
+    return calculator
+
+
+def period_range(first, last):
+    """Start of every period from the one containing ``first`` to the one containing ``last``."""
+    starts, start = [], bucket_start(first, PERIOD)
+    while start <= last:
+        starts.append(start)
+        start = next_bucket(start, PERIOD)
+    return starts
+
+
+def in_periods(field, periods):
+    """``Q`` matching ``field`` inside any of ``periods``, one range per run of consecutive periods."""
+    ranges = []
+    for start in sorted(periods):
+        end = next_bucket(start, PERIOD)
+        if ranges and ranges[-1][1] == start:
+            ranges[-1][1] = end
+        else:
+            ranges.append([start, end])
+    condition = Q()
+    for start, end in ranges:
+        condition |= Q(**{f'{field}__gte': start, f'{field}__lt': end})
+    return condition
+
+
+def grouped(queryset, department, day, **aggregates):
+    """``{(department_id, period start): row}`` of ``aggregates`` grouped by department and period of ``day``."""
+    rows = queryset.annotate(period=TruncMonth(day, output_field=DateField())).values(
+        department, 'period'
+    ).annotate(**aggregates).order_by()
+    return {(row[department], row['period']): row for row in rows}
+
+
+def changed_periods(queryset, day, since, via=()):
+    """Periods of ``day`` among the rows of ``queryset`` changed, or whose ``via`` relations changed, since ``since``."""
+    condition = Q(updated_at__gte=since)
+    for relation in via:
+        condition |= Q(**{f'{relation}__updated_at__gte': since})
+    return set(
+        queryset.filter(condition).annotate(period=TruncMonth(day, output_field=DateField()))
+        .order_by().values_list('period', flat=True).distinct()
+    )
+
+
+def mark_stale(days):
+    """Record the periods of ``days`` for the next run to recompute."""
+    periods = {bucket_start(day, PERIOD) for day in days if day is not None}
+    StalePeriod.objects.bulk_create(StalePeriod(period_start=start) for start in periods)
+
+
+def first_day(queryset, day):
+    first = queryset.aggregate(first=Min(day))['first']
+    return first.date() if hasattr(first, 'date') else first
+
+
+def headcount(periods):
+    """Employees on the books in each period, ``{(department_id, period start): count}``."""
+    inactive = Employee.EmploymentStatus.INACTIVE
+    counts = {
+        f'period_{index}': Count('id', filter=Q(created_at__date__lt=next_bucket(start, PERIOD)) & ~Q(
+            status=inactive, status_changed_at__date__lt=start
+        ))
+        for index, start in enumerate(periods)
+    }
+    rows = Employee.objects.order_by().values('department').annotate(**counts)
+    return {
+        (row['department'], start): row[f'period_{index}']
+        for row in rows for index, start in enumerate(periods)
+    }
+
+
+def employee_changes(since, today):
+    """Periods whose headcount may have changed: from the earliest changed employee's creation on."""
+    first = first_day(Employee.objects.filter(updated_at__gte=since), 'created_at')
+    return set(period_range(first, today)) if first else set()
+
+
+class Calculator:
+    metric_type = category = title = unit = None
+    scale = 1
+
+    @property
+    def name(self):
+        return f'pipeline.{type(self).__name__}'
+
+    def compute(self, periods):
+        raise NotImplementedError
+
+    def changed_periods(self, since, today):
+        raise NotImplementedError
+
+    def first_day(self):
+        return first_day(Employee.objects.all(), 'created_at')
+
+
+@register
+class EmployeeCount(Calculator):
+    metric_type = DashboardMetric.MetricType.EMPLOYEE_COUNT
+    category = DashboardMetric.MetricCategory.HEADCOUNT
+    title = 'Employee Count'
+    unit = 'count'
+
+    def compute(self, periods):
+        return {key: (count, None) for key, count in headcount(periods).items() if count}
+
+    def changed_periods(self, since, today):
+        return employee_changes(since, today)
+
+
+@register
+class TurnoverRate(Calculator):
+    metric_type = DashboardMetric.MetricType.TURNOVER_RATE
+    category = DashboardMetric.MetricCategory.HEADCOUNT
+    title = 'Turnover Rate'
+    unit = '%'
+    scale = 100
+
+    def compute(self, periods):
+        leavers = grouped(
+            Employee.objects.filter(
+                in_periods('status_changed_at__date', periods), status=Employee.EmploymentStatus.INACTIVE
+            ),
+            'department', 'status_changed_at', leavers=Count('id')
+        )
+        return {
+            key: (leavers[key]['leavers'] if key in leavers else 0, count)
+            for key, count in headcount(periods).items() if count
+        }
+
+    def changed_periods(self, since, today):
+        return employee_changes(since, today)
+
+
+@register
+class AttendanceRate(Calculator):
+    """Share of attendance records that are not absences, from the department-by-day rollup."""
+
+    metric_type = DashboardMetric.MetricType.ATTENDANCE_RATE
+    category = DashboardMetric.MetricCategory.ATTENDANCE
+    title = 'Attendance Rate'
+    unit = '%'
+    scale = 100
+
+    def compute(self, periods):
+        rows = grouped(
+            DepartmentAttendanceDaily.objects.filter(in_periods('date', periods)), 'department', 'date',
+            attended=Sum(F('total_records') - F('absent_count')), records=Sum('total_records')
+        )
+        return {key: (row['attended'], row['records']) for key, row in rows.items()}
+
+    def changed_periods(self, since, today):
+        return changed_periods(DepartmentAttendanceDaily.objects.all(), 'date', since)
+
+    def first_day(self):
+        return first_day(DepartmentAttendanceDaily.objects.all(), 'date')
+
+
+@register
+class PerformanceScore(Calculator):
+    metric_type = DashboardMetric.MetricType.PERFORMANCE_SCORE
+    category = DashboardMetric.MetricCategory.PERFORMANCE
+    title = 'Average Performance Score'
+    unit = 'score'
+
+    def compute(self, periods):
+        rows = grouped(
+            PerformanceReview.objects.filter(in_periods('review_date', periods)), 'employee__department',
+            'review_date', total=Sum('overall_score'), reviews=Count('id')
+        )
+        return {key: (row['total'], row['reviews']) for key, row in rows.items()}
+
+    def changed_periods(self, since, today):
+        return changed_periods(PerformanceReview.objects.all(), 'review_date', since, via=['employee'])
+
+    def first_day(self):
+        return first_day(PerformanceReview.objects.all(), 'review_date')
+
+
+@register
+class LeaveUtilization(Calculator):
+    """Approved leave days starting in the period per employee on the books."""
+
+    metric_type = DashboardMetric.MetricType.LEAVE_UTILIZATION
+    category = DashboardMetric.MetricCategory.ENGAGEMENT
+    title = 'Leave Days per Employee'
+    unit = 'days'
+
+    def compute(self, periods):
+        leave = grouped(
+            LeaveRequest.objects.filter(in_periods('start_date', periods), status=LeaveRequest.LeaveStatus.APPROVED),
+            'employee__department', 'start_date', days=Sum('days_requested')
+        )
+        return {
+            key: (leave[key]['days'] if key in leave else 0, count)
+            for key, count in headcount(periods).items() if count
+        }
+
+    def changed_periods(self, since, today):
+        return changed_periods(LeaveRequest.objects.all(), 'start_date', since) | employee_changes(since, today)
+
+
+def metric_rows(calculator, periods, today):
+    """``DashboardMetric`` rows of ``calculator`` for ``periods``, per department and company-wide."""
+    values = calculator.compute(periods)
+    totals = {}
+    for (department_id, start), (numerator, denominator) in values.items():
+        total_numerator, total_denominator = totals.get(start, (0, None))
+        if denominator is not None:
+            total_denominator = (total_denominator or 0) + denominator
+        totals[start] = (total_numerator + (numerator or 0), total_denominator)
+    groups = {key: pair for key, pair in values.items() if key[0] is not None}
+    groups.update({(None, start): pair for start, pair in totals.items()})
+
+    rows = []
+    for (department_id, start), (numerator, denominator) in groups.items():
+        if denominator == 0:
+            continue
+        end = next_bucket(start, PERIOD) - timedelta(days=1)
+        value = Decimal(str(numerator or 0))
+        if denominator is not None:
+            value = value / Decimal(str(denominator)) * calculator.scale
+        rows.append(DashboardMetric(
+            title=calculator.title, metric_type=calculator.metric_type, category=calculator.category,
+            value=value.quantize(Decimal('0.01')), unit=calculator.unit, date_recorded=min(end, today),
+            period_start=start, period_end=end, department_id=department_id, data_source=calculator.name,
+            metric_key=f'{calculator.metric_type}:{department_id or "all"}:{start.isoformat()}',
+        ))
+    return rows
+
+
+def write_metrics(calculator, periods, rows):
+    """Upsert ``rows`` and drop this calculator's rows in ``periods`` that were not recomputed."""
+    DashboardMetric.objects.bulk_create(
+        rows, batch_size=1000, update_conflicts=True, unique_fields=['metric_key'], update_fields=UPDATE_FIELDS
+    )
+    DashboardMetric.objects.filter(data_source=calculator.name, period_start__in=periods).exclude(
+        metric_key__in=[row.metric_key for row in rows]
+    ).delete()
+
+
+def run_pipeline(full=False, today=None):
+    """
+    Recompute the dashboard metrics of every period changed since the last run.
+
+    The first run, or a ``full`` one, recomputes every period with data.
+    Returns the finished ``MetricRun``.
+    """
+    today = today or timezone.now().date()
+    previous = None if full else MetricRun.objects.exclude(finished_at=None).order_by('-started_at').first()
+    run = MetricRun.objects.create(started_at=timezone.now(), full=previous is None)
+    stale = dict(StalePeriod.objects.values_list('pk', 'period_start'))
+    touched = set()
+    with transaction.atomic():
+        for calculator in CALCULATORS.values():
+            if previous is None:
+                first = calculator.first_day()
+                periods = period_range(first, today) if first else []
+            else:
+                current = bucket_start(today, PERIOD)
+                changed = calculator.changed_periods(previous.started_at, today) | set(stale.values())
+                periods = sorted(start for start in changed if start <= current)
+            if not periods:
+                continue
+            rows = metric_rows(calculator, periods, today)
+            write_metrics(calculator, periods, rows)
+            touched.update(periods)
+            run.metrics += len(rows)
+        StalePeriod.objects.filter(pk__in=stale).delete()
+    run.periods = len(touched)
+    run.finished_at = timezone.now()
+    run.save(update_fields=['periods', 'metrics', 'finished_at'])
+    return run
@@ -0,0 +1,288 @@
+"""
+Report file generation.
+
+``queue_report`` marks a report Queued and, once the transaction commits,
+hands it to a small thread pool (``REPORT_WORKERS`` threads; 0 runs
+reports inline, which tests and management commands use). The worker
+moves the report to Generating, streams its dataset with
+``.iterator(chunk_size=REPORT_CHUNK_SIZE)`` (a server-side cursor on
+PostgreSQL) into a CSV or XLSX writer that never holds more than one
+chunk of rows, and points ``Report.file_path`` at the stored file. A
+failure sets the status to Failed and keeps the error message.
+
+Workers run inside the web process, so a restart can lose queued or
+running work. A report left Queued or Generating for longer than
+``REPORT_STALE_MINUTES`` is treated as abandoned: ``queue_report``
+queues it again, and ``reclaim_stale_reports`` (run by the report
+scheduler) re-queues abandoned unscheduled reports on its own; the
+scheduler reclaims scheduled ones. Files are
+shared between reports with identical inputs and data (see
+``analytics.artifacts``), so a repeated request reuses the stored file
+instead of generating it again.
+
+Each report type maps to a dataset in ``DATASETS``: a header row and a
+``values_list`` queryset filtered by the report's date range and its
+``parameters`` (``department``: id or name, ``employee``: id).
+"""
+import csv
+import logging
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from attendance.models import AttendanceRecord
+from employees.models import Employee
+from performance.models import PerformanceReview
+from .artifacts import attach, content_hash, evict_least_recently_used, find_artifact, store_artifact
+from .models import DashboardMetric, Report
+
+logger = logging.getLogger(__name__)
+
+Status = Report.ReportStatus
+
+FORMATS = ('csv', 'xlsx')
+
+# Reports waiting for or holding a worker.
+IN_PROGRESS = (Status.QUEUED, Status.GENERATING)
+
+_executor = None
+
+
+class ReportError(Exception):
+    pass
+
+
+def stale_before(now=None):
+    """Reports in progress not updated since this moment have lost their worker."""
+    return (now or timezone.now()) - timedelta(minutes=settings.REPORT_STALE_MINUTES)
+
+
+def stale_reports(now=None):
+    return Report.objects.filter(status__in=IN_PROGRESS, updated_at__lt=stale_before(now))
+
+
+def _department_filter(value, lookup):
+    if value in (None, ''):
+        return {}
+    if str(value).isdigit():
+        return {lookup: int(value)}
+    return {f'{lookup}__name__iexact': value}
+
+
+# Source table of each report type: model, date field, department and employee lookups.
+SOURCES = {
+    Report.ReportType.ATTENDANCE_REPORT: (AttendanceRecord, 'date', 'employee__department', 'employee'),
+    Report.ReportType.PERFORMANCE_REPORT: (PerformanceReview, 'review_date', 'employee__department', 'employee'),
+    Report.ReportType.EMPLOYEE_ANALYTICS: (Employee, None, 'department', 'pk'),
+    Report.ReportType.TURNOVER_ANALYSIS: (Employee, None, 'department', 'pk'),
+    Report.ReportType.DASHBOARD: (DashboardMetric, 'date_recorded', 'department', None),
+}
+
+
+def source_rows(report):
+    """The rows of the report type's source table that ``report`` covers."""
+    model, date_field, department_lookup, employee_lookup = SOURCES[report.report_type]
+    parameters = report.parameters if isinstance(report.parameters, dict) else {}
+    filters = _department_filter(parameters.get('department'), department_lookup)
+    if employee_lookup and parameters.get('employee') not in (None, ''):
+        filters[employee_lookup] = parameters['employee']
+    if date_field and report.date_range_start:
+        filters[f'{date_field}__gte'] = report.date_range_start
+    if date_field and report.date_range_end:
+        filters[f'{date_field}__lte'] = report.date_range_end
+    return model.objects.filter(**filters)
+
+
+def attendance_dataset(report):
+    columns = {
+        'Date': 'date', 'Employee ID': 'employee_id', 'Employee': 'employee__name',
+        'Department': 'employee__department__name', 'Status': 'status', 'Check In': 'check_in_time',
+        'Check Out': 'check_out_time', 'Hours Worked': 'hours_worked',
+    }
+    return list(columns), source_rows(report).order_by('date', 'id').values_list(*columns.values())
+
+
+def performance_dataset(report):
+    columns = {
+        'Review Date': 'review_date', 'Employee ID': 'employee_id', 'Employee': 'employee__name',
+        'Department': 'employee__department__name', 'Reviewer': 'reviewer__name', 'Review Type': 'review_type',
+        'Overall Score': 'overall_score', 'Overall Rating': 'overall_rating',
+        'Technical Skills': 'technical_skills', 'Communication': 'communication', 'Teamwork': 'teamwork',
+        'Leadership': 'leadership', 'Initiative': 'initiative', 'Completed': 'is_completed',
+    }
+    return list(columns), source_rows(report).order_by('review_date', 'id').values_list(*columns.values())
+
+
+def employee_dataset(report):
+    columns = {
+        'Employee ID': 'id', 'Name': 'name', 'Email': 'email', 'Department': 'department__name', 'Role': 'role',
+        'Status': 'status', 'Performance Score': 'performance_score', 'Attendance Rate': 'attendance_rate',
+    }
+    return list(columns), source_rows(report).order_by('id').values_list(*columns.values())
+
+
+def turnover_dataset(report):
+    rows = source_rows(report).values_list('department__name', 'status').annotate(employees=Count('id')).order_by(
+        'department__name', 'status'
+    )
+    return ['Department', 'Status', 'Employees'], rows
+
+
+def dashboard_dataset(report):
+    columns = {
+        'Date Recorded': 'date_recorded', 'Title': 'title', 'Metric Type': 'metric_type', 'Category': 'category',
+        'Department': 'department__name', 'Value': 'value', 'Unit': 'unit',
+        'Period Start': 'period_start', 'Period End': 'period_end',
+    }
+    metrics = source_rows(report).filter(is_active=True)
+    return list(columns), metrics.order_by('date_recorded', 'id').values_list(*columns.values())
+
+
+DATASETS = {
+    Report.ReportType.ATTENDANCE_REPORT: attendance_dataset,
+    Report.ReportType.PERFORMANCE_REPORT: performance_dataset,
+    Report.ReportType.EMPLOYEE_ANALYTICS: employee_dataset,
+    Report.ReportType.TURNOVER_ANALYSIS: turnover_dataset,
+    Report.ReportType.DASHBOARD: dashboard_dataset,
+}
+
+
+def write_csv(path, header, rows):
+    with open(path, 'w', newline='', encoding='utf-8') as output:
+        writer = csv.writer(output)
+        writer.writerow(header)
+        writer.writerows(rows)
+
+
+def write_xlsx(path, header, rows):
+    try:
+        from openpyxl import Workbook
+    except ImportError:  # pragma: no cover
+        raise ReportError('XLSX reports need the openpyxl package.')
+    # Write-only workbooks stream rows to disk instead of keeping cells in memory.
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet('Report')
+    sheet.append(header)
+    for row in rows:
+        sheet.append(row)
+    workbook.save(path)
+
+
+WRITERS = {'csv': write_csv, 'xlsx': write_xlsx}
+
+
+def unsupported_reason(report):
+    """Why ``report`` cannot be generated, or ``None``."""
+    if report.report_type not in DATASETS:
+        return f'{report.report_type} reports have no dataset to export.'
+    if report.format not in WRITERS:
+        return f"Report format '{report.format}' is not supported; use one of: {', '.join(FORMATS)}."
+    return None
+
+
+def generate_report_file(report):
+    """Point ``report`` at its file, generating the file unless an identical one is stored."""
+    reason = unsupported_reason(report)
+    if reason:
+        raise ReportError(reason)
+    key = content_hash(report, source_rows(report))
+    artifact = find_artifact(key)
+    if artifact is None:
+        header, rows = DATASETS[report.report_type](report)
+        rows = rows.iterator(chunk_size=settings.REPORT_CHUNK_SIZE)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, f'report.{report.format}')
+            WRITERS[report.format](path, header, rows)
+            artifact = store_artifact(key, path, report.format)
+        evict_least_recently_used(keep={artifact.pk})
+    return attach(report, artifact)
+
+
+def use_stored_file(report):
+    """
+    Point ``report`` at an identical stored file, if there is one; returns whether it did.
+
+    Reports that are queued or generating are left alone.
+    """
+    if unsupported_reason(report) or report.status in IN_PROGRESS:
+        return False
+    artifact = find_artifact(content_hash(report, source_rows(report)))
+    if artifact is None:
+        return False
+    attach(report, artifact)
+    return True
+
+
+def run_report(report_id):
+    """Worker entry point: generate a Queued report, recording any failure on it."""
+    close_old_connections()
+    try:
+        claimed = Report.objects.filter(pk=report_id, status=Status.QUEUED).update(
+            status=Status.GENERATING, updated_at=timezone.now()
+        )
+        if not claimed:
+            return
+        report = Report.objects.get(pk=report_id)
+        try:
+            generate_report_file(report)
+        except Exception as exc:
+            logger.exception('Report %s failed', report_id)
+            Report.objects.filter(pk=report_id).update(
+                status=Status.FAILED, error_message=str(exc) or exc.__class__.__name__, updated_at=timezone.now()
+            )
+    finally:
+        close_old_connections()
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=settings.REPORT_WORKERS, thread_name_prefix='report')
+    return _executor
+
+
+def submit(report_id):
+    if settings.REPORT_WORKERS > 0:
+        get_executor().submit(run_report, report_id)
+    else:
+        run_report(report_id)
+
+
+def queue_report(report):
+    """
+    Queue ``report`` for generation; returns ``False`` if it is already queued or generating.
+
+    A report stuck in progress for longer than ``REPORT_STALE_MINUTES`` is
+    queued again. The worker is started when the surrounding transaction
+    commits.
+    """
+    queued = Report.objects.filter(pk=report.pk).filter(
+        ~Q(status__in=IN_PROGRESS) | Q(updated_at__lt=stale_before())
+    ).update(status=Status.QUEUED, error_message='', updated_at=timezone.now())
+    if queued:
+        transaction.on_commit(lambda: submit(report.pk))
+    return bool(queued)
+
+
+def reclaim_stale_reports(limit=None, now=None):
+    """
+    Queue abandoned unscheduled reports again and hand them to the workers; returns their ids.
+
+    Rows locked by another caller are skipped.
+    """
+    now = now or timezone.now()
+    with transaction.atomic():
+        ids = list(
+            stale_reports(now).filter(is_scheduled=False).select_for_update(skip_locked=True)
+            .order_by('updated_at').values_list('pk', flat=True)[:limit]
+        )
+        Report.objects.filter(pk__in=ids).update(status=Status.QUEUED, error_message='', updated_at=now)
+        for report_id in ids:
+            transaction.on_commit(lambda report_id=report_id: submit(report_id))
+    return ids
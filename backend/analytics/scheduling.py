@@ -0,0 +1,162 @@
+"""
+Scheduled report runs.
+
+``run_due_reports`` is one pass of the scheduler (the
+``run_report_scheduler`` command loops over it). In one short
+transaction it claims up to ``limit`` reports with ``is_scheduled`` set
+and ``next_run`` in the past, oldest first, using ``SELECT ... FOR UPDATE
+SKIP LOCKED`` over the ``(is_scheduled, next_run)`` index; each claimed
+report is queued and its ``next_run`` moved to the next slot of its
+``schedule_frequency`` before the transaction commits. Any number of
+runner processes can therefore poll at once: a report locked by one
+runner is skipped by the others, and once the claim commits it is no
+longer due. The claimed reports are then generated one after another
+in the runner's own process.
+
+A runner that dies mid-batch leaves its claimed reports Queued or
+Generating with ``next_run`` already advanced. Each claim therefore also
+takes scheduled reports that have been in progress for longer than
+``REPORT_STALE_MINUTES`` and runs them again, without moving their
+``next_run``.
+
+A report whose frequency is not in ``FREQUENCIES`` runs once (its
+``next_run`` is cleared). Slots missed while no runner was up are
+skipped rather than replayed.
+"""
+import calendar
+import logging
+import time
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Count, Min
+from django.utils import timezone
+
+from .models import Report
+from .reports import IN_PROGRESS, Status, run_report, stale_reports, unsupported_reason
+
+logger = logging.getLogger(__name__)
+
+# ``schedule_frequency`` values (case-insensitive): days, or months when negative.
+FREQUENCIES = {
+    'daily': 1,
+    'weekly': 7,
+    'monthly': -1,
+    'quarterly': -3,
+    'yearly': -12,
+}
+
+CLAIM_BATCH_SIZE = 10
+
+
+def add_months(moment, months):
+    month = moment.month - 1 + months
+    year = moment.year + month // 12
+    month = month % 12 + 1
+    return moment.replace(year=year, month=month, day=min(moment.day, calendar.monthrange(year, month)[1]))
+
+
+def next_run_after(next_run, frequency, now):
+    """The first slot of ``frequency`` after ``now``, counting from ``next_run``; ``None`` for one-off runs."""
+    step = FREQUENCIES.get((frequency or '').strip().lower())
+    if step is None:
+        return None
+    while next_run <= now:
+        next_run = next_run + timedelta(days=step) if step > 0 else add_months(next_run, -step)
+    return next_run
+
+
+def due_reports(now):
+    return Report.objects.filter(is_scheduled=True, next_run__lte=now)
+
+
+class SchedulerMetrics:
+    """Queue lag (how late a run started) and run duration, in seconds, for one runner."""
+
+    def __init__(self):
+        self.runs = 0
+        self.failures = 0
+        self.lag_total = self.lag_max = 0.0
+        self.duration_total = self.duration_max = 0.0
+
+    def record(self, lag, duration, failed):
+        self.runs += 1
+        self.failures += failed
+        self.lag_total += lag
+        self.lag_max = max(self.lag_max, lag)
+        self.duration_total += duration
+        self.duration_max = max(self.duration_max, duration)
+
+    def summary(self):
+        return {
+            'runs': self.runs,
+            'failures': self.failures,
+            'lag_avg': round(self.lag_total / self.runs, 3) if self.runs else None,
+            'lag_max': round(self.lag_max, 3),
+            'duration_avg': round(self.duration_total / self.runs, 3) if self.runs else None,
+            'duration_max': round(self.duration_max, 3),
+        }
+
+
+def claim_due_reports(now, limit=CLAIM_BATCH_SIZE):
+    """
+    Claim up to ``limit`` due or abandoned reports; returns ``[(report, scheduled time), ...]``.
+
+    Claimed reports are Queued (or Failed, with the reason, if they cannot
+    be generated) and the ``next_run`` of due ones is advanced. Abandoned
+    scheduled reports (in progress for longer than ``REPORT_STALE_MINUTES``)
+    are claimed first; their scheduled time is when they were last claimed.
+    """
+    with transaction.atomic():
+        reports = list(
+            stale_reports(now).filter(is_scheduled=True)
+            .select_for_update(skip_locked=True).order_by('updated_at')[:limit]
+        )
+        if len(reports) < limit:
+            reports += list(
+                due_reports(now).exclude(status__in=IN_PROGRESS)
+                .select_for_update(skip_locked=True).order_by('next_run')[:limit - len(reports)]
+            )
+        claimed = []
+        for report in reports:
+            due = report.next_run is not None and report.next_run <= now
+            claimed.append((report, report.next_run if due else report.updated_at))
+            reason = unsupported_reason(report)
+            report.status = Status.FAILED if reason else Status.QUEUED
+            report.error_message = reason or ''
+            if due:
+                report.next_run = next_run_after(report.next_run, report.schedule_frequency, now)
+            report.updated_at = now
+        Report.objects.bulk_update(reports, ['status', 'error_message', 'next_run', 'updated_at'])
+    return claimed
+
+
+def run_due_reports(limit=CLAIM_BATCH_SIZE, metrics=None):
+    """Claim and generate due reports; returns how many were claimed."""
+    now = timezone.now()
+    claimed = claim_due_reports(now, limit)
+    for report, scheduled in claimed:
+        lag = (timezone.now() - scheduled).total_seconds()
+        started = time.monotonic()
+        if report.status == Status.QUEUED:
+            run_report(report.pk)
+            report.status = Report.objects.filter(pk=report.pk).values_list('status', flat=True).first()
+        duration = time.monotonic() - started
+        failed = report.status != Status.GENERATED
+        logger.info(
+            'Scheduled report %s %s: lag %.3fs, duration %.3fs', report.pk, report.status, lag, duration
+        )
+        if metrics is not None:
+            metrics.record(lag, duration, failed)
+    return len(claimed)
+
+
+def schedule_status(now=None):
+    """How many scheduled reports are due and how late the oldest is, in seconds."""
+    now = now or timezone.now()
+    due = due_reports(now).exclude(status__in=IN_PROGRESS).aggregate(due=Count('id'), oldest=Min('next_run'))
+    return {
+        'due': due['due'],
+        'queue_lag': round((now - due['oldest']).total_seconds(), 3) if due['oldest'] else 0,
+        'running': Report.objects.filter(status__in=IN_PROGRESS).count(),
+    }
@@ -1,10 +1,15 @@
+from django.utils import timezone
 from rest_framework import serializers
+from employees.serializers import DepartmentField, DepartmentSaveMixin
 from .models import DashboardMetric, Report
+from .scheduling import FREQUENCIES
 
 
-class DashboardMetricSerializer(serializers.ModelSerializer):
+class DashboardMetricSerializer(DepartmentSaveMixin, serializers.ModelSerializer):
     """Serializer for DashboardMetric model."""
 
+    department = DepartmentField()
+
     class Meta:
         model = DashboardMetric
         fields = [
@@ -15,7 +20,33 @@ class DashboardMetricSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'created_at', 'updated_at']
 
 
-class ReportSerializer(serializers.ModelSerializer):
+class ReportScheduleMixin:
+    """
+    Scheduled reports need a known frequency; a report that becomes
+    scheduled first runs as soon as a scheduler polls, and one that stops
+    being scheduled has no next run. Updates are checked against the
+    report's stored schedule, so a partial update cannot leave it invalid.
+    """
+
+    def validate(self, attrs):
+        attrs = super().validate(attrs)
+        report = self.instance
+        was_scheduled = report is not None and report.is_scheduled
+        scheduled = attrs.get('is_scheduled', was_scheduled)
+        frequency = attrs.get('schedule_frequency', report.schedule_frequency if report else '')
+        if scheduled:
+            if frequency.strip().lower() not in FREQUENCIES:
+                raise serializers.ValidationError({
+                    'schedule_frequency': f"Scheduled reports need one of: {', '.join(FREQUENCIES)}."
+                })
+            if not was_scheduled or report.next_run is None:
+                attrs['next_run'] = timezone.now()
+        elif was_scheduled:
+            attrs['next_run'] = None
+        return attrs
+
+
+class ReportSerializer(ReportScheduleMixin, serializers.ModelSerializer):
     """Serializer for Report model."""
 
     class Meta:
@@ -23,13 +54,17 @@ class ReportSerializer(serializers.ModelSerializer):
         fields = [
             'id', 'title', 'report_type', 'description', 'status',
             'parameters', 'date_range_start', 'date_range_end', 'file_path',
-            'file_size', 'generated_at', 'is_scheduled', 'schedule_frequency',
+            'file_size', 'generated_at', 'error_message', 'is_scheduled', 'schedule_frequency',
             'next_run', 'created_by', 'format', 'created_at', 'updated_at'
         ]
-        read_only_fields = ['id', 'file_path', 'file_size', 'generated_at', 'created_at', 'updated_at']
+        # Status and next run belong to the generator and the scheduler.
+        read_only_fields = [
+            'id', 'status', 'file_path', 'file_size', 'generated_at', 'error_message', 'next_run',
+            'created_at', 'updated_at'
+        ]
 
 
-class ReportCreateSerializer(serializers.ModelSerializer):
+class ReportCreateSerializer(ReportScheduleMixin, serializers.ModelSerializer):
     """Serializer for creating reports."""
 
     class Meta:
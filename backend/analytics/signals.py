@@ -0,0 +1,57 @@
+from django.db.models import Max, Min
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from api.tracking import previous_value, track_previous
+from attendance.models import AttendanceRecord, LeaveRequest
+from employees.models import Employee
+from performance.models import PerformanceReview
+from .pipeline import mark_stale, period_range
+
+# Source models whose rows the pipeline places in a period by this date field.
+PERIOD_FIELDS = {
+    AttendanceRecord: 'date',
+    LeaveRequest: 'start_date',
+    PerformanceReview: 'review_date',
+}
+
+
+for model, field in PERIOD_FIELDS.items():
+    track_previous(model, field)
+
+
+@receiver(post_save, sender=AttendanceRecord)
+@receiver(post_save, sender=LeaveRequest)
+@receiver(post_save, sender=PerformanceReview)
+def mark_previous_period_stale(sender, instance, raw=False, **kwargs):
+    previous = previous_value(instance, PERIOD_FIELDS[sender])
+    if not raw and previous is not None and previous != getattr(instance, PERIOD_FIELDS[sender]):
+        mark_stale([previous])
+
+
+@receiver(post_delete, sender=AttendanceRecord)
+@receiver(post_delete, sender=LeaveRequest)
+@receiver(post_delete, sender=PerformanceReview)
+def mark_deleted_period_stale(sender, instance, **kwargs):
+    mark_stale([getattr(instance, PERIOD_FIELDS[sender])])
+
+
+@receiver(post_save, sender=Employee)
+def mark_attendance_periods_stale(sender, instance, raw=False, created=False, **kwargs):
+    """
+    A department move can empty the old department's attendance rollup
+    rows, which then leave no change behind; mark the periods of the
+    employee's attendance stale. Reviews and leave follow the employee's
+    ``updated_at`` (see ``analytics.pipeline``).
+    """
+    if raw or created or not instance.has_changed('department_id'):
+        return
+    span = AttendanceRecord.objects.filter(employee=instance).aggregate(first=Min('date'), last=Max('date'))
+    if span['first']:
+        mark_stale(period_range(span['first'], span['last']))
+
+
+@receiver(post_delete, sender=Employee)
+def mark_employee_periods_stale(sender, instance, **kwargs):
+    mark_stale(period_range(instance.created_at.date(), timezone.now().date()))
@@ -1,3 +1,375 @@
-from django.test import TestCase
+import shutil
+import tempfile
+import threading
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.db import connection, transaction
+from django.test import TestCase, TransactionTestCase, override_settings, skipUnlessDBFeature
+from django.utils import timezone
+
+from api.testing import AuthenticatedAPITestCase, AuthenticatedAPITransactionTestCase
+from attendance.models import AttendanceRecord, DepartmentAttendanceDaily
+from attendance.rollups import rebuild_range
+from employees.models import Department, Employee
+from performance.models import PerformanceReview
+from .models import DashboardMetric, Report, ReportArtifact, StalePeriod
+from .pipeline import run_pipeline
+from .reports import generate_report_file, reclaim_stale_reports, use_stored_file
+from .scheduling import SchedulerMetrics, claim_due_reports, next_run_after, run_due_reports, schedule_status
+
+
+class ScheduledReportTests(TransactionTestCase):
+    """The scheduler claims due reports once, generates them and moves next_run on."""
+
+    def setUp(self):
+        self.media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media, ignore_errors=True)
+        override = override_settings(MEDIA_ROOT=self.media)
+        override.enable()
+        self.addCleanup(override.disable)
+        employee = Employee.objects.create(name='Employee', email='employee@example.com')
+        AttendanceRecord.objects.create(employee=employee, date=date(2025, 1, 2), status='Present', hours_worked=8)
+
+    def report(self, next_run, frequency='weekly', **fields):
+        fields = {'format': 'csv', 'is_scheduled': True, **fields}
+        return Report.objects.create(
+            title='Report', report_type='Attendance Report', schedule_frequency=frequency, next_run=next_run, **fields
+        )
+
+    def test_next_run_after(self):
+        start = datetime(2025, 1, 31, 6, tzinfo=dt_timezone.utc)
+        now = datetime(2025, 2, 10, tzinfo=dt_timezone.utc)
+        self.assertEqual(next_run_after(start, 'Monthly', now), datetime(2025, 2, 28, 6, tzinfo=dt_timezone.utc))
+        self.assertEqual(next_run_after(start, 'weekly', now), datetime(2025, 2, 14, 6, tzinfo=dt_timezone.utc))
+        self.assertIsNone(next_run_after(start, 'whenever', now))
+
+    def test_run_due_reports(self):
+        now = timezone.now()
+        weekly = self.report(now - timedelta(hours=1))
+        pdf = self.report(now - timedelta(hours=2), frequency='', format='pdf')
+        later = self.report(now + timedelta(hours=1))
+        unscheduled = self.report(now - timedelta(hours=1), is_scheduled=False)
+        self.assertEqual(schedule_status(now)['due'], 2)
+
+        metrics = SchedulerMetrics()
+        self.assertEqual(run_due_reports(metrics=metrics), 2)
+
+        weekly.refresh_from_db()
+        self.assertEqual(weekly.status, 'Generated')
+        self.assertGreater(weekly.file_size, 0)
+        self.assertGreater(weekly.next_run, now + timedelta(days=6))
+        pdf.refresh_from_db()
+        self.assertEqual(pdf.status, 'Failed')
+        self.assertIsNone(pdf.next_run)
+        summary = metrics.summary()
+        self.assertEqual((summary['runs'], summary['failures']), (2, 1))
+        self.assertGreaterEqual(summary['lag_max'], 7200)
+        self.assertEqual(Report.objects.filter(pk__in=[later.pk, unscheduled.pk], status='Draft').count(), 2)
+        self.assertEqual(run_due_reports(), 0)
+
+    def test_abandoned_reports_are_claimed_again(self):
+        now = timezone.now()
+        next_run = now + timedelta(days=6)
+        abandoned = self.report(next_run, status='Generating')
+        running = self.report(next_run, status='Queued')
+        Report.objects.filter(pk=abandoned.pk).update(updated_at=now - timedelta(hours=1))
+
+        metrics = SchedulerMetrics()
+        self.assertEqual(run_due_reports(metrics=metrics), 1)
+        abandoned.refresh_from_db()
+        self.assertEqual((abandoned.status, abandoned.next_run), ('Generated', next_run))
+        self.assertGreaterEqual(metrics.summary()['lag_max'], 3600)
+        self.assertEqual(Report.objects.get(pk=running.pk).status, 'Queued')
+
+    @skipUnlessDBFeature('has_select_for_update_skip_locked')
+    def test_locked_reports_are_skipped(self):
+        now = timezone.now()
+        locked = self.report(now - timedelta(hours=2))
+        free = self.report(now - timedelta(hours=1))
+        holding, release = threading.Event(), threading.Event()
+
+        def hold_lock():
+            try:
+                with transaction.atomic():
+                    Report.objects.select_for_update().get(pk=locked.pk)
+                    holding.set()
+                    release.wait(10)
+            finally:
+                connection.close()
+
+        thread = threading.Thread(target=hold_lock)
+        thread.start()
+        try:
+            holding.wait(10)
+            claimed = claim_due_reports(now)
+        finally:
+            release.set()
+            thread.join()
+        self.assertEqual([report.pk for report, _ in claimed], [free.pk])
+        self.assertEqual([report.pk for report, _ in claim_due_reports(now)], [locked.pk])
+
+
+@override_settings(REPORT_WORKERS=0)
+class ReportGenerationTests(AuthenticatedAPITransactionTestCase):
+    """Reports are generated, downloaded and failed through the API, and abandoned ones are queued again."""
+
+    def setUp(self):
+        super().setUp()
+        self.media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media, ignore_errors=True)
+        override = override_settings(MEDIA_ROOT=self.media)
+        override.enable()
+        self.addCleanup(override.disable)
+        employee = Employee.objects.create(name='Employee', email='employee@example.com')
+        AttendanceRecord.objects.create(employee=employee, date=date(2025, 1, 2), status='Present', hours_worked=8)
+        self.report = Report.objects.create(title='Attendance', report_type='Attendance Report', format='csv')
+        self.url = f'/api/analytics/reports/{self.report.pk}/'
+
+    def set_status(self, status, minutes_ago=0):
+        Report.objects.filter(pk=self.report.pk).update(
+            status=status, updated_at=timezone.now() - timedelta(minutes=minutes_ago)
+        )
+
+    def test_generate_and_download(self):
+        response = self.client.post(f'{self.url}generate/')
+        self.assertEqual((response.status_code, response.data['status']), (202, 'Generated'))
+        response = self.client.get(f'{self.url}download/')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(b''.join(response.streaming_content).startswith(b'Date,Employee ID,'))
+        self.assertEqual(self.client.post(f'{self.url}generate/').status_code, 200)
+
+    def test_failed_generation_is_recorded(self):
+        failing = mock.Mock(side_effect=OSError('Disk full'))
+        with mock.patch.dict('analytics.reports.WRITERS', {'csv': failing}), self.assertLogs('analytics.reports', 'ERROR'):
+            response = self.client.post(f'{self.url}generate/')
+        self.assertEqual(response.data['status'], 'Failed')
+        self.report.refresh_from_db()
+        self.assertEqual(self.report.error_message, 'Disk full')
+        self.assertEqual(self.client.get(f'{self.url}download/').status_code, 404)
+
+        Report.objects.filter(pk=self.report.pk).update(format='pdf')
+        self.assertEqual(self.client.post(f'{self.url}generate/').status_code, 400)
+
+    def test_stale_reports_are_queued_again(self):
+        self.set_status('Generating', minutes_ago=5)
+        self.assertEqual(self.client.post(f'{self.url}generate/').status_code, 409)
+        self.set_status('Generating', minutes_ago=31)
+        response = self.client.post(f'{self.url}generate/')
+        self.assertEqual((response.status_code, response.data['status']), (202, 'Generated'))
+
+    def test_reclaim_stale_reports(self):
+        scheduled = Report.objects.create(title='Scheduled', report_type='Attendance Report', format='csv', is_scheduled=True)
+        Report.objects.filter(pk=scheduled.pk).update(status='Queued', updated_at=timezone.now() - timedelta(hours=1))
+        self.set_status('Queued', minutes_ago=5)
+        self.assertEqual(reclaim_stale_reports(), [])
+        self.set_status('Queued', minutes_ago=60)
+        self.assertEqual(reclaim_stale_reports(), [self.report.pk])
+        self.report.refresh_from_db()
+        self.assertEqual(self.report.status, 'Generated')
+        self.assertEqual(Report.objects.get(pk=scheduled.pk).status, 'Queued')
+
+
+class ReportScheduleApiTests(AuthenticatedAPITestCase):
+    """Schedules are validated on create and update; status and next run are not writable."""
+
+    url = '/api/analytics/reports/'
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.report = Report.objects.create(title='Attendance', report_type='Attendance Report', format='csv')
+
+    def setUp(self):
+        super().setUp()
+        self.detail = f'{self.url}{self.report.pk}/'
+
+    def test_create_needs_a_known_frequency(self):
+        fields = {'title': 'Weekly', 'report_type': 'Attendance Report', 'format': 'csv', 'is_scheduled': True}
+        response = self.client.post(self.url, {**fields, 'schedule_frequency': 'whenever'}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('schedule_frequency', response.data)
+        response = self.client.post(self.url, {**fields, 'schedule_frequency': 'Weekly'}, format='json')
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertIsNotNone(Report.objects.get(title='Weekly').next_run)
+
+    def test_status_and_next_run_are_read_only(self):
+        later = timezone.now() + timedelta(days=3)
+        response = self.client.patch(self.detail, {'status': 'Generated', 'next_run': later.isoformat()}, format='json')
+        self.assertEqual(response.status_code, 200, response.data)
+        self.report.refresh_from_db()
+        self.assertEqual(self.report.status, Report.ReportStatus.DRAFT)
+        self.assertIsNone(self.report.next_run)
+
+    def test_updates_keep_the_schedule_valid(self):
+        response = self.client.patch(self.detail, {'is_scheduled': True}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('schedule_frequency', response.data)
+
+        response = self.client.patch(self.detail, {'is_scheduled': True, 'schedule_frequency': 'monthly'}, format='json')
+        self.assertEqual(response.status_code, 200, response.data)
+        self.report.refresh_from_db()
+        next_run = self.report.next_run
+        self.assertIsNotNone(next_run)
+
+        response = self.client.patch(self.detail, {'schedule_frequency': ''}, format='json')
+        self.assertEqual(response.status_code, 400)
+        response = self.client.patch(self.detail, {'title': 'Renamed'}, format='json')
+        self.assertEqual(response.status_code, 200, response.data)
+        self.report.refresh_from_db()
+        self.assertEqual(self.report.next_run, next_run)
+
+        response = self.client.patch(self.detail, {'is_scheduled': False}, format='json')
+        self.assertEqual(response.status_code, 200, response.data)
+        self.report.refresh_from_db()
+        self.assertIsNone(self.report.next_run)
+
+
+class ReportArtifactTests(TestCase):
+    """Reports with the same inputs and unchanged data share one stored file."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.employee = Employee.objects.create(name='Employee', email='employee@example.com')
+        AttendanceRecord.objects.create(employee=cls.employee, date=date(2025, 1, 2), status='Present', hours_worked=8)
+
+    def setUp(self):
+        self.media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media, ignore_errors=True)
+        override = override_settings(MEDIA_ROOT=self.media)
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def report(self, **parameters):
+        return Report.objects.create(
+            title='Report', report_type='Attendance Report', format='csv', parameters=parameters,
+            date_range_start=date(2025, 1, 1), date_range_end=date(2025, 1, 31)
+        )
+
+    def test_identical_reports_share_a_file(self):
+        first = generate_report_file(self.report(employee=self.employee.pk, department=''))
+        second = self.report(department='', employee=self.employee.pk)
+        self.assertTrue(use_stored_file(second))
+        self.assertEqual((second.status, second.file_path.name), ('Generated', first.file_path.name))
+        self.assertEqual(ReportArtifact.objects.count(), 1)
+
+        AttendanceRecord.objects.create(employee=self.employee, date=date(2025, 1, 3), status='Late', hours_worked=7)
+        third = self.report(employee=self.employee.pk, department='')
+        self.assertFalse(use_stored_file(third))
+        generate_report_file(third)
+        self.assertNotEqual(third.file_path.name, first.file_path.name)
+        self.assertEqual(ReportArtifact.objects.count(), 2)
+
+    def test_least_recently_used_files_are_evicted(self):
+        old = generate_report_file(self.report())
+        with override_settings(REPORT_CACHE_MAX_BYTES=old.file_size):
+            new = generate_report_file(self.report(department='Sales'))
+        self.assertEqual(list(ReportArtifact.objects.values_list('pk', flat=True)), [new.artifact_id])
+        old.refresh_from_db()
+        self.assertEqual(old.status, 'Draft')
+        self.assertFalse(old.file_path)
+
+
+class MetricPipelineTests(TestCase):
+    """Dashboard metrics are computed per department and company-wide, and recomputed incrementally."""
+
+    today = date(2025, 3, 14)
+    this_month = date(2025, 3, 1)
+    last_month = date(2025, 2, 1)
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.engineering = Department.objects.create(name='Engineering')
+        cls.alice = Employee.objects.create(name='Alice', email='alice@example.com', department=cls.engineering)
+        cls.bob = Employee.objects.create(name='Bob', email='bob@example.com')
+        Employee.objects.update(created_at=datetime(2025, 1, 10, tzinfo=dt_timezone.utc))
+        cls.review(cls.alice, cls.last_month, 80)
+        cls.review(cls.bob, cls.last_month, 60)
+        cls.alice_review = cls.review(cls.alice, cls.this_month, 90)
+        AttendanceRecord.objects.create(employee=cls.alice, date=cls.this_month, status='Present', hours_worked=8)
+        AttendanceRecord.objects.create(employee=cls.alice, date=date(2025, 3, 3), status='Absent', hours_worked=0)
+        rebuild_range()
+
+    @classmethod
+    def review(cls, employee, day, score):
+        return PerformanceReview.objects.create(
+            employee=employee, review_type='Annual', review_date=day, review_period_start=day,
+            review_period_end=day, overall_score=score, overall_rating='Good'
+        )
+
+    def run_pipeline(self, **kwargs):
+        return run_pipeline(today=self.today, **kwargs)
+
+    def value(self, metric_type, period_start, department=None):
+        return DashboardMetric.objects.get(
+            metric_type=metric_type, period_start=period_start, department=department
+        ).value
+
+    def test_metrics_per_department_and_company(self):
+        run = self.run_pipeline()
+        self.assertTrue(run.full)
+        self.assertEqual(self.value('Performance Score', self.last_month), 70)
+        self.assertEqual(self.value('Performance Score', self.last_month, self.engineering), 80)
+        self.assertEqual(self.value('Employee Count', self.this_month), 2)
+        self.assertEqual(self.value('Employee Count', self.this_month, self.engineering), 1)
+        self.assertEqual(self.value('Attendance Rate', self.this_month, self.engineering), 50)
+        self.assertEqual(self.value('Turnover Rate', self.this_month), 0)
+        self.assertEqual(
+            DashboardMetric.objects.get(metric_type='Employee Count', period_start=self.this_month, department=None).data_source,
+            'pipeline.EmployeeCount'
+        )
+
+    def test_incremental_run_recomputes_changed_periods(self):
+        self.run_pipeline()
+        metrics = DashboardMetric.objects.count()
+        untouched = DashboardMetric.objects.get(metric_type='Performance Score', period_start=self.last_month, department=None)
+        self.review(self.bob, self.this_month, 70)
+
+        run = self.run_pipeline()
+        self.assertFalse(run.full)
+        self.assertEqual(run.periods, 1)
+        self.assertEqual(self.value('Performance Score', self.this_month), 80)
+        self.assertEqual(DashboardMetric.objects.count(), metrics)
+        self.assertEqual(DashboardMetric.objects.get(pk=untouched.pk).updated_at, untouched.updated_at)
+        self.assertEqual(self.run_pipeline().metrics, 0)
+
+    def test_moved_and_deleted_rows_recompute_their_old_period(self):
+        self.run_pipeline()
+        self.alice_review.review_date = date(2025, 2, 20)
+        self.alice_review.save()
+        self.run_pipeline()
+        self.assertEqual(self.value('Performance Score', self.last_month), Decimal('76.67'))
+        self.assertFalse(DashboardMetric.objects.filter(metric_type='Performance Score', period_start=self.this_month))
+
+        AttendanceRecord.objects.filter(employee=self.alice).delete()
+        DepartmentAttendanceDaily.objects.all().delete()
+        self.run_pipeline()
+        self.assertFalse(DashboardMetric.objects.filter(metric_type='Attendance Rate'))
+        self.assertFalse(StalePeriod.objects.exists())
+
+    def test_department_move_recomputes_past_periods(self):
+        self.run_pipeline()
+        bob = Employee.objects.get(pk=self.bob.pk)
+        bob.department = self.engineering
+        bob.save()
+        self.run_pipeline()
+        self.assertEqual(self.value('Performance Score', self.last_month, self.engineering), 70)
+        self.assertEqual(self.value('Employee Count', self.last_month, self.engineering), 2)
+
+    def test_turnover_uses_the_status_change_date(self):
+        Employee.objects.filter(pk=self.bob.pk).update(
+            status='Inactive', status_changed_at=datetime(2025, 3, 5, tzinfo=dt_timezone.utc)
+        )
+        self.run_pipeline()
+        self.assertEqual(self.value('Turnover Rate', self.this_month), 50)
+        self.assertEqual(self.value('Employee Count', self.this_month), 2)
+
+        bob = Employee.objects.get(pk=self.bob.pk)
+        bob.name = 'Robert'
+        bob.save()
+        self.run_pipeline()
+        self.assertEqual(self.value('Turnover Rate', self.this_month), 50)
+        bob.status = 'Active'
+        bob.save()
+        self.assertEqual(bob.status_changed_at.date(), timezone.now().date())
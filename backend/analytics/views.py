@@ -1,14 +1,15 @@
-from rest_framework import viewsets
+from django.http import FileResponse
+from rest_framework import status, viewsets
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from django.db.models import Sum, Avg, Count
-from django.utils import timezone
-from datetime import timedelta
+from api.mixins import RelatedFieldsMixin
 from .models import DashboardMetric, Report
+from .reports import queue_report, unsupported_reason, use_stored_file
+from .scheduling import schedule_status
 from .serializers import DashboardMetricSerializer, ReportSerializer, ReportCreateSerializer
 
 
-class DashboardMetricViewSet(viewsets.ModelViewSet):
+class DashboardMetricViewSet(RelatedFieldsMixin, viewsets.ModelViewSet):
     """ViewSet for DashboardMetric model."""
 
     queryset = DashboardMetric.objects.filter(is_active=True)
@@ -22,7 +23,7 @@ class DashboardMetricViewSet(viewsets.ModelViewSet):
         return Response(serializer.data)
 
 
-class ReportViewSet(viewsets.ModelViewSet):
+class ReportViewSet(RelatedFieldsMixin, viewsets.ModelViewSet):
     """ViewSet for Report model."""
 
     queryset = Report.objects.all()
@@ -35,12 +36,40 @@ class ReportViewSet(viewsets.ModelViewSet):
 
     @action(detail=True, methods=['post'])
     def generate(self, request, pk=None):
-        """Generate a report."""
+        """
+        Queue the report for generation and return at once (202).
+
+        If an identical report's file is stored and its data has not
+        changed since, the report uses that file and is returned
+        Generated (200).
+
+        Poll the report until ``status`` is Generated (``file_path`` and
+        ``file_size`` are set) or Failed (``error_message`` says why).
+        """
         report = self.get_object()
-        # In a real implementation, this would generate the actual report file
-        # For now, just mark as generated
-        report.status = 'Generated'
-        report.generated_at = timezone.now()
-        report.save()
+        reason = unsupported_reason(report)
+        if reason:
+            return Response({'error': reason}, status=status.HTTP_400_BAD_REQUEST)
+        if use_stored_file(report):
+            return Response(self.get_serializer(report).data)
+        if not queue_report(report):
+            return Response({'error': 'This report is already being generated.'}, status=status.HTTP_409_CONFLICT)
+        report.refresh_from_db()
         serializer = self.get_serializer(report)
-        return Response(serializer.data)
+        return Response(serializer.data, status=status.HTTP_202_ACCEPTED)
+
+    @action(detail=False, methods=['get'])
+    def schedule(self, request):
+        """Scheduled reports now due, the oldest one's lag in seconds, and reports generating."""
+        return Response(schedule_status())
+
+    @action(detail=True, methods=['get'])
+    def download(self, request, pk=None):
+        """Stream the generated file."""
+        report = self.get_object()
+        if report.status != Report.ReportStatus.GENERATED or not report.file_path:
+            return Response({'error': 'This report has not been generated.'}, status=status.HTTP_404_NOT_FOUND)
+        return FileResponse(
+            report.file_path.open('rb'), as_attachment=True,
+            filename=f'{report.title or "report"}.{report.format}'
+        )
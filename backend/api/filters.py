@@ -0,0 +1,132 @@
+from datetime import date
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError as DjangoValidationError
+from django.db import connection, models, transaction
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import BaseFilterBackend
+
+
+class QueryParamFilterBackend(BaseFilterBackend):
+    """
+    Filter list endpoints by the query parameters a view declares.
+
+    Views set ``query_filters`` to a mapping of parameter name to ORM lookup,
+    e.g. ``{'employee': 'employee', 'start': 'date__gte'}``; lookups may
+    start with an annotation of the view's queryset. Values are
+    converted with the model field, so bad input is a 400 rather than a
+    database error; ``__in`` lookups take comma-separated values. A
+    relation filtered by a non-numeric value matches the related row's
+    ``name`` instead (``?department=Sales``). Views without
+    ``query_filters`` are left unfiltered.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        query_filters = getattr(view, 'query_filters', None)
+        if not query_filters:
+            return queryset
+        conditions = {}
+        errors = {}
+        for param, lookup in query_filters.items():
+            raw = request.query_params.get(param)
+            if raw in (None, ''):
+                continue
+            try:
+                conditions[lookup] = parse_filter_value(queryset.model, lookup, raw, queryset.query.annotations)
+            except DjangoValidationError as exc:
+                name_lookup = relation_name_lookup(queryset.model, lookup, queryset.query.annotations)
+                if name_lookup is None:
+                    errors[param] = exc.messages
+                else:
+                    conditions[name_lookup] = raw
+        if errors:
+            raise ValidationError(errors)
+        return queryset.filter(**conditions)
+
+
+def lookup_field(model, lookup, annotations=None):
+    """Resolve ``employee__department__in`` to ``(field, 'in')`` on ``model``.
+
+    A lookup starting with one of ``annotations`` resolves to the
+    annotation's output field.
+    """
+    parts = lookup.split('__')
+    if annotations and parts[0] in annotations:
+        return annotations[parts[0]].output_field, '__'.join(parts[1:]) or 'exact'
+    field = None
+    for index, name in enumerate(parts):
+        try:
+            field = model._meta.get_field(name)
+        except FieldDoesNotExist:
+            return field, '__'.join(parts[index:])
+        if field.is_relation and index < len(parts) - 1:
+            model = field.related_model
+    return field, 'exact'
+
+
+def parse_filter_value(model, lookup, raw, annotations=None):
+    field, operator = lookup_field(model, lookup, annotations)
+    if field.is_relation:
+        field = field.target_field
+    if operator == 'in':
+        return [field.to_python(value.strip()) for value in raw.split(',') if value.strip()]
+    if isinstance(field, models.BooleanField):
+        if raw.lower() in ('1', 'true', 'yes'):
+            return True
+        if raw.lower() in ('0', 'false', 'no'):
+            return False
+    return field.to_python(raw)
+
+
+def relation_name_lookup(model, lookup, annotations=None):
+    """``department__name__iexact`` for an exact relation lookup whose model has a ``name``; else ``None``."""
+    field, operator = lookup_field(model, lookup, annotations)
+    if not field.is_relation or operator != 'exact':
+        return None
+    try:
+        field.related_model._meta.get_field('name')
+    except FieldDoesNotExist:
+        return None
+    return f"{lookup.removesuffix('__exact')}__name__iexact"
+
+
+def sample_value(field):
+    """A representative value for ``field`` used to plan filter queries."""
+    if field.is_relation:
+        return 1
+    if isinstance(field, models.BooleanField):
+        return True
+    if isinstance(field, models.DateField):
+        return date.today()
+    if isinstance(field, (models.IntegerField, models.DecimalField, models.FloatField)):
+        return 1
+    if field.choices:
+        return field.choices[0][0]
+    return 'x'
+
+
+def explain_filters(queryset, query_filters):
+    """
+    Plan every declared filter and report whether its table is read through an index.
+
+    Returns ``[(param, lookup, uses_index, plan)]``. The table checked is
+    the one holding the filtered column (the employee table for
+    ``employee__department``, the queryset's own table for annotations). On PostgreSQL sequential scans are disabled
+    while planning, so a sequential scan in the plan means no index can
+    serve the filter; on SQLite the table must be searched, not scanned.
+    """
+    report = []
+    for param, lookup in query_filters.items():
+        field, operator = lookup_field(queryset.model, lookup, queryset.query.annotations)
+        value = sample_value(field.target_field if field.is_relation else field)
+        filtered = queryset.filter(**{lookup: [value] if operator == 'in' else value}).order_by()
+        table = (field.model if hasattr(field, 'model') else queryset.model)._meta.db_table
+        if connection.vendor == 'postgresql':
+            with transaction.atomic(), connection.cursor() as cursor:
+                cursor.execute('SET LOCAL enable_seqscan = off')
+                plan = filtered.explain()
+            uses_index = f'Seq Scan on {table}' not in plan
+        else:
+            plan = filtered.explain()
+            uses_index = f'SCAN {table}' not in plan
+        report.append((param, lookup, uses_index, plan))
+    return report
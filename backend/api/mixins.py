@@ -0,0 +1,80 @@
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import serializers
+
+
+class RelatedFieldsMixin:
+    """
+    Join the relations the active serializer reads from.
+
+    Dotted ``source=`` paths (``employee.name``) and nested serializers are
+    resolved against the queryset model: forward foreign keys and one-to-one
+    fields become ``select_related`` lookups, anything many-valued becomes a
+    ``prefetch_related`` lookup. Lookups are computed once per serializer
+    class, so list pages run a fixed number of queries regardless of size.
+    """
+
+    _related_lookups_cache = {}
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        select, prefetch = self.get_related_lookups(queryset.model, self.get_serializer_class())
+        if select:
+            queryset = queryset.select_related(*select)
+        if prefetch:
+            queryset = queryset.prefetch_related(*prefetch)
+        return queryset
+
+    @classmethod
+    def get_related_lookups(cls, model, serializer_class):
+        key = (model, serializer_class)
+        if key not in cls._related_lookups_cache:
+            select, prefetch = set(), set()
+            collect_related_lookups(model, serializer_class(), '', select, prefetch, many=False)
+            cls._related_lookups_cache[key] = (sorted(select), sorted(prefetch))
+        return cls._related_lookups_cache[key]
+
+
+def collect_related_lookups(model, serializer, prefix, select, prefetch, many):
+    """Walk ``serializer.fields`` and add the relation lookups they need."""
+    for field in serializer.fields.values():
+        if field.source == '*' or field.write_only:
+            continue
+        nested = field.child if isinstance(field, serializers.ListSerializer) else field
+        path = field.source.split('.')
+        if isinstance(nested, serializers.BaseSerializer):
+            target, lookup, is_many = resolve_relation(model, path)
+            if target is not None:
+                lookup = prefix + lookup
+                (prefetch if many or is_many else select).add(lookup)
+                collect_related_lookups(target, nested, lookup + '__', select, prefetch, many or is_many)
+            continue
+        if isinstance(nested, serializers.RelatedField) and not isinstance(nested, serializers.PrimaryKeyRelatedField):
+            target, lookup, is_many = resolve_relation(model, path)
+            if target is not None:
+                (prefetch if many or is_many else select).add(prefix + lookup)
+            continue
+        if len(path) > 1:
+            target, lookup, is_many = resolve_relation(model, path[:-1])
+            if target is not None:
+                (prefetch if many or is_many else select).add(prefix + lookup)
+
+
+def resolve_relation(model, path):
+    """Follow relation names in ``path``; returns ``(model, lookup, many)``.
+
+    ``model`` is ``None`` when the path is not made of model relations
+    (properties, methods), in which case nothing can be joined.
+    """
+    parts = []
+    many = False
+    for name in path:
+        try:
+            field = model._meta.get_field(name)
+        except FieldDoesNotExist:
+            return None, '', False
+        if not field.is_relation or field.related_model is None:
+            return None, '', False
+        many = many or field.many_to_many or field.one_to_many
+        parts.append(name)
+        model = field.related_model
+    return model, '__'.join(parts), many
@@ -0,0 +1,255 @@
+import base64
+import json
+from collections import OrderedDict
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import F, Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset (seek) pagination following the queryset ordering.
+
+    The ordering comes from the queryset (``order_by``) or the model's
+    ``Meta.ordering``, with ``id`` appended as a tiebreaker so every row has
+    a unique position. Orderings on a relation are expanded to the related
+    model's ordering (or its id), as Django does, so the columns sorted on
+    are the columns compared. Pages are fetched with a ``WHERE (a, b, id) >
+    (...)`` style filter instead of ``OFFSET`` and no ``COUNT(*)`` is ever
+    issued, so deep pages cost the same as the first one.
+
+    Nullable columns sort NULLs as the largest value (last ascending, first
+    descending) on every backend, and the seek filter has an ``__isnull``
+    branch for them. Cursors are opaque URL-safe tokens.
+    """
+
+    cursor_query_param = 'cursor'
+    page_size = api_settings.PAGE_SIZE
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(queryset)
+        self.cursor = self.decode_cursor(request)
+
+        reverse = bool(self.cursor and self.cursor['r'])
+        ordering = [(name, not desc) if reverse else (name, desc) for name, desc in self.ordering]
+        queryset = queryset.order_by(*[
+            self.order_by_expression(queryset.model, name, desc) for name, desc in ordering
+        ])
+        if self.cursor:
+            queryset = queryset.filter(self.build_seek_filter(queryset.model, ordering, self.cursor['p']))
+
+        results = list(queryset[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        results = results[:self.page_size]
+        if reverse:
+            results.reverse()
+
+        self.page = results
+        if reverse:
+            self.has_next = True
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = self.cursor is not None
+        return self.page
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def get_ordering(self, queryset):
+        """Return ``[(field, descending), ...]`` ending with the ``id`` tiebreaker."""
+        ordering = list(queryset.query.order_by) or list(queryset.model._meta.ordering)
+        fields = []
+        for item in ordering:
+            if not isinstance(item, str) or item == '?':
+                continue
+            desc = item.startswith('-')
+            name = item.lstrip('-')
+            if name == 'pk':
+                name = 'id'
+            fields.extend(self.expand_relation(queryset.model, name, desc))
+        if not any(name == 'id' for name, _ in fields):
+            last_desc = fields[-1][1] if fields else False
+            fields.append(('id', last_desc))
+        return fields
+
+    def expand_relation(self, model, name, desc, seen=()):
+        """Replace an ordering on a relation by the related model's ordering, or its id."""
+        fields = self.resolve_fields(model, name)
+        field = fields[-1] if fields else None
+        if field is None or not (field.many_to_one or field.one_to_one) or not field.concrete:
+            return [(name, desc)]
+        related = field.related_model
+        if not related._meta.ordering or related in seen:
+            return [(f'{name}__{related._meta.pk.name}', desc)]
+        expanded = []
+        for item in related._meta.ordering:
+            if not isinstance(item, str) or item == '?':
+                continue
+            item_name = item.lstrip('-')
+            item_name = related._meta.pk.name if item_name == 'pk' else item_name
+            expanded.extend(self.expand_relation(
+                model, f'{name}__{item_name}', desc != item.startswith('-'), seen=(*seen, related)
+            ))
+        return expanded
+
+    def resolve_fields(self, model, name):
+        """The model fields along ``name`` (``a__b__c``), or ``[]`` if it is not a field path."""
+        fields = []
+        for part in name.split('__'):
+            if model is None:
+                return []
+            try:
+                field = model._meta.get_field(part)
+            except FieldDoesNotExist:
+                return []
+            fields.append(field)
+            model = field.related_model if field.is_relation else None
+        return fields
+
+    def is_nullable(self, model, name):
+        """Whether ``name`` can be NULL; annotations and other non-field names are assumed nullable."""
+        fields = self.resolve_fields(model, name)
+        return not fields or any(field.null for field in fields)
+
+    def order_by_expression(self, model, name, desc):
+        if not self.is_nullable(model, name):
+            return ('-' if desc else '') + name
+        return F(name).desc(nulls_first=True) if desc else F(name).asc(nulls_last=True)
+
+    def build_seek_filter(self, model, ordering, position):
+        """Lexicographic "row comes after position" filter for the given ordering (NULLs sort last)."""
+        condition = Q()
+        equal = Q()
+        for (name, desc), value in zip(ordering, position):
+            value = self.to_python(model, name, value)
+            nullable = self.is_nullable(model, name)
+            if value is None:
+                # Only non-NULL values come after NULL, and only when descending.
+                if desc:
+                    condition |= equal & Q(**{f'{name}__isnull': False})
+                equal &= Q(**{f'{name}__isnull': True})
+                continue
+            after = Q(**{f'{name}__{"lt" if desc else "gt"}': value})
+            if nullable and not desc:
+                after |= Q(**{f'{name}__isnull': True})
+            condition |= equal & after
+            equal &= Q(**{name: value})
+        return condition
+
+    def to_python(self, model, name, value):
+        field = None
+        for part in name.split('__'):
+            try:
+                field = model._meta.get_field(part)
+            except FieldDoesNotExist:
+                return value
+            if field.is_relation and field.related_model is not None:
+                model = field.related_model
+        return field.to_python(value) if field is not None else value
+
+    def get_position(self, instance):
+        position = []
+        for name, _ in self.ordering:
+            value = instance
+            for part in name.split('__'):
+                value = getattr(value, part, None)
+                if value is None:
+                    break
+            if hasattr(value, 'pk'):
+                value = value.pk
+            if hasattr(value, 'isoformat'):
+                value = value.isoformat()
+            elif value is not None and not isinstance(value, (int, float, str, bool)):
+                value = str(value)
+            position.append(value)
+        return position
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            padded = encoded + '=' * (-len(encoded) % 4)
+            cursor = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')).decode('utf-8'))
+            position = cursor['p']
+            reverse = bool(cursor.get('r', False))
+        except (TypeError, ValueError, KeyError, UnicodeError):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(position, list) or len(position) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        return {'p': position, 'r': reverse}
+
+    def encode_cursor(self, instance, reverse):
+        payload = json.dumps({'p': self.get_position(instance), 'r': int(reverse)}, separators=(',', ':'))
+        token = base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+        return replace_query_param(self.base_url, self.cursor_query_param, token)
+
+
+class HybridPagination(PageNumberPagination):
+    """
+    Page-number pagination that switches to keyset mode on request.
+
+    Clients opt in with ``?pagination=keyset`` (or by following a ``cursor``
+    link); without either parameter responses are identical to
+    ``PageNumberPagination``.
+    """
+
+    mode_query_param = 'pagination'
+    keyset_mode = 'keyset'
+    keyset_class = KeysetPagination
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = None
+        if self.use_keyset(request):
+            self.keyset = self.keyset_class()
+            self.keyset.page_size = self.get_page_size(request)
+            page = self.keyset.paginate_queryset(queryset, request, view)
+            self.keyset.base_url = remove_query_param(self.keyset.base_url, self.page_query_param)
+            return page
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+    def use_keyset(self, request):
+        if self.keyset_class.cursor_query_param in request.query_params:
+            return True
+        return request.query_params.get(self.mode_query_param) == self.keyset_mode
@@ -0,0 +1,89 @@
+from unittest import mock
+
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from users.models import User
+
+
+class AuthenticatedClientMixin:
+    """Sets ``self.client`` to an API client authenticated as ``self.user``."""
+
+    @staticmethod
+    def create_user():
+        return User.objects.create_user(username='admin', email='admin@example.com', password='secret')
+
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+
+class AuthenticatedAPITestCase(AuthenticatedClientMixin, TestCase):
+    """
+    TestCase for API endpoints, with ``self.user`` created once per class.
+
+    Subclasses that override ``setUpTestData`` or ``setUp`` call ``super()``.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.user = cls.create_user()
+
+
+class AuthenticatedAPITransactionTestCase(AuthenticatedClientMixin, TransactionTestCase):
+    """TransactionTestCase for API endpoints, with ``self.user`` created per test."""
+
+    def setUp(self):
+        self.user = self.create_user()
+        super().setUp()
+
+
+class QueryCountAssertionsMixin:
+    """
+    TestCase mixin for checking list endpoints against N+1 queries.
+
+    ``assertConstantListQueries`` requests the same list URL with several
+    page sizes and fails if the number of queries changes with the page
+    size, which is what a missing ``select_related``/``prefetch_related``
+    looks like.
+    """
+
+    def count_list_queries(self, client, url, page_size):
+        from api.pagination import HybridPagination
+
+        with mock.patch.object(HybridPagination, 'page_size', page_size):
+            with CaptureQueriesContext(connection) as context:
+                response = client.get(url)
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(len(response.data['results']), page_size)
+        return len(context.captured_queries)
+
+    def assertConstantListQueries(self, client, url, page_sizes=(1, 5, 10)):
+        counts = {size: self.count_list_queries(client, url, size) for size in page_sizes}
+        self.assertEqual(
+            len(set(counts.values())), 1,
+            f'Query count for {url} depends on page size: {counts}'
+        )
+
+
+class FilterIndexAssertionsMixin:
+    """
+    TestCase mixin checking that every ``query_filters`` entry of a view is index-backed.
+
+    Filters in ``postgresql_only`` are only checked on PostgreSQL, for
+    indexes SQLite's planner cannot use for them.
+    """
+
+    def assertFiltersUseIndexes(self, view_class, postgresql_only=()):
+        from api.filters import explain_filters
+
+        query_filters = view_class.query_filters
+        if connection.vendor != 'postgresql':
+            query_filters = {param: lookup for param, lookup in query_filters.items() if param not in postgresql_only}
+        report = explain_filters(view_class.queryset.all(), query_filters)
+        missing = {param: plan for param, _, uses_index, plan in report if not uses_index}
+        self.assertFalse(missing, f'{view_class.__name__} filters without an index: {missing}')
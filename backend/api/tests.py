@@ -1,3 +1,152 @@
-from django.test import TestCase
+import base64
+import json
+from unittest import mock
 
-# Create your tests here.
+from datetime import date
+
+from django.db.models import F
+from rest_framework.exceptions import NotFound
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from attendance.models import Holiday, LeaveBalance
+from employees.models import Department, Employee
+from .pagination import HybridPagination, KeysetPagination
+from .testing import AuthenticatedAPITestCase
+
+
+def cursor(position, reverse=False):
+    payload = json.dumps({'p': position, 'r': int(reverse)}).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip('=')
+
+
+class PaginationTests(AuthenticatedAPITestCase):
+    """Keyset pages follow the ordering across ties in both directions; page numbers stay the default."""
+
+    url = '/api/employees/'
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        for index, name in enumerate(['Cid', 'Ben', 'Ann', 'Ben', 'Ben', 'Dee', 'Ben']):
+            Employee.objects.create(name=name, email=f'employee{index}@example.com')
+        cls.ordered = list(Employee.objects.order_by('name', 'id').values_list('pk', flat=True))
+
+    def setUp(self):
+        super().setUp()
+        patcher = mock.patch.object(HybridPagination, 'page_size', 2)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def pages(self, url, link):
+        pages = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200, response.content)
+            pages.append([row['id'] for row in response.data['results']])
+            url = response.data[link]
+        return pages
+
+    def test_keyset_pages_cover_ties_once(self):
+        response = self.client.get(f'{self.url}?pagination=keyset')
+        self.assertNotIn('count', response.data)
+        self.assertIsNone(response.data['previous'])
+        pages = self.pages(f'{self.url}?pagination=keyset', 'next')
+        self.assertEqual([len(page) for page in pages], [2, 2, 2, 1])
+        self.assertEqual(sum(pages, []), self.ordered)
+
+    def test_previous_links_walk_back(self):
+        url = f'{self.url}?pagination=keyset'
+        while True:
+            response = self.client.get(url)
+            if not response.data['next']:
+                break
+            url = response.data['next']
+        self.assertEqual(response.data['results'][0]['id'], self.ordered[-1])
+        pages = self.pages(response.data['previous'], 'previous')
+        self.assertEqual(sum(reversed(pages), []), self.ordered[:-1])
+
+    def test_descending_ordering(self):
+        pagination = KeysetPagination()
+        pagination.page_size = 3
+        queryset = Employee.objects.order_by('-name')
+        factory = APIRequestFactory()
+        seen, request = [], Request(factory.get(self.url))
+        while request is not None:
+            seen += [employee.pk for employee in pagination.paginate_queryset(queryset, request)]
+            link = pagination.get_next_link()
+            request = Request(factory.get(link)) if link else None
+        self.assertEqual(seen, list(Employee.objects.order_by('-name', '-id').values_list('pk', flat=True)))
+
+    def test_invalid_cursor(self):
+        for value in ('not-a-cursor', cursor('Ben'), cursor(['Ben']), base64.urlsafe_b64encode(b'\xff').decode()):
+            response = self.client.get(f'{self.url}?cursor={value}')
+            self.assertEqual(response.status_code, 404, value)
+        pagination = KeysetPagination()
+        with self.assertRaises(NotFound):
+            pagination.paginate_queryset(Employee.objects.all(), Request(APIRequestFactory().get('/?cursor=e30')))
+
+    def test_page_numbers_by_default(self):
+        response = self.client.get(self.url)
+        self.assertEqual(list(response.data), ['count', 'next', 'previous', 'results'])
+        self.assertEqual(response.data['count'], 7)
+        self.assertIn('page=2', response.data['next'])
+        pages = self.pages(self.url, 'next')
+        self.assertEqual(sum(pages, []), self.ordered)
+
+
+class KeysetOrderingTests(AuthenticatedAPITestCase):
+    """Keyset pages cover nullable and relation orderings without errors or gaps."""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        sales, ops = Department.objects.create(name='Sales'), Department.objects.create(name='Ops')
+        for day in (date(2025, 1, 1), date(2025, 5, 1)):
+            for department in (sales, None, ops):
+                Holiday.objects.create(name='Holiday', date=day, department=department)
+        for name in ('Zed', 'Amy', 'Cat', 'Bob'):
+            employee = Employee.objects.create(name=name, email=f'{name.lower()}@example.com')
+            for leave_type in ('Sick', 'Annual'):
+                LeaveBalance.objects.create(employee=employee, leave_type=leave_type)
+
+    def setUp(self):
+        super().setUp()
+        patcher = mock.patch.object(HybridPagination, 'page_size', 2)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def walk(self, url):
+        ids = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200, response.content)
+            ids += [row['id'] for row in response.data['results']]
+            url = response.data['next']
+        return ids
+
+    def test_nullable_relation_ordering(self):
+        # Company-wide holidays (no department) come after the named departments.
+        expected = Holiday.objects.order_by('date', F('department__name').asc(nulls_last=True), 'id')
+        self.assertEqual(
+            self.walk('/api/attendance/holidays/?pagination=keyset'), list(expected.values_list('pk', flat=True))
+        )
+
+    def test_descending_nullable_ordering(self):
+        pagination = KeysetPagination()
+        pagination.page_size = 2
+        queryset = Holiday.objects.order_by('-department', 'date')
+        factory = APIRequestFactory()
+        seen, request = [], Request(factory.get('/'))
+        while request is not None:
+            seen += [holiday.pk for holiday in pagination.paginate_queryset(queryset, request)]
+            link = pagination.get_next_link()
+            request = Request(factory.get(link)) if link else None
+        expected = Holiday.objects.order_by(F('department__name').desc(nulls_first=True), 'date', 'id')
+        self.assertEqual(seen, list(expected.values_list('pk', flat=True)))
+
+    def test_relation_ordering_follows_the_related_model(self):
+        expected = LeaveBalance.objects.order_by('employee__name', 'leave_type', 'id')
+        self.assertEqual(
+            self.walk('/api/attendance/leave-balances/?pagination=keyset'), list(expected.values_list('pk', flat=True))
+        )
@@ -0,0 +1,33 @@
+from django.db.models.signals import pre_save
+
+# Fields whose stored values are kept on saved instances, per model.
+TRACKED_FIELDS = {}
+
+
+def track_previous(model, *fields):
+    """
+    Keep the stored values of ``fields`` on every saved ``model`` instance.
+
+    Signal receivers that react to a row moving (to another day, period or
+    employee) register the fields they compare. A single ``pre_save``
+    receiver per model reads all registered fields in one query, so
+    several apps tracking the same model cost one lookup per save;
+    ``previous_value`` reads them back in ``post_save``.
+    """
+    registered = TRACKED_FIELDS.setdefault(model, [])
+    if not registered:
+        pre_save.connect(remember_previous_values, sender=model, dispatch_uid=f'track_previous:{model._meta.label}')
+    registered += [name for name in fields if name not in registered]
+
+
+def remember_previous_values(sender, instance, raw=False, **kwargs):
+    instance._previous_values = {}
+    if raw or instance.pk is None:
+        return
+    stored = sender._base_manager.filter(pk=instance.pk).values(*TRACKED_FIELDS[sender]).first()
+    instance._previous_values = stored or {}
+
+
+def previous_value(instance, name):
+    """The stored value of a tracked field before the last save; ``None`` for new rows."""
+    return getattr(instance, '_previous_values', {}).get(name)
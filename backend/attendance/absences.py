@@ -0,0 +1,61 @@
+from django.db import connection, transaction
+from django.utils import timezone
+
+from employees.models import Employee
+from .models import AttendanceRecord, Holiday, LeaveRequest, WorkSchedule
+from .rollups import rebuild_range
+from .workdays import DEFAULT_MASK
+
+
+def mark_absences(day):
+    """
+    Insert ``Absent`` records for everyone expected at work on ``day`` who
+    has no attendance record and no approved leave covering it. Employees
+    without a ``WorkSchedule`` work Monday-Friday. Company-wide holidays and
+    holidays of the employee's department are skipped.
+
+    Runs as one ``INSERT ... SELECT ... ON CONFLICT DO NOTHING`` so it is
+    idempotent against the ``(employee, date)`` unique constraint and never
+    loads employees into Python. Returns the number of rows inserted.
+    """
+    qn = connection.ops.quote_name
+    attendance = qn(AttendanceRecord._meta.db_table)
+    employees = qn(Employee._meta.db_table)
+    schedules = qn(WorkSchedule._meta.db_table)
+    leaves = qn(LeaveRequest._meta.db_table)
+    holidays = qn(Holiday._meta.db_table)
+    now = timezone.now()
+
+    sql = f"""
+        INSERT INTO {attendance}
+            (employee_id, date, check_in_time, check_out_time, status, hours_worked,
+             late_minutes, overtime_hours, undertime_hours, notes, created_at, updated_at)
+        SELECT e.id, %s, NULL, NULL, %s, 0, 0, 0, 0, %s, %s, %s
+        FROM {employees} e
+        LEFT JOIN {schedules} ws ON ws.employee_id = e.id
+        WHERE e.status = %s
+          AND (COALESCE(ws.work_days_mask, %s) & %s) <> 0
+          AND NOT EXISTS (
+              SELECT 1 FROM {leaves} lr
+              WHERE lr.employee_id = e.id AND lr.status = %s
+                AND lr.start_date <= %s AND lr.end_date >= %s
+          )
+          AND NOT EXISTS (
+              SELECT 1 FROM {holidays} h
+              WHERE h.date = %s AND (h.department_id IS NULL OR h.department_id = e.department_id)
+          )
+        ON CONFLICT (employee_id, date) DO NOTHING
+    """
+    params = [
+        day, AttendanceRecord.AttendanceStatus.ABSENT, 'Marked absent automatically (no check-in).', now, now,
+        Employee.EmploymentStatus.ACTIVE,
+        DEFAULT_MASK, 1 << day.weekday(),
+        LeaveRequest.LeaveStatus.APPROVED, day, day,
+        day,
+    ]
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        inserted = cursor.rowcount
+        if inserted:
+            rebuild_range(day, day)
+    return inserted
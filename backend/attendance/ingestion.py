@@ -0,0 +1,139 @@
+from django.db import connection, transaction
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+
+from employees.models import Employee
+from .models import AttendanceRecord
+from .rollups import refresh_for_employee_dates
+from .serializers import AttendanceEventSerializer
+
+
+# Columns that overwrite the stored value when an event supplies them.
+OVERWRITE_FIELDS = ('status', 'hours_worked', 'notes')
+ROWS_PER_STATEMENT = 500
+
+
+def validate_events(events):
+    """Validate raw event dicts; returns ``(valid, errors)``.
+
+    ``valid`` is a list of ``(index, data)``; ``errors`` follows the
+    ``{'index': ..., 'errors': ...}`` shape returned by the API.
+    """
+    serializer = AttendanceEventSerializer()
+    valid = []
+    errors = []
+    for index, event in enumerate(events):
+        if not isinstance(event, dict):
+            errors.append({'index': index, 'errors': {'non_field_errors': ['Expected an object.']}})
+            continue
+        try:
+            valid.append((index, serializer.run_validation(event)))
+        except ValidationError as exc:
+            errors.append({'index': index, 'errors': exc.detail})
+
+    known = set(Employee.objects.filter(
+        pk__in={data['employee'] for _, data in valid}
+    ).values_list('pk', flat=True))
+    checked = []
+    for index, data in valid:
+        if data['employee'] not in known:
+            errors.append({'index': index, 'errors': {'employee': ['Employee does not exist.']}})
+        else:
+            checked.append((index, data))
+    errors.sort(key=lambda error: error['index'])
+    return checked, errors
+
+
+def merge_events(events):
+    """Collapse events for the same ``(employee, date)`` in arrival order.
+
+    The first check-in and the last check-out win; other fields take the
+    last supplied value.
+    """
+    merged = {}
+    for data in events:
+        key = (data['employee'], data['date'])
+        current = merged.setdefault(key, {'employee': data['employee'], 'date': data['date']})
+        if data.get('check_in_time') is not None and current.get('check_in_time') is None:
+            current['check_in_time'] = data['check_in_time']
+        if data.get('check_out_time') is not None:
+            current['check_out_time'] = data['check_out_time']
+        for name in OVERWRITE_FIELDS:
+            if name in data:
+                current[name] = data[name]
+    return list(merged.values())
+
+
+def upsert_events(events):
+    """
+    Insert or merge attendance events with ``INSERT ... ON CONFLICT``.
+
+    Relies on the ``(employee, date)`` unique constraint instead of an
+    ``exists()`` check per event, so concurrent batches cannot race. On
+    conflict the stored check-in is kept if already set, the check-out is
+    replaced when the event has one, and status/hours/notes are only
+    overwritten when the event supplied them. Events are grouped by which
+    of those fields they carry so each group is one statement per
+    ``ROWS_PER_STATEMENT`` rows.
+    """
+    merged = merge_events(events)
+    groups = {}
+    for data in merged:
+        shape = tuple(name for name in OVERWRITE_FIELDS if name in data)
+        groups.setdefault(shape, []).append(data)
+
+    with transaction.atomic():
+        for shape, rows in groups.items():
+            for start in range(0, len(rows), ROWS_PER_STATEMENT):
+                _upsert_rows(rows[start:start + ROWS_PER_STATEMENT], shape)
+        refresh_for_employee_dates((data['employee'], data['date']) for data in merged)
+    return len(merged)
+
+
+def _upsert_rows(rows, overwrite):
+    opts = AttendanceRecord._meta
+    qn = connection.ops.quote_name
+    table = qn(opts.db_table)
+    names = [
+        'employee', 'date', 'check_in_time', 'check_out_time', 'status',
+        'hours_worked', 'late_minutes', 'overtime_hours', 'undertime_hours', 'notes', 'created_at', 'updated_at'
+    ]
+    fields = [opts.get_field(name) for name in names]
+    columns = [qn(field.column) for field in fields]
+
+    now = timezone.now()
+    params = []
+    for data in rows:
+        values = {
+            'employee': data['employee'],
+            'date': data['date'],
+            'check_in_time': data.get('check_in_time'),
+            'check_out_time': data.get('check_out_time'),
+            'status': data.get('status', AttendanceRecord.AttendanceStatus.PRESENT),
+            'hours_worked': data.get('hours_worked', 0),
+            'late_minutes': 0,
+            'overtime_hours': 0,
+            'undertime_hours': 0,
+            'notes': data.get('notes', ''),
+            'created_at': now,
+            'updated_at': now,
+        }
+        params.extend(field.get_db_prep_save(values[field.name], connection) for field in fields)
+
+    check_in, check_out = qn('check_in_time'), qn('check_out_time')
+    assignments = [
+        f'{check_in} = COALESCE({table}.{check_in}, EXCLUDED.{check_in})',
+        f'{check_out} = COALESCE(EXCLUDED.{check_out}, {table}.{check_out})',
+    ]
+    assignments += [f'{qn(opts.get_field(name).column)} = EXCLUDED.{qn(opts.get_field(name).column)}' for name in overwrite]
+    assignments.append(f'{qn("updated_at")} = EXCLUDED.{qn("updated_at")}')
+
+    placeholders = '(' + ', '.join(['%s'] * len(columns)) + ')'
+    sql = (
+        f'INSERT INTO {table} ({", ".join(columns)}) '
+        f'VALUES {", ".join([placeholders] * len(rows))} '
+        f'ON CONFLICT ({qn(opts.get_field("employee").column)}, {qn("date")}) '
+        f'DO UPDATE SET {", ".join(assignments)}'
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
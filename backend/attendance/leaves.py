@@ -0,0 +1,302 @@
+"""
+Bulk leave-request maintenance.
+
+``recalculate_days_requested`` recomputes ``LeaveRequest.days_requested``
+from work schedules and the holiday calendar for many requests at once:
+one query loads the requests, the business-day counts come from the shared
+work calendar's prefix sums, and changed rows are written with chunked
+``UPDATE ... FROM (VALUES ...)`` statements.
+
+``decide_pending`` approves or rejects many pending requests with one
+locking read and one ``UPDATE``, applying the same department leave limit
+as single approvals.
+
+``overlapping`` and ``department_coverage`` find leave intersecting a
+date range. On PostgreSQL the test is ``daterange(start_date, end_date,
+'[]') && daterange(...)``, served by a GiST index over approved leave;
+other databases fall back to comparing the two date columns.
+``leave_calendar`` builds the who's-off-when view from the same query.
+"""
+import uuid
+from datetime import timedelta
+
+import numpy as np
+from django.conf import settings
+from django.contrib.postgres.fields import DateRangeField
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import Func, Value
+from django.utils import timezone
+
+from employees.models import Employee
+from .ledger import leave_entry, post_entries
+from .models import LeaveLedgerEntry, LeaveRequest
+from .workdays import DEFAULT_MASK, get_calendar
+
+
+WRITE_BATCH_SIZE = 2000
+
+CALENDAR_VERSION_KEY = 'attendance:leave-calendar-version'
+
+# Leave that blocks the same days being requested again.
+ACTIVE_STATUSES = (LeaveRequest.LeaveStatus.PENDING, LeaveRequest.LeaveStatus.APPROVED)
+
+
+class DateRange(Func):
+    """``daterange(lower, upper, '[]')``: an inclusive range of two date expressions."""
+
+    function = 'daterange'
+    output_field = DateRangeField()
+
+    def __init__(self, lower, upper, **extra):
+        super().__init__(lower, upper, Value('[]'), **extra)
+
+
+def overlapping(leave_requests, start, end):
+    """Restrict ``leave_requests`` to those intersecting ``[start, end]``."""
+    if connection.vendor == 'postgresql':
+        return leave_requests.alias(
+            period=DateRange('start_date', 'end_date')
+        ).filter(period__overlap=DateRange(Value(start), Value(end)))
+    return leave_requests.filter(start_date__lte=end, end_date__gte=start)
+
+
+def find_overlaps(employee, start, end, exclude=None):
+    """Ids of the employee's pending or approved leave intersecting ``[start, end]``."""
+    leave_requests = LeaveRequest.objects.filter(employee=employee, status__in=ACTIVE_STATUSES)
+    if exclude is not None:
+        leave_requests = leave_requests.exclude(pk=exclude)
+    return list(overlapping(leave_requests, start, end).order_by('start_date').values_list('pk', flat=True))
+
+
+def department_coverage(leave_request, approving=()):
+    """
+    How many colleagues in the requester's department are already on
+    approved leave during ``leave_request``.
+
+    One indexed query fetches the overlapping approved leave; the daily
+    peak is then found with a difference array over the request's days.
+    ``approving`` are requests being approved in the same transaction that
+    are not yet stored as Approved; those in the department count too.
+    """
+    employee = leave_request.employee
+    start, end = leave_request.start_date, leave_request.end_date
+    rows = list(overlapping(
+        LeaveRequest.objects.filter(
+            status=LeaveRequest.LeaveStatus.APPROVED, employee__department=employee.department_id
+        ).exclude(employee=employee),
+        start, end
+    ).order_by().values_list('employee_id', 'start_date', 'end_date'))
+    rows.extend(
+        (other.employee_id, other.start_date, other.end_date) for other in approving
+        if other.employee.department_id == employee.department_id and other.employee_id != employee.pk
+        and other.start_date <= end and other.end_date >= start
+    )
+    headcount = Employee.objects.filter(
+        department=employee.department_id, status=Employee.EmploymentStatus.ACTIVE
+    ).count()
+
+    days = (end - start).days + 1
+    changes = np.zeros(days + 1, dtype=np.int64)
+    for _, lower, upper in rows:
+        changes[max((lower - start).days, 0)] += 1
+        changes[min((upper - start).days, days - 1) + 1] -= 1
+    absent = np.cumsum(changes[:-1])
+    peak_index = int(np.argmax(absent)) if days else 0
+    peak = int(absent[peak_index]) if days else 0
+    return {
+        'department': employee.department.name if employee.department_id else '',
+        'headcount': headcount,
+        'on_leave': len({row[0] for row in rows}),
+        'peak_on_leave': peak,
+        'peak_date': start + timedelta(days=peak_index) if peak else None,
+        'peak_ratio': round(peak / headcount, 3) if headcount else 0.0,
+    }
+
+
+def exceeds_leave_limit(coverage):
+    """Whether approving one more absence exceeds ``LEAVE_MAX_DEPARTMENT_ABSENCE`` of the department."""
+    headcount = coverage['headcount']
+    return bool(headcount) and (coverage['peak_on_leave'] + 1) / headcount > settings.LEAVE_MAX_DEPARTMENT_ABSENCE
+
+
+def calendar_version():
+    """Token that changes whenever leave requests change; part of calendar cache keys."""
+    version = cache.get(CALENDAR_VERSION_KEY)
+    if version is None:
+        version = uuid.uuid4().hex
+        cache.add(CALENDAR_VERSION_KEY, version, None)
+        version = cache.get(CALENDAR_VERSION_KEY, version)
+    return version
+
+
+def invalidate_leave_calendar():
+    cache.set(CALENDAR_VERSION_KEY, uuid.uuid4().hex, None)
+
+
+def leave_calendar(start, end, department=None, counts_only=False):
+    """
+    Approved leave per day in ``[start, end]``, optionally for one department
+    (given by id or by name).
+
+    One range query fetches the overlapping requests; a sweep over their
+    start/end events then produces the days. The payload is compact:
+    ``days`` lists ``[offset, [employee ids]]`` for days with anyone off
+    (offset 0 = ``start``) and ``employees`` maps each id once to a name,
+    or with ``counts_only`` ``counts`` holds one number per day. Results
+    are cached per range and department until leave requests, employees
+    or departments change.
+    """
+    key = f'attendance:leave-calendar:{calendar_version()}:{start}:{end}:{department or ""}:{int(counts_only)}'
+    payload = cache.get(key)
+    if payload is not None:
+        return payload
+
+    leave_requests = LeaveRequest.objects.filter(status=LeaveRequest.LeaveStatus.APPROVED)
+    if department:
+        if str(department).isdigit():
+            leave_requests = leave_requests.filter(employee__department=int(department))
+        else:
+            leave_requests = leave_requests.filter(employee__department__name__iexact=department)
+    rows = list(overlapping(leave_requests, start, end).order_by().values_list(
+        'employee_id', 'employee__name', 'start_date', 'end_date'
+    ))
+
+    days = (end - start).days + 1
+    events = []
+    for employee_id, _, lower, upper in rows:
+        events.append((max((lower - start).days, 0), 1, employee_id))
+        events.append((min((upper - start).days, days - 1) + 1, -1, employee_id))
+    events.sort()
+
+    payload = {'start': start, 'end': end, 'department': department or None}
+    if counts_only:
+        counts = np.zeros(days + 1, dtype=np.int64)
+        for offset, change, _ in events:
+            counts[offset] += change
+        payload['counts'] = np.cumsum(counts[:-1]).tolist()
+    else:
+        active = {}
+        current = []
+        calendar_days = []
+        position = 0
+        for offset in range(days):
+            changed = False
+            while position < len(events) and events[position][0] == offset:
+                _, change, employee_id = events[position]
+                active[employee_id] = active.get(employee_id, 0) + change
+                if not active[employee_id]:
+                    del active[employee_id]
+                changed = True
+                position += 1
+            if changed:
+                current = sorted(active)
+            if current:
+                calendar_days.append([offset, current])
+        payload['employees'] = {employee_id: name for employee_id, name, _, _ in rows}
+        payload['days'] = calendar_days
+
+    cache.set(key, payload, settings.LEAVE_CALENDAR_CACHE_SECONDS)
+    return payload
+
+
+def recalculate_days_requested(leave_requests=None):
+    """Recompute ``days_requested``; returns ``(checked, updated)``.
+
+    ``leave_requests`` is an optional ``LeaveRequest`` queryset to limit
+    the recalculation. Requests outside the work calendar are left alone.
+    """
+    calendar = get_calendar()
+    if leave_requests is None:
+        leave_requests = LeaveRequest.objects.all()
+    rows = list(leave_requests.filter(
+        start_date__gte=calendar.start, end_date__lte=calendar.end
+    ).order_by().values_list(
+        'id', 'start_date', 'end_date', 'days_requested',
+        'employee__department', 'employee__work_schedule__work_days_mask'
+    ))
+    if not rows:
+        return 0, 0
+
+    ids, starts, ends, stored, department_ids, masks = zip(*rows)
+    days = calendar.business_days_many(
+        [mask or DEFAULT_MASK for mask in masks],
+        department_ids,
+        [calendar.index(day) for day in starts],
+        [calendar.index(day) for day in ends],
+    )
+    changed = np.flatnonzero(days != np.asarray(stored))
+    updates = [(ids[i], int(days[i])) for i in changed]
+
+    qn = connection.ops.quote_name
+    table = qn(LeaveRequest._meta.db_table)
+    now = timezone.now()
+    with transaction.atomic(), connection.cursor() as cursor:
+        for start in range(0, len(updates), WRITE_BATCH_SIZE):
+            chunk = updates[start:start + WRITE_BATCH_SIZE]
+            params = [value for row in chunk for value in row]
+            params.append(now)
+            values = ', '.join(['(%s, %s)'] * len(chunk))
+            cursor.execute(
+                f'WITH v (id, days) AS (VALUES {values}) '
+                f'UPDATE {table} SET "days_requested" = v.days, "updated_at" = %s FROM v '
+                f'WHERE {table}."id" = v.id',
+                params
+            )
+    return len(rows), len(updates)
+
+
+def decide_pending(ids, status, force=False, **changes):
+    """
+    Move the pending requests among ``ids`` to ``status`` (Approved/Rejected).
+
+    The requests are locked, their status is read under the lock, the
+    pending ones are updated with a single ``UPDATE`` and, for approvals,
+    debited in the leave ledger, all in one transaction. Approvals get the
+    same department leave limit check as a single approval (counting the
+    requests approved earlier in the batch); unless ``force`` is true a
+    request over the limit stays pending. Requests that are missing or no
+    longer pending are left untouched. Returns one ``{'id', 'outcome',
+    'status'}`` dict per id, where outcome is ``'updated'``, ``'conflict'``
+    (with the ``coverage``), ``'skipped'`` or ``'not_found'`` and status is
+    the request's status afterwards.
+    """
+    ids = list(dict.fromkeys(ids))
+    pending_status = LeaveRequest.LeaveStatus.PENDING
+    approving = status == LeaveRequest.LeaveStatus.APPROVED
+    conflicts = {}
+    with transaction.atomic():
+        locked = list(
+            LeaveRequest.objects.select_for_update(of=('self',)).filter(pk__in=ids).select_related(
+                'employee__department'
+            ).order_by('pk')
+        )
+        found = {leave_request.pk: leave_request.status for leave_request in locked}
+        pending = []
+        for leave_request in locked:
+            if leave_request.status != pending_status:
+                continue
+            if approving and not force:
+                coverage = department_coverage(leave_request, approving=pending)
+                if exceeds_leave_limit(coverage):
+                    conflicts[leave_request.pk] = coverage
+                    continue
+            pending.append(leave_request)
+        decided = {leave_request.pk for leave_request in pending}
+        if decided:
+            LeaveRequest.objects.filter(pk__in=decided).update(status=status, updated_at=timezone.now(), **changes)
+            if approving:
+                post_entries(leave_entry(leave_request, LeaveLedgerEntry.EntryType.DEBIT) for leave_request in pending)
+            transaction.on_commit(invalidate_leave_calendar)
+
+    results = []
+    for pk in ids:
+        if pk in decided:
+            results.append({'id': pk, 'outcome': 'updated', 'status': status})
+        elif pk in conflicts:
+            results.append({'id': pk, 'outcome': 'conflict', 'status': pending_status, 'coverage': conflicts[pk]})
+        elif pk in found:
+            results.append({'id': pk, 'outcome': 'skipped', 'status': found[pk]})
+        else:
+            results.append({'id': pk, 'outcome': 'not_found', 'status': None})
+    return results
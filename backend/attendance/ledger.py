@@ -0,0 +1,181 @@
+"""
+Leave ledger and running balances.
+
+Every change to an employee's leave entitlement is appended to
+``LeaveLedgerEntry``; ``LeaveBalance`` holds one running total per employee
+and leave type and is updated in the same transaction with an
+``INSERT ... ON CONFLICT DO UPDATE`` that adds the delta, so reading a
+balance is one indexed row and never a scan of the history.
+"""
+from decimal import Decimal
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from employees.models import Employee
+from .models import LeaveBalance, LeaveLedgerEntry, LeaveRequest
+
+
+EntryType = LeaveLedgerEntry.EntryType
+
+
+def _balance_deltas(entries):
+    """``{(employee_id, leave_type): [balance, accrued, used]}`` for a list of entries."""
+    deltas = {}
+    for entry in entries:
+        delta = deltas.setdefault((entry.employee_id, entry.leave_type), [Decimal(0)] * 3)
+        days = Decimal(entry.days)
+        delta[0] += days
+        if entry.entry_type == EntryType.ACCRUAL:
+            delta[1] += days
+        elif entry.entry_type in (EntryType.DEBIT, EntryType.CANCELLATION):
+            delta[2] -= days
+    return deltas
+
+
+def _apply_deltas(deltas):
+    if not deltas:
+        return
+    qn = connection.ops.quote_name
+    table = qn(LeaveBalance._meta.db_table)
+    now = timezone.now()
+    params = []
+    for (employee_id, leave_type), (balance, accrued, used) in deltas.items():
+        params.extend([employee_id, leave_type, balance, accrued, used, now])
+    placeholders = ', '.join(['(%s, %s, %s, %s, %s, %s)'] * len(deltas))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {table} ("employee_id", "leave_type", "balance", "accrued", "used", "updated_at") '
+            f'VALUES {placeholders} '
+            f'ON CONFLICT ("employee_id", "leave_type") DO UPDATE SET '
+            f'"balance" = {table}."balance" + EXCLUDED."balance", '
+            f'"accrued" = {table}."accrued" + EXCLUDED."accrued", '
+            f'"used" = {table}."used" + EXCLUDED."used", '
+            f'"updated_at" = EXCLUDED."updated_at"',
+            params
+        )
+
+
+def post_entries(entries):
+    """Append ledger entries and apply them to the running balances atomically."""
+    entries = list(entries)
+    with transaction.atomic():
+        LeaveLedgerEntry.objects.bulk_create(entries)
+        _apply_deltas(_balance_deltas(entries))
+    return entries
+
+
+def leave_entry(leave_request, entry_type, note=''):
+    """Ledger entry for an approved request (debit) or its reversal (cancellation)."""
+    days = Decimal(leave_request.days_requested)
+    return LeaveLedgerEntry(
+        employee_id=leave_request.employee_id,
+        leave_type=leave_request.leave_type,
+        entry_type=entry_type,
+        days=-days if entry_type == EntryType.DEBIT else days,
+        effective_date=leave_request.start_date,
+        leave_request=leave_request,
+        note=note,
+    )
+
+
+def record_status_change(leave_request, previous_status):
+    """Post the ledger movement for a leave request moving from ``previous_status``.
+
+    Approving debits the requested days; moving an approved request to
+    any other status credits them back. Other transitions have no effect.
+    """
+    approved = LeaveRequest.LeaveStatus.APPROVED
+    if previous_status != approved and leave_request.status == approved:
+        return post_entries([leave_entry(leave_request, EntryType.DEBIT)])
+    if previous_status == approved and leave_request.status != approved:
+        return post_entries([leave_entry(leave_request, EntryType.CANCELLATION, f'Leave {leave_request.status.lower()}.')])
+    return []
+
+
+def accrue(effective_date, days_by_type, employee_ids=None):
+    """
+    Accrue leave for every active employee (or ``employee_ids``) on ``effective_date``.
+
+    ``days_by_type`` maps ``LeaveType`` values to the days granted. Each
+    leave type is two set-based statements: the balance upsert and the
+    ledger insert, both skipping employees already accrued for that date,
+    so re-running the job for the same date changes nothing. Returns the
+    number of ledger entries written.
+    """
+    qn = connection.ops.quote_name
+    employees = qn(Employee._meta.db_table)
+    ledger = qn(LeaveLedgerEntry._meta.db_table)
+    balances = qn(LeaveBalance._meta.db_table)
+    now = timezone.now()
+
+    scope = 'e.status = %s'
+    scope_params = [Employee.EmploymentStatus.ACTIVE]
+    if employee_ids is not None:
+        employee_ids = list(employee_ids)
+        if not employee_ids:
+            return 0
+        scope += f' AND e.id IN ({", ".join(["%s"] * len(employee_ids))})'
+        scope_params += employee_ids
+    not_accrued = (
+        f'NOT EXISTS (SELECT 1 FROM {ledger} l WHERE l.employee_id = e.id AND l.leave_type = %s '
+        f'AND l.entry_type = %s AND l.effective_date = %s)'
+    )
+
+    created = 0
+    with transaction.atomic(), connection.cursor() as cursor:
+        for leave_type, days in days_by_type.items():
+            days = Decimal(str(days))
+            not_accrued_params = [leave_type, EntryType.ACCRUAL, effective_date]
+            cursor.execute(
+                f'INSERT INTO {balances} ("employee_id", "leave_type", "balance", "accrued", "used", "updated_at") '
+                f'SELECT e.id, %s, %s, %s, 0, %s FROM {employees} e WHERE {scope} AND {not_accrued} '
+                f'ON CONFLICT ("employee_id", "leave_type") DO UPDATE SET '
+                f'"balance" = {balances}."balance" + EXCLUDED."balance", '
+                f'"accrued" = {balances}."accrued" + EXCLUDED."accrued", '
+                f'"updated_at" = EXCLUDED."updated_at"',
+                [leave_type, days, days, now, *scope_params, *not_accrued_params]
+            )
+            cursor.execute(
+                f'INSERT INTO {ledger} ("employee_id", "leave_type", "entry_type", "days", "effective_date", '
+                f'"leave_request_id", "note", "created_at") '
+                f'SELECT e.id, %s, %s, %s, %s, NULL, %s, %s FROM {employees} e WHERE {scope} AND {not_accrued}',
+                [leave_type, EntryType.ACCRUAL, days, effective_date, 'Scheduled accrual.', now,
+                 *scope_params, *not_accrued_params]
+            )
+            created += cursor.rowcount
+    return created
+
+
+def carry_over(effective_date, cap, leave_types):
+    """Expire balance above ``cap`` days for ``leave_types``; returns entries written.
+
+    The excess is booked as a negative ``Carry Over`` entry and the running
+    balances are set to ``cap``, both set-based.
+    """
+    qn = connection.ops.quote_name
+    ledger = qn(LeaveLedgerEntry._meta.db_table)
+    balances = qn(LeaveBalance._meta.db_table)
+    cap = Decimal(str(cap))
+    leave_types = list(leave_types)
+    if not leave_types:
+        return 0
+    types = ', '.join(['%s'] * len(leave_types))
+    now = timezone.now()
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {ledger} ("employee_id", "leave_type", "entry_type", "days", "effective_date", '
+            f'"leave_request_id", "note", "created_at") '
+            f'SELECT b.employee_id, b.leave_type, %s, %s - b.balance, %s, NULL, %s, %s '
+            f'FROM {balances} b WHERE b.balance > %s AND b.leave_type IN ({types})',
+            [EntryType.CARRY_OVER, cap, effective_date, f'Balance above {cap} days not carried over.', now,
+             cap, *leave_types]
+        )
+        created = cursor.rowcount
+        cursor.execute(
+            f'UPDATE {balances} SET "balance" = %s, "updated_at" = %s '
+            f'WHERE "balance" > %s AND "leave_type" IN ({types})',
+            [cap, now, cap, *leave_types]
+        )
+    return created
@@ -0,0 +1,55 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from attendance.ledger import accrue, carry_over
+from attendance.models import LeaveRequest
+
+
+class Command(BaseCommand):
+    help = 'Accrue leave for all active employees, optionally capping carried-over balances first.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date', help='Accrual date (YYYY-MM-DD). Defaults to today.')
+        parser.add_argument(
+            '--days', action='append', metavar='TYPE=DAYS',
+            help='Days to accrue for a leave type, e.g. Annual=1.75 (repeatable). Defaults to LEAVE_ACCRUAL_DAYS.'
+        )
+        parser.add_argument(
+            '--carry-over-cap', type=float,
+            help='Expire balance above this many days for the accrued leave types before accruing.'
+        )
+
+    def handle(self, *args, **options):
+        if options['date']:
+            try:
+                day = parse_date(options['date'])
+            except ValueError:
+                day = None
+            if day is None:
+                raise CommandError('--date must be a date in YYYY-MM-DD format.')
+        else:
+            day = timezone.now().date()
+
+        days_by_type = settings.LEAVE_ACCRUAL_DAYS
+        if options['days']:
+            days_by_type = {}
+            for value in options['days']:
+                leave_type, _, days = value.partition('=')
+                if leave_type not in LeaveRequest.LeaveType.values:
+                    raise CommandError(f'Unknown leave type "{leave_type}".')
+                try:
+                    days_by_type[leave_type] = float(days)
+                except ValueError:
+                    raise CommandError(f'--days must look like TYPE=DAYS, got "{value}".')
+
+        started = time.monotonic()
+        if options['carry_over_cap'] is not None:
+            expired = carry_over(day, options['carry_over_cap'], days_by_type)
+            self.stdout.write(f'Capped {expired} balance(s) at {options["carry_over_cap"]} days.')
+        created = accrue(day, days_by_type)
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(f'Wrote {created} accrual entries for {day} in {elapsed:.1f}s.'))
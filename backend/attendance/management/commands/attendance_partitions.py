@@ -0,0 +1,58 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from attendance import partitioning
+
+
+class Command(BaseCommand):
+    help = 'Manage monthly PostgreSQL partitions of the attendance record table.'
+
+    def add_arguments(self, parser):
+        subparsers = parser.add_subparsers(dest='operation', required=True)
+
+        convert = subparsers.add_parser('convert', help='Convert the table to monthly partitions (one-off).')
+        convert.add_argument('--months-ahead', type=int, default=3)
+
+        create = subparsers.add_parser('create', help='Create missing partitions for the coming months.')
+        create.add_argument('--months-ahead', type=int, default=3)
+
+        archive = subparsers.add_parser('archive', help='Export old partitions to .csv.gz files and drop them.')
+        archive.add_argument(
+            '--retention-months', type=int,
+            default=getattr(settings, 'ATTENDANCE_RETENTION_MONTHS', 24),
+            help='Keep partitions that end within this many months.'
+        )
+        archive.add_argument(
+            '--output-dir',
+            default=getattr(settings, 'ATTENDANCE_ARCHIVE_DIR', None),
+            help='Directory for the exported files.'
+        )
+
+    def handle(self, *args, **options):
+        if not partitioning.is_supported():
+            raise CommandError('Attendance partitioning requires PostgreSQL.')
+
+        operation = options['operation']
+        if operation == 'convert':
+            converted = partitioning.convert_to_partitioned(months_ahead=options['months_ahead'])
+            message = 'Converted attendance records to monthly partitions.' if converted else 'Already partitioned.'
+            self.stdout.write(self.style.SUCCESS(message))
+            return
+
+        if not partitioning.is_partitioned():
+            raise CommandError('The attendance table is not partitioned; run "attendance_partitions convert" first.')
+
+        if operation == 'create':
+            created = partitioning.ensure_partitions(months_ahead=options['months_ahead'])
+            self.stdout.write(self.style.SUCCESS(f'Created {len(created)} partition(s).'))
+            for name in created:
+                self.stdout.write(f'  {name}')
+        elif operation == 'archive':
+            if not options['output_dir']:
+                raise CommandError('--output-dir is required (or set ATTENDANCE_ARCHIVE_DIR).')
+            if options['retention_months'] < 1:
+                raise CommandError('--retention-months must be at least 1.')
+            archived = partitioning.archive_partitions(options['retention_months'], str(options['output_dir']))
+            self.stdout.write(self.style.SUCCESS(f'Archived {len(archived)} partition(s).'))
+            for path in archived:
+                self.stdout.write(f'  {path}')
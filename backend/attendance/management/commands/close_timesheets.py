@@ -0,0 +1,40 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from attendance.timesheets import Timesheet
+
+
+class Command(BaseCommand):
+    help = (
+        'Recompute hours worked, lateness, overtime and undertime for every attendance record in a period '
+        'from check-in/out times and work schedules.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--start', required=True, help='First date of the period (YYYY-MM-DD).')
+        parser.add_argument('--end', required=True, help='Last date of the period (YYYY-MM-DD).')
+
+    def handle(self, *args, **options):
+        start = self.parse(options['start'], 'start')
+        end = self.parse(options['end'], 'end')
+        if start > end:
+            raise CommandError('--start cannot be after --end.')
+
+        started = time.monotonic()
+        timesheet = Timesheet.load(start, end)
+        updated = timesheet.write_hours_worked()
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Processed {len(timesheet)} records, updated {updated} in {elapsed:.1f}s.'
+        ))
+
+    def parse(self, value, name):
+        try:
+            parsed = parse_date(value)
+        except ValueError:
+            parsed = None
+        if parsed is None:
+            raise CommandError(f'--{name} must be a date in YYYY-MM-DD format.')
+        return parsed
@@ -0,0 +1,31 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from attendance.absences import mark_absences
+
+
+class Command(BaseCommand):
+    help = 'Record Absent attendance for scheduled employees with no check-in and no approved leave.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date', help='Day to check (YYYY-MM-DD). Defaults to yesterday.')
+
+    def handle(self, *args, **options):
+        if options['date']:
+            try:
+                day = parse_date(options['date'])
+            except ValueError:
+                day = None
+            if day is None:
+                raise CommandError('--date must be a date in YYYY-MM-DD format.')
+        else:
+            day = timezone.now().date() - timedelta(days=1)
+
+        started = time.monotonic()
+        inserted = mark_absences(day)
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(f'Marked {inserted} employee(s) absent on {day} in {elapsed:.1f}s.'))
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from attendance.rollups import rebuild_range
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the department-by-day attendance rollup from raw attendance records.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--start', help='First date to rebuild (YYYY-MM-DD). Defaults to the earliest record.')
+        parser.add_argument('--end', help='Last date to rebuild (YYYY-MM-DD). Defaults to the latest record.')
+
+    def handle(self, *args, **options):
+        start = self.parse(options['start'], 'start')
+        end = self.parse(options['end'], 'end')
+        if start and end and start > end:
+            raise CommandError('--start cannot be after --end.')
+        count = rebuild_range(start, end)
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {count} department-day rollup rows.'))
+
+    def parse(self, value, name):
+        if not value:
+            return None
+        try:
+            parsed = parse_date(value)
+        except ValueError:
+            parsed = None
+        if parsed is None:
+            raise CommandError(f'--{name} must be a date in YYYY-MM-DD format.')
+        return parsed
@@ -0,0 +1,44 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from attendance.leaves import recalculate_days_requested
+from attendance.models import LeaveRequest
+
+
+class Command(BaseCommand):
+    help = 'Recompute days_requested for leave requests from work schedules and holidays.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--status', action='append', choices=LeaveRequest.LeaveStatus.values,
+            help='Only requests with this status (repeatable). Defaults to all.'
+        )
+        parser.add_argument('--start', help='Only requests ending on or after this date (YYYY-MM-DD).')
+        parser.add_argument('--end', help='Only requests starting on or before this date (YYYY-MM-DD).')
+
+    def handle(self, *args, **options):
+        leave_requests = LeaveRequest.objects.all()
+        if options['status']:
+            leave_requests = leave_requests.filter(status__in=options['status'])
+        if options['start']:
+            leave_requests = leave_requests.filter(end_date__gte=self.parse(options['start'], 'start'))
+        if options['end']:
+            leave_requests = leave_requests.filter(start_date__lte=self.parse(options['end'], 'end'))
+
+        started = time.monotonic()
+        checked, updated = recalculate_days_requested(leave_requests)
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Checked {checked} leave request(s), updated {updated} in {elapsed:.1f}s.'
+        ))
+
+    def parse(self, value, name):
+        try:
+            parsed = parse_date(value)
+        except ValueError:
+            parsed = None
+        if parsed is None:
+            raise CommandError(f'--{name} must be a date in YYYY-MM-DD format.')
+        return parsed
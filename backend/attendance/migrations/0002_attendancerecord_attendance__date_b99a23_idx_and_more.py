@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-17 22:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0001_initial'),
+        ('employees', '0002_employee_employees_e_name_4c04dd_idx'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='attendancerecord',
+            index=models.Index(fields=['-date', '-created_at', '-id'], name='attendance__date_b99a23_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='leaverequest',
+            index=models.Index(fields=['-created_at', '-id'], name='attendance__created_99e42c_idx'),
+        ),
+    ]
@@ -0,0 +1,61 @@
+# Generated by Django 5.2.18 on 2026-10-17 22:30
+
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+
+
+def populate_rollup(apps, schema_editor):
+    AttendanceRecord = apps.get_model('attendance', 'AttendanceRecord')
+    DepartmentAttendanceDaily = apps.get_model('attendance', 'DepartmentAttendanceDaily')
+    statuses = {
+        'present_count': 'Present',
+        'absent_count': 'Absent',
+        'late_count': 'Late',
+        'half_day_count': 'Half Day',
+    }
+    aggregates = AttendanceRecord.objects.values('employee__department', 'date').annotate(
+        total_records=Count('id'),
+        hours=Sum('hours_worked'),
+        **{name: Count('id', filter=Q(status=value)) for name, value in statuses.items()}
+    ).order_by()
+    DepartmentAttendanceDaily.objects.bulk_create([
+        DepartmentAttendanceDaily(
+            department=row['employee__department'] or '',
+            date=row['date'],
+            total_records=row['total_records'],
+            hours_worked=row['hours'] or 0,
+            **{name: row[name] for name in statuses}
+        )
+        for row in aggregates.iterator()
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0002_attendancerecord_attendance__date_b99a23_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DepartmentAttendanceDaily',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('department', models.CharField(blank=True, max_length=100, verbose_name='department')),
+                ('date', models.DateField(verbose_name='date')),
+                ('total_records', models.PositiveIntegerField(default=0, verbose_name='total records')),
+                ('present_count', models.PositiveIntegerField(default=0, verbose_name='present count')),
+                ('absent_count', models.PositiveIntegerField(default=0, verbose_name='absent count')),
+                ('late_count', models.PositiveIntegerField(default=0, verbose_name='late count')),
+                ('half_day_count', models.PositiveIntegerField(default=0, verbose_name='half day count')),
+                ('hours_worked', models.DecimalField(decimal_places=2, default=0, max_digits=12, verbose_name='hours worked')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='updated at')),
+            ],
+            options={
+                'ordering': ['-date', 'department'],
+                'indexes': [models.Index(fields=['date', 'department'], name='attendance__date_2e4f80_idx')],
+                'unique_together': {('department', 'date')},
+            },
+        ),
+        migrations.RunPython(populate_rollup, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,27 @@
+from django.conf import settings
+from django.db import migrations
+
+
+def partition_attendance(apps, schema_editor):
+    """Opt-in: only runs on PostgreSQL with ATTENDANCE_PARTITIONING enabled.
+
+    Deployments that enable it later can run
+    ``manage.py attendance_partitions convert`` instead.
+    """
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    if not getattr(settings, 'ATTENDANCE_PARTITIONING', False):
+        return
+    from attendance.partitioning import convert_to_partitioned
+    convert_to_partitioned()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0003_departmentattendancedaily'),
+    ]
+
+    operations = [
+        migrations.RunPython(partition_attendance, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,67 @@
+# Generated by Django 5.2.18 on 2026-10-17 22:37
+
+from django.db import migrations, models
+
+
+# Frozen copy of the work day parsing at the time of this migration.
+DAY_NAMES = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday']
+DEFAULT_MASK = 0b0011111  # Monday-Friday
+
+
+def _day_index(token):
+    token = token.strip().lower()
+    if len(token) >= 3:
+        for index, name in enumerate(DAY_NAMES):
+            if name.startswith(token):
+                return index
+    raise ValueError(f'Unknown day "{token}".')
+
+
+def parse_work_days(value):
+    if not value or not value.strip():
+        raise ValueError('Work days cannot be empty.')
+    mask = 0
+    for part in value.split(','):
+        if not part.strip():
+            continue
+        if '-' in part:
+            first, _, last = part.partition('-')
+            start, end = _day_index(first), _day_index(last)
+            day = start
+            while True:
+                mask |= 1 << day
+                if day == end:
+                    break
+                day = (day + 1) % 7
+        else:
+            mask |= 1 << _day_index(part)
+    if not mask:
+        raise ValueError('Work days cannot be empty.')
+    return mask
+
+
+def compile_work_days(apps, schema_editor):
+    WorkSchedule = apps.get_model('attendance', 'WorkSchedule')
+    schedules = list(WorkSchedule.objects.only('id', 'work_days'))
+    for schedule in schedules:
+        try:
+            schedule.work_days_mask = parse_work_days(schedule.work_days)
+        except ValueError:
+            schedule.work_days_mask = DEFAULT_MASK
+    WorkSchedule.objects.bulk_update(schedules, ['work_days_mask'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0004_partition_attendancerecord'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='workschedule',
+            name='work_days_mask',
+            field=models.PositiveSmallIntegerField(default=31, editable=False, verbose_name='work days mask'),
+        ),
+        migrations.RunPython(compile_work_days, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-17 22:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0005_workschedule_work_days_mask'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Holiday',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, verbose_name='name')),
+                ('date', models.DateField(verbose_name='date')),
+                ('department', models.CharField(blank=True, max_length=100, verbose_name='department')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='created at')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='updated at')),
+            ],
+            options={
+                'ordering': ['date', 'department'],
+                'unique_together': {('date', 'department')},
+            },
+        ),
+    ]
@@ -0,0 +1,77 @@
+# Generated by Django 5.2.18 on 2026-10-17 22:42
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Sum
+
+
+def record_approved_leave(apps, schema_editor):
+    """Debit already approved leave so balances start consistent with history."""
+    LeaveRequest = apps.get_model('attendance', 'LeaveRequest')
+    LeaveLedgerEntry = apps.get_model('attendance', 'LeaveLedgerEntry')
+    LeaveBalance = apps.get_model('attendance', 'LeaveBalance')
+    approved = LeaveRequest.objects.filter(status='Approved')
+    LeaveLedgerEntry.objects.bulk_create((
+        LeaveLedgerEntry(
+            employee_id=leave.employee_id,
+            leave_type=leave.leave_type,
+            entry_type='Debit',
+            days=-leave.days_requested,
+            effective_date=leave.start_date,
+            leave_request_id=leave.pk,
+        )
+        for leave in approved.iterator()
+    ), batch_size=1000)
+    totals = approved.values('employee_id', 'leave_type').annotate(days=Sum('days_requested')).order_by()
+    LeaveBalance.objects.bulk_create((
+        LeaveBalance(employee_id=row['employee_id'], leave_type=row['leave_type'], balance=-row['days'], used=row['days'])
+        for row in totals.iterator()
+    ), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0006_holiday'),
+        ('employees', '0002_employee_employees_e_name_4c04dd_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LeaveBalance',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('leave_type', models.CharField(choices=[('Annual', 'Annual Leave'), ('Sick', 'Sick Leave'), ('Maternity', 'Maternity Leave'), ('Paternity', 'Paternity Leave'), ('Emergency', 'Emergency Leave'), ('Other', 'Other')], max_length=20, verbose_name='leave type')),
+                ('balance', models.DecimalField(decimal_places=2, default=0, max_digits=7, verbose_name='balance')),
+                ('accrued', models.DecimalField(decimal_places=2, default=0, max_digits=7, verbose_name='accrued')),
+                ('used', models.DecimalField(decimal_places=2, default=0, max_digits=7, verbose_name='used')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='updated at')),
+                ('employee', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='leave_balances', to='employees.employee')),
+            ],
+            options={
+                'ordering': ['employee', 'leave_type'],
+                'unique_together': {('employee', 'leave_type')},
+            },
+        ),
+        migrations.CreateModel(
+            name='LeaveLedgerEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('leave_type', models.CharField(choices=[('Annual', 'Annual Leave'), ('Sick', 'Sick Leave'), ('Maternity', 'Maternity Leave'), ('Paternity', 'Paternity Leave'), ('Emergency', 'Emergency Leave'), ('Other', 'Other')], max_length=20, verbose_name='leave type')),
+                ('entry_type', models.CharField(choices=[('Accrual', 'Accrual'), ('Debit', 'Approved Leave'), ('Cancellation', 'Cancellation'), ('Carry Over', 'Carry Over'), ('Adjustment', 'Adjustment')], max_length=20, verbose_name='entry type')),
+                ('days', models.DecimalField(decimal_places=2, max_digits=7, verbose_name='days')),
+                ('effective_date', models.DateField(verbose_name='effective date')),
+                ('note', models.CharField(blank=True, max_length=255, verbose_name='note')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='created at')),
+                ('employee', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='leave_ledger', to='employees.employee')),
+                ('leave_request', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='ledger_entries', to='attendance.leaverequest')),
+            ],
+            options={
+                'verbose_name_plural': 'leave ledger entries',
+                'ordering': ['-created_at', '-id'],
+                'indexes': [models.Index(fields=['employee', 'leave_type', '-created_at'], name='attendance__employe_1b3948_idx')],
+                'constraints': [models.UniqueConstraint(condition=models.Q(('entry_type', 'Accrual')), fields=('employee', 'leave_type', 'effective_date'), name='unique_leave_accrual_per_date')],
+            },
+        ),
+        migrations.RunPython(record_approved_leave, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,36 @@
+from django.db import migrations
+
+
+INDEX = 'attendance_leaverequest_approved_period_gist'
+
+
+def create_period_index(apps, schema_editor):
+    """GiST index over approved leave periods (PostgreSQL only).
+
+    Matches the ``daterange(start_date, end_date, '[]') && ...`` test in
+    ``attendance.leaves.overlapping``; other databases use the plain date
+    comparison and skip the index.
+    """
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(
+        f"CREATE INDEX IF NOT EXISTS {INDEX} ON attendance_leaverequest "
+        f"USING gist (daterange(start_date, end_date, '[]')) WHERE status = 'Approved'"
+    )
+
+
+def drop_period_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(f'DROP INDEX IF EXISTS {INDEX}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0007_leave_ledger'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_period_index, drop_period_index),
+    ]
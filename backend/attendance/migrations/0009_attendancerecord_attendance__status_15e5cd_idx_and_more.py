@@ -0,0 +1,42 @@
+# Generated by Django 5.2.18 on 2026-10-17 22:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0008_leaverequest_period_gist_index'),
+        ('employees', '0003_employee_employees_e_departm_e28f46_idx'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='attendancerecord',
+            index=models.Index(fields=['status', 'date'], name='attendance__status_15e5cd_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='holiday',
+            index=models.Index(fields=['department', 'date'], name='attendance__departm_410b3e_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='leaverequest',
+            index=models.Index(fields=['employee', 'status'], name='attendance__employe_a2f1b5_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='leaverequest',
+            index=models.Index(fields=['status', 'start_date'], name='attendance__status_ddc797_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='leaverequest',
+            index=models.Index(fields=['leave_type', 'start_date'], name='attendance__leave_t_c5492d_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='leaverequest',
+            index=models.Index(fields=['start_date', 'end_date'], name='attendance__start_d_5c073b_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='leaverequest',
+            index=models.Index(fields=['end_date'], name='attendance__end_dat_58ffe4_idx'),
+        ),
+    ]
@@ -0,0 +1,157 @@
+from collections import Counter
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+
+
+# Frozen copy of the department name matching at the time of this migration.
+def department_key(value):
+    return ' '.join((value or '').split()).casefold()
+
+
+def link_department_names(Department, queryset, source, target):
+    """Point ``target`` at the department named by ``source``, creating one per distinct spelling."""
+    rows = list(queryset.values_list(source).annotate(rows=Count('pk')).order_by())
+    spellings = {}
+    for value, count in rows:
+        key = department_key(value)
+        if key:
+            spellings.setdefault(key, Counter())[' '.join(value.split())] += count
+
+    departments = {department_key(department.name): department for department in Department.objects.all()}
+    for key, variants in spellings.items():
+        if key not in departments:
+            name = min(variants.items(), key=lambda item: (-item[1], item[0]))[0]
+            departments[key] = Department.objects.create(name=name)
+
+    linked = 0
+    for value, _ in rows:
+        key = department_key(value)
+        if key:
+            linked += queryset.filter(**{source: value}).update(**{target: departments[key]})
+    return linked
+
+
+def link_holiday_departments(apps, schema_editor):
+    Department = apps.get_model('employees', 'Department')
+    Holiday = apps.get_model('attendance', 'Holiday')
+    link_department_names(Department, Holiday.objects.all(), 'department', 'department_ref')
+
+
+def restore_holiday_departments(apps, schema_editor):
+    Holiday = apps.get_model('attendance', 'Holiday')
+    for holiday in Holiday.objects.exclude(department_ref=None).select_related('department_ref'):
+        Holiday.objects.filter(pk=holiday.pk).update(department=holiday.department_ref.name)
+
+
+def clear_rollup(apps, schema_editor):
+    apps.get_model('attendance', 'DepartmentAttendanceDaily').objects.all().delete()
+
+
+def populate_rollup(apps, schema_editor):
+    AttendanceRecord = apps.get_model('attendance', 'AttendanceRecord')
+    DepartmentAttendanceDaily = apps.get_model('attendance', 'DepartmentAttendanceDaily')
+    statuses = {
+        'present_count': 'Present',
+        'absent_count': 'Absent',
+        'late_count': 'Late',
+        'half_day_count': 'Half Day',
+    }
+    aggregates = AttendanceRecord.objects.exclude(employee__department=None).values('employee__department', 'date').annotate(
+        total_records=Count('id'),
+        hours=Sum('hours_worked'),
+        **{name: Count('id', filter=Q(status=value)) for name, value in statuses.items()}
+    ).order_by()
+    DepartmentAttendanceDaily.objects.bulk_create([
+        DepartmentAttendanceDaily(
+            department_id=row['employee__department'],
+            date=row['date'],
+            total_records=row['total_records'],
+            hours_worked=row['hours'] or 0,
+            **{name: row[name] for name in statuses}
+        )
+        for row in aggregates.iterator()
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0009_attendancerecord_attendance__status_15e5cd_idx_and_more'),
+        ('employees', '0004_department'),
+    ]
+
+    operations = [
+        # Holiday: department name -> nullable foreign key (null = company-wide).
+        migrations.AlterUniqueTogether(
+            name='holiday',
+            unique_together=set(),
+        ),
+        migrations.RemoveIndex(
+            model_name='holiday',
+            name='attendance__departm_410b3e_idx',
+        ),
+        migrations.AddField(
+            model_name='holiday',
+            name='department_ref',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='employees.department'),
+        ),
+        migrations.RunPython(link_holiday_departments, restore_holiday_departments),
+        migrations.RemoveField(
+            model_name='holiday',
+            name='department',
+        ),
+        migrations.RenameField(
+            model_name='holiday',
+            old_name='department_ref',
+            new_name='department',
+        ),
+        migrations.AlterField(
+            model_name='holiday',
+            name='department',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='holidays', to='employees.department'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='holiday',
+            unique_together={('date', 'department')},
+        ),
+        migrations.AddIndex(
+            model_name='holiday',
+            index=models.Index(fields=['department', 'date'], name='attendance__departm_3b2667_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='holiday',
+            constraint=models.UniqueConstraint(condition=models.Q(('department__isnull', True)), fields=('date',), name='unique_company_holiday_per_date'),
+        ),
+
+        # Rollup: derived data, so it is emptied and rebuilt keyed by department id.
+        migrations.RunPython(clear_rollup, migrations.RunPython.noop),
+        migrations.AlterUniqueTogether(
+            name='departmentattendancedaily',
+            unique_together=set(),
+        ),
+        migrations.RemoveIndex(
+            model_name='departmentattendancedaily',
+            name='attendance__date_2e4f80_idx',
+        ),
+        migrations.RemoveField(
+            model_name='departmentattendancedaily',
+            name='department',
+        ),
+        migrations.AddField(
+            model_name='departmentattendancedaily',
+            name='department',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attendance_days', to='employees.department'),
+            preserve_default=False,
+        ),
+        migrations.AlterUniqueTogether(
+            name='departmentattendancedaily',
+            unique_together={('department', 'date')},
+        ),
+        migrations.AddIndex(
+            model_name='departmentattendancedaily',
+            index=models.Index(fields=['date', 'department'], name='attendance__date_a45db0_idx'),
+        ),
+        migrations.RunPython(populate_rollup, clear_rollup),
+    ]
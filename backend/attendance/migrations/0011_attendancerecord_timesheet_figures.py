@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-17 23:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0010_department_foreign_keys'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='attendancerecord',
+            name='late_minutes',
+            field=models.PositiveIntegerField(default=0, verbose_name='late minutes'),
+        ),
+        migrations.AddField(
+            model_name='attendancerecord',
+            name='overtime_hours',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=5, verbose_name='overtime hours'),
+        ),
+        migrations.AddField(
+            model_name='attendancerecord',
+            name='undertime_hours',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=5, verbose_name='undertime hours'),
+        ),
+    ]
@@ -1,6 +1,8 @@
+from django.core.exceptions import ValidationError
 from django.db import models
 from django.utils.translation import gettext_lazy as _
-from employees.models import Employee
+from employees.models import Department, Employee
+from .workdays import DEFAULT_MASK, get_calendar, parse_work_days
 
 
 class AttendanceRecord(models.Model):
@@ -18,6 +20,10 @@ class AttendanceRecord(models.Model):
     check_out_time = models.TimeField(_('check out time'), null=True, blank=True)
     status = models.CharField(_('status'), max_length=20, choices=AttendanceStatus.choices, default=AttendanceStatus.PRESENT)
     hours_worked = models.DecimalField(_('hours worked'), max_digits=5, decimal_places=2, default=0)
+    # Computed against the work schedule by ``attendance.timesheets``.
+    late_minutes = models.PositiveIntegerField(_('late minutes'), default=0)
+    overtime_hours = models.DecimalField(_('overtime hours'), max_digits=5, decimal_places=2, default=0)
+    undertime_hours = models.DecimalField(_('undertime hours'), max_digits=5, decimal_places=2, default=0)
     notes = models.TextField(_('notes'), blank=True)
 
     created_at = models.DateTimeField(_('created at'), auto_now_add=True)
@@ -26,11 +32,45 @@ class AttendanceRecord(models.Model):
     class Meta:
         ordering = ['-date', '-created_at']
         unique_together = ['employee', 'date']
+        indexes = [
+            models.Index(fields=['-date', '-created_at', '-id']),
+            models.Index(fields=['status', 'date']),
+        ]
 
     def __str__(self):
         return f"{self.employee.name} - {self.date} ({self.status})"
 
 
+class DepartmentAttendanceDaily(models.Model):
+    """Per-department, per-day rollup of attendance records.
+
+    Maintained by ``attendance.rollups`` whenever attendance is written, so
+    dashboards read one row per department and day instead of raw records.
+    Employees without a department are not rolled up.
+    """
+
+    department = models.ForeignKey(Department, on_delete=models.CASCADE, related_name='attendance_days')
+    date = models.DateField(_('date'))
+    total_records = models.PositiveIntegerField(_('total records'), default=0)
+    present_count = models.PositiveIntegerField(_('present count'), default=0)
+    absent_count = models.PositiveIntegerField(_('absent count'), default=0)
+    late_count = models.PositiveIntegerField(_('late count'), default=0)
+    half_day_count = models.PositiveIntegerField(_('half day count'), default=0)
+    hours_worked = models.DecimalField(_('hours worked'), max_digits=12, decimal_places=2, default=0)
+
+    updated_at = models.DateTimeField(_('updated at'), auto_now=True)
+
+    class Meta:
+        ordering = ['-date', 'department']
+        unique_together = ['department', 'date']
+        indexes = [
+            models.Index(fields=['date', 'department']),
+        ]
+
+    def __str__(self):
+        return f"{self.department.name} - {self.date}"
+
+
 class LeaveRequest(models.Model):
     """Manages employee leave requests."""
 
@@ -64,11 +104,117 @@ class LeaveRequest(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['-created_at', '-id']),
+            models.Index(fields=['employee', 'status']),
+            models.Index(fields=['status', 'start_date']),
+            models.Index(fields=['leave_type', 'start_date']),
+            models.Index(fields=['start_date', 'end_date']),
+            models.Index(fields=['end_date']),
+        ]
 
     def __str__(self):
         return f"{self.employee.name} - {self.leave_type} ({self.start_date} to {self.end_date})"
 
 
+class LeaveLedgerEntry(models.Model):
+    """Append-only movement of leave days for one employee and leave type.
+
+    Positive ``days`` add to the balance (accruals, cancelled leave),
+    negative ``days`` remove from it (approved leave, expired carry-over).
+    Entries are never edited; corrections are new ``Adjustment`` entries.
+    """
+
+    class EntryType(models.TextChoices):
+        ACCRUAL = 'Accrual', _('Accrual')
+        DEBIT = 'Debit', _('Approved Leave')
+        CANCELLATION = 'Cancellation', _('Cancellation')
+        CARRY_OVER = 'Carry Over', _('Carry Over')
+        ADJUSTMENT = 'Adjustment', _('Adjustment')
+
+    employee = models.ForeignKey(Employee, on_delete=models.CASCADE, related_name='leave_ledger')
+    leave_type = models.CharField(_('leave type'), max_length=20, choices=LeaveRequest.LeaveType.choices)
+    entry_type = models.CharField(_('entry type'), max_length=20, choices=EntryType.choices)
+    days = models.DecimalField(_('days'), max_digits=7, decimal_places=2)
+    effective_date = models.DateField(_('effective date'))
+    leave_request = models.ForeignKey(
+        LeaveRequest, on_delete=models.SET_NULL, null=True, blank=True, related_name='ledger_entries'
+    )
+    note = models.CharField(_('note'), max_length=255, blank=True)
+
+    created_at = models.DateTimeField(_('created at'), auto_now_add=True)
+
+    class Meta:
+        ordering = ['-created_at', '-id']
+        verbose_name_plural = _('leave ledger entries')
+        indexes = [
+            models.Index(fields=['employee', 'leave_type', '-created_at']),
+        ]
+        constraints = [
+            # One accrual per employee, leave type and accrual date, so the job can be re-run.
+            models.UniqueConstraint(
+                fields=['employee', 'leave_type', 'effective_date'],
+                condition=models.Q(entry_type='Accrual'),
+                name='unique_leave_accrual_per_date',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.employee.name} - {self.leave_type} {self.entry_type} {self.days:+}"
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            raise ValueError('Leave ledger entries are append-only.')
+        super().save(*args, **kwargs)
+
+
+class LeaveBalance(models.Model):
+    """Running leave balance per employee and leave type, kept in step with the ledger."""
+
+    employee = models.ForeignKey(Employee, on_delete=models.CASCADE, related_name='leave_balances')
+    leave_type = models.CharField(_('leave type'), max_length=20, choices=LeaveRequest.LeaveType.choices)
+    balance = models.DecimalField(_('balance'), max_digits=7, decimal_places=2, default=0)
+    accrued = models.DecimalField(_('accrued'), max_digits=7, decimal_places=2, default=0)
+    used = models.DecimalField(_('used'), max_digits=7, decimal_places=2, default=0)
+
+    updated_at = models.DateTimeField(_('updated at'), auto_now=True)
+
+    class Meta:
+        ordering = ['employee', 'leave_type']
+        unique_together = ['employee', 'leave_type']
+
+    def __str__(self):
+        return f"{self.employee.name} - {self.leave_type}: {self.balance}"
+
+
+class Holiday(models.Model):
+    """Non-working day, company-wide or for a single department."""
+
+    name = models.CharField(_('name'), max_length=100)
+    date = models.DateField(_('date'))
+    department = models.ForeignKey(
+        Department, on_delete=models.CASCADE, null=True, blank=True, related_name='holidays'
+    )  # null = company-wide
+
+    created_at = models.DateTimeField(_('created at'), auto_now_add=True)
+    updated_at = models.DateTimeField(_('updated at'), auto_now=True)
+
+    class Meta:
+        ordering = ['date', 'department']
+        unique_together = ['date', 'department']
+        indexes = [
+            models.Index(fields=['department', 'date']),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['date'], condition=models.Q(department__isnull=True), name='unique_company_holiday_per_date'
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.name} ({self.date}{', ' + self.department.name if self.department_id else ''})"
+
+
 class WorkSchedule(models.Model):
     """Defines employee work schedules."""
 
@@ -80,6 +226,7 @@ class WorkSchedule(models.Model):
     employee = models.OneToOneField(Employee, on_delete=models.CASCADE, related_name='work_schedule')
     schedule_type = models.CharField(_('schedule type'), max_length=20, choices=ScheduleType.choices, default=ScheduleType.FULL_TIME)
     work_days = models.CharField(_('work days'), max_length=20, default='Monday-Friday')  # e.g., "Monday-Friday"
+    work_days_mask = models.PositiveSmallIntegerField(_('work days mask'), default=DEFAULT_MASK, editable=False)  # bit 0 = Monday
     start_time = models.TimeField(_('start time'), default='09:00')
     end_time = models.TimeField(_('end time'), default='17:00')
     break_duration = models.PositiveIntegerField(_('break duration (minutes)'), default=60)
@@ -90,3 +237,25 @@ class WorkSchedule(models.Model):
 
     def __str__(self):
         return f"{self.employee.name} - {self.schedule_type}"
+
+    def clean(self):
+        super().clean()
+        try:
+            parse_work_days(self.work_days)
+        except ValueError as exc:
+            raise ValidationError({'work_days': str(exc)})
+
+    def save(self, *args, **kwargs):
+        self.work_days_mask = parse_work_days(self.work_days)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'work_days' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'work_days_mask'}
+        super().save(*args, **kwargs)
+
+    def works_on(self, day):
+        """Whether ``day`` is a scheduled working day."""
+        return bool(self.work_days_mask & (1 << day.weekday()))
+
+    def expected_days(self, start, end):
+        """Number of scheduled working days in ``[start, end]``, excluding holidays."""
+        return get_calendar().business_days(self.work_days_mask, start, end, self.employee.department_id)
@@ -0,0 +1,227 @@
+"""
+Monthly range partitioning for the attendance record table (PostgreSQL only).
+
+The table is converted in place into a ``PARTITION BY RANGE (date)`` parent
+with one partition per calendar month plus a default partition that
+catches rows outside the created months. Queries filtering on ``date``
+(the rollup refresh, date-range list filters) only scan the partitions in
+their range. Old partitions are exported to gzip-compressed CSV files and
+dropped by ``archive_partitions``.
+"""
+import gzip
+import os
+from datetime import date
+
+from django.db import connection, transaction
+
+
+TABLE = 'attendance_attendancerecord'
+
+
+def month_start(day):
+    return day.replace(day=1)
+
+
+def add_months(day, months):
+    index = day.year * 12 + day.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month, table=TABLE):
+    return f'{table}_p{month.year:04d}_{month.month:02d}'
+
+
+def is_supported():
+    return connection.vendor == 'postgresql'
+
+
+def is_partitioned(table=TABLE):
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT relkind FROM pg_class WHERE oid = to_regclass(%s)', [table])
+        row = cursor.fetchone()
+    return bool(row) and row[0] == 'p'
+
+
+def list_partitions(table=TABLE):
+    """Return ``[(name, lower, upper)]`` for the monthly partitions of ``table``."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT child.relname
+            FROM pg_inherits
+            JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+            JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+            WHERE parent.oid = to_regclass(%s)
+            ORDER BY child.relname
+            """,
+            [table]
+        )
+        names = [row[0] for row in cursor.fetchall()]
+    partitions = []
+    prefix = f'{table}_p'
+    for name in names:
+        if not name.startswith(prefix):
+            continue
+        year, month = name[len(prefix):].split('_')
+        lower = date(int(year), int(month), 1)
+        partitions.append((name, lower, add_months(lower, 1)))
+    return partitions
+
+
+def convert_to_partitioned(table=TABLE, months_ahead=3):
+    """
+    Rebuild ``table`` as a monthly partitioned table, keeping all rows.
+
+    The primary key becomes ``(id, date)`` because PostgreSQL requires the
+    partition key in every unique constraint; ids still come from the same
+    sequence. Existing secondary indexes are recreated on the parent and so
+    on every partition. No-op if the table is already partitioned.
+    """
+    if not is_supported():
+        raise RuntimeError('Attendance partitioning requires PostgreSQL.')
+    if is_partitioned(table):
+        return False
+
+    qn = connection.ops.quote_name
+    legacy = f'{table}_unpartitioned'
+    with transaction.atomic(), connection.cursor() as cursor:
+        # Deferred foreign key checks would block the DDL below.
+        cursor.execute('SET CONSTRAINTS ALL IMMEDIATE')
+        cursor.execute(f'LOCK TABLE {qn(table)} IN ACCESS EXCLUSIVE MODE')
+        cursor.execute(f'ALTER TABLE {qn(table)} RENAME TO {qn(legacy)}')
+
+        # Remember what has to be recreated on the new parent.
+        cursor.execute(
+            """
+            SELECT conname, contype, pg_get_constraintdef(oid)
+            FROM pg_constraint
+            WHERE conrelid = to_regclass(%s) AND contype IN ('p', 'u', 'f')
+            """,
+            [legacy]
+        )
+        constraints = cursor.fetchall()
+        cursor.execute(
+            """
+            SELECT indexname, indexdef FROM pg_indexes
+            WHERE tablename = %s AND indexname NOT IN (
+                SELECT conname FROM pg_constraint WHERE conrelid = to_regclass(%s)
+            )
+            """,
+            [legacy, legacy]
+        )
+        indexes = cursor.fetchall()
+        cursor.execute(
+            """
+            SELECT attidentity, pg_get_serial_sequence(%s, 'id')
+            FROM pg_attribute WHERE attrelid = to_regclass(%s) AND attname = 'id'
+            """,
+            [legacy, legacy]
+        )
+        identity, sequence = cursor.fetchone()
+
+        for name, _ in indexes:
+            cursor.execute(f'DROP INDEX {qn(name)}')
+        for name, kind, _ in sorted(constraints, key=lambda c: c[1] == 'p'):
+            cursor.execute(f'ALTER TABLE {qn(legacy)} DROP CONSTRAINT {qn(name)}')
+
+        cursor.execute(
+            f'CREATE TABLE {qn(table)} (LIKE {qn(legacy)} INCLUDING DEFAULTS INCLUDING IDENTITY) '
+            f'PARTITION BY RANGE ("date")'
+        )
+        if not identity and sequence:
+            cursor.execute(f'ALTER SEQUENCE {sequence} OWNED BY {qn(table)}."id"')
+
+        for name, kind, definition in constraints:
+            if kind == 'p':
+                definition = 'PRIMARY KEY ("id", "date")'
+            cursor.execute(f'ALTER TABLE {qn(table)} ADD CONSTRAINT {qn(name)} {definition}')
+
+        cursor.execute(f'SELECT MIN("date"), MAX("date") FROM {qn(legacy)}')
+        first, last = cursor.fetchone()
+        today = date.today()
+        first = month_start(first or today)
+        last = max(month_start(last or today), month_start(today))
+        cursor.execute(f'CREATE TABLE {qn(table + "_default")} PARTITION OF {qn(table)} DEFAULT')
+        month = first
+        while month <= add_months(last, months_ahead):
+            _create_partition(cursor, table, month)
+            month = add_months(month, 1)
+
+        cursor.execute(f'INSERT INTO {qn(table)} SELECT * FROM {qn(legacy)}')
+        cursor.execute(f'DROP TABLE {qn(legacy)}')
+        if identity:
+            cursor.execute(
+                f"SELECT setval(pg_get_serial_sequence(%s, 'id'), COALESCE(MAX(\"id\"), 0) + 1, false) FROM {qn(table)}",
+                [table]
+            )
+
+        for _, definition in indexes:
+            cursor.execute(definition.replace(f' ON public.{legacy} ', f' ON {qn(table)} ').replace(f' ON {legacy} ', f' ON {qn(table)} '))
+    return True
+
+
+def _create_partition(cursor, table, month):
+    """Create the partition for ``month``, moving matching rows out of the default partition."""
+    qn = connection.ops.quote_name
+    name = partition_name(month, table)
+    lower, upper = month.isoformat(), add_months(month, 1).isoformat()
+    default = qn(table + '_default')
+    cursor.execute(f'CREATE TABLE {qn(name)} (LIKE {qn(table)} INCLUDING DEFAULTS)')
+    cursor.execute(
+        f'WITH moved AS (DELETE FROM {default} WHERE "date" >= %s AND "date" < %s RETURNING *) '
+        f'INSERT INTO {qn(name)} SELECT * FROM moved',
+        [lower, upper]
+    )
+    cursor.execute(f"ALTER TABLE {qn(table)} ATTACH PARTITION {qn(name)} FOR VALUES FROM ('{lower}') TO ('{upper}')")
+    return name
+
+
+def ensure_partitions(months_ahead=3, table=TABLE, today=None):
+    """Create any missing monthly partitions from the current month up to ``months_ahead``."""
+    existing = {lower for _, lower, _ in list_partitions(table)}
+    month = month_start(today or date.today())
+    created = []
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute('SET CONSTRAINTS ALL IMMEDIATE')
+        for offset in range(months_ahead + 1):
+            target = add_months(month, offset)
+            if target not in existing:
+                created.append(_create_partition(cursor, table, target))
+    return created
+
+
+def archive_partitions(retention_months, output_dir, table=TABLE, today=None):
+    """
+    Export and drop partitions that end more than ``retention_months`` ago.
+
+    Each partition is written to ``<output_dir>/<partition>.csv.gz`` with a
+    header row before it is detached and dropped, so a failed export never
+    loses data. Returns the written file paths.
+    """
+    cutoff = add_months(month_start(today or date.today()), -retention_months)
+    os.makedirs(output_dir, exist_ok=True)
+    qn = connection.ops.quote_name
+    archived = []
+    for name, _, upper in list_partitions(table):
+        if upper > cutoff:
+            continue
+        path = os.path.join(output_dir, f'{name}.csv.gz')
+        partial = path + '.partial'
+        with gzip.open(partial, 'wb') as output, connection.cursor() as cursor:
+            _copy_out(cursor, f'COPY {qn(name)} TO STDOUT WITH (FORMAT csv, HEADER true)', output)
+        os.replace(partial, path)
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(f'ALTER TABLE {qn(table)} DETACH PARTITION {qn(name)}')
+            cursor.execute(f'DROP TABLE {qn(name)}')
+        archived.append(path)
+    return archived
+
+
+def _copy_out(cursor, sql, output):
+    raw = cursor.cursor
+    if hasattr(raw, 'copy_expert'):  # psycopg2
+        raw.copy_expert(sql, output)
+        return
+    with raw.copy(sql) as copy:  # psycopg 3
+        for chunk in copy:
+            output.write(chunk)
@@ -0,0 +1,117 @@
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+
+from employees.models import Employee
+from .models import AttendanceRecord, DepartmentAttendanceDaily
+
+
+STATUS_COUNTS = {
+    'present_count': AttendanceRecord.AttendanceStatus.PRESENT,
+    'absent_count': AttendanceRecord.AttendanceStatus.ABSENT,
+    'late_count': AttendanceRecord.AttendanceStatus.LATE,
+    'half_day_count': AttendanceRecord.AttendanceStatus.HALF_DAY,
+}
+UPDATE_FIELDS = ['total_records', *STATUS_COUNTS, 'hours_worked', 'updated_at']
+
+
+def aggregate_department_days(records):
+    """Group ``records`` by department id and date into rollup row values."""
+    return records.exclude(employee__department=None).values('employee__department', 'date').annotate(
+        total_records=Count('id'),
+        hours=Sum('hours_worked'),
+        **{name: Count('id', filter=Q(status=value)) for name, value in STATUS_COUNTS.items()}
+    ).order_by()
+
+
+def _build_rows(aggregates):
+    return [
+        DepartmentAttendanceDaily(
+            department_id=row['employee__department'],
+            date=row['date'],
+            total_records=row['total_records'],
+            hours_worked=row['hours'] or 0,
+            **{name: row[name] for name in STATUS_COUNTS}
+        )
+        for row in aggregates
+    ]
+
+
+def refresh_department_days(keys):
+    """
+    Recompute the rollup rows for the given ``(department_id, date)`` keys.
+
+    Only the affected department-days are re-aggregated (one grouped query
+    over the indexed ``date`` column) and written back with a single
+    upsert; keys with no remaining records are deleted.
+    """
+    keys = {(department_id, day) for department_id, day in keys if department_id is not None}
+    if not keys:
+        return
+    departments = {department_id for department_id, _ in keys}
+    dates = {day for _, day in keys}
+    aggregates = [
+        row for row in aggregate_department_days(
+            AttendanceRecord.objects.filter(date__in=dates, employee__department__in=departments)
+        )
+        if (row['employee__department'], row['date']) in keys
+    ]
+    rows = _build_rows(aggregates)
+    found = {(row.department_id, row.date) for row in rows}
+
+    with transaction.atomic():
+        if rows:
+            DepartmentAttendanceDaily.objects.bulk_create(
+                rows,
+                update_conflicts=True,
+                unique_fields=['department', 'date'],
+                update_fields=UPDATE_FIELDS,
+            )
+        stale = keys - found
+        if stale:
+            condition = Q()
+            for department_id, day in stale:
+                condition |= Q(department_id=department_id, date=day)
+            DepartmentAttendanceDaily.objects.filter(condition).delete()
+
+
+def refresh_for_employee_dates(pairs):
+    """Refresh the rollup for ``(employee_id, date)`` pairs just written."""
+    to_date = AttendanceRecord._meta.get_field('date').to_python
+    pairs = {(employee_id, to_date(day)) for employee_id, day in pairs}
+    if not pairs:
+        return
+    departments = dict(Employee.objects.filter(
+        pk__in={employee_id for employee_id, _ in pairs}
+    ).values_list('pk', 'department'))
+    refresh_department_days(
+        (departments[employee_id], day) for employee_id, day in pairs if employee_id in departments
+    )
+
+
+def refresh_for_department_move(employee_id, *department_ids, batch_size=1000):
+    """Refresh the rollup of ``department_ids`` on every day employee ``employee_id`` has a record."""
+    days = list(
+        AttendanceRecord.objects.filter(employee_id=employee_id).order_by('date').values_list('date', flat=True)
+    )
+    for start in range(0, len(days), batch_size):
+        refresh_department_days(
+            (department_id, day) for day in days[start:start + batch_size] for department_id in department_ids
+        )
+
+
+def rebuild_range(start=None, end=None, batch_size=1000):
+    """Rebuild every rollup row with ``start <= date <= end`` from raw records."""
+    records = AttendanceRecord.objects.all()
+    rollups = DepartmentAttendanceDaily.objects.all()
+    if start:
+        records = records.filter(date__gte=start)
+        rollups = rollups.filter(date__gte=start)
+    if end:
+        records = records.filter(date__lte=end)
+        rollups = rollups.filter(date__lte=end)
+
+    rows = _build_rows(aggregate_department_days(records))
+    with transaction.atomic():
+        rollups.delete()
+        DepartmentAttendanceDaily.objects.bulk_create(rows, batch_size=batch_size)
+    return len(rows)
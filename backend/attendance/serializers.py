@@ -1,21 +1,25 @@
 from rest_framework import serializers
-from .models import AttendanceRecord, LeaveRequest, WorkSchedule
+from employees.serializers import DepartmentField
+from .leaves import find_overlaps
+from .models import AttendanceRecord, Holiday, LeaveBalance, LeaveLedgerEntry, LeaveRequest, WorkSchedule
+from .workdays import business_days_for_employee, parse_work_days
 
 
 class AttendanceRecordSerializer(serializers.ModelSerializer):
     """Serializer for AttendanceRecord model."""
 
     employee_name = serializers.CharField(source='employee.name', read_only=True)
-    employee_department = serializers.CharField(source='employee.department', read_only=True)
+    employee_department = DepartmentField(source='employee.department', read_only=True)
 
     class Meta:
         model = AttendanceRecord
         fields = [
             'id', 'employee', 'employee_name', 'employee_department',
             'date', 'check_in_time', 'check_out_time', 'status',
-            'hours_worked', 'notes', 'created_at', 'updated_at'
+            'hours_worked', 'late_minutes', 'overtime_hours', 'undertime_hours',
+            'notes', 'created_at', 'updated_at'
         ]
-        read_only_fields = ['id', 'created_at', 'updated_at']
+        read_only_fields = ['id', 'late_minutes', 'overtime_hours', 'undertime_hours', 'created_at', 'updated_at']
 
 
 class AttendanceRecordCreateSerializer(serializers.ModelSerializer):
@@ -37,6 +41,22 @@ class AttendanceRecordCreateSerializer(serializers.ModelSerializer):
         return data
 
 
+class AttendanceEventSerializer(serializers.Serializer):
+    """A single check-in/check-out event for batch ingestion.
+
+    ``employee`` is validated as a plain id; existence is checked once for
+    the whole batch by the ingestion code.
+    """
+
+    employee = serializers.IntegerField(min_value=1)
+    date = serializers.DateField()
+    check_in_time = serializers.TimeField(required=False, allow_null=True)
+    check_out_time = serializers.TimeField(required=False, allow_null=True)
+    status = serializers.ChoiceField(choices=AttendanceRecord.AttendanceStatus.choices, required=False)
+    hours_worked = serializers.DecimalField(max_digits=5, decimal_places=2, required=False)
+    notes = serializers.CharField(required=False, allow_blank=True)
+
+
 class LeaveRequestSerializer(serializers.ModelSerializer):
     """Serializer for LeaveRequest model."""
 
@@ -51,7 +71,24 @@ class LeaveRequestSerializer(serializers.ModelSerializer):
             'approved_by_name', 'approval_date', 'rejection_reason',
             'created_at', 'updated_at'
         ]
-        read_only_fields = ['id', 'approved_by', 'approved_by_name', 'approval_date', 'created_at', 'updated_at']
+        # Status only changes through the approve/reject/cancel actions, which post the ledger movement.
+        read_only_fields = [
+            'id', 'days_requested', 'status', 'approved_by', 'approved_by_name', 'approval_date',
+            'created_at', 'updated_at'
+        ]
+
+    def validate(self, data):
+        instance = self.instance
+        if instance:
+            check_approved_edit(instance, data)
+        employee = data.get('employee', instance.employee if instance else None)
+        start_date = data.get('start_date', instance.start_date if instance else None)
+        end_date = data.get('end_date', instance.end_date if instance else None)
+        if start_date > end_date:
+            raise serializers.ValidationError("Start date cannot be after end date.")
+        check_overlap(employee, start_date, end_date, exclude=instance.pk if instance else None)
+        data['days_requested'] = calculate_days_requested(employee, start_date, end_date)
+        return data
 
 
 class LeaveRequestCreateSerializer(serializers.ModelSerializer):
@@ -60,13 +97,88 @@ class LeaveRequestCreateSerializer(serializers.ModelSerializer):
     class Meta:
         model = LeaveRequest
         fields = ['employee', 'leave_type', 'start_date', 'end_date', 'days_requested', 'reason']
+        read_only_fields = ['days_requested']
 
     def validate(self, data):
         if data['start_date'] > data['end_date']:
             raise serializers.ValidationError("Start date cannot be after end date.")
+        check_overlap(data['employee'], data['start_date'], data['end_date'])
+        data['days_requested'] = calculate_days_requested(data['employee'], data['start_date'], data['end_date'])
         return data
 
 
+# Fields an approved request's ledger debit was computed from.
+APPROVED_LOCKED_FIELDS = ('employee', 'leave_type', 'start_date', 'end_date')
+
+
+def check_overlap(employee, start_date, end_date, exclude=None):
+    """Reject a period intersecting the employee's pending or approved leave."""
+    overlaps = find_overlaps(employee, start_date, end_date, exclude=exclude)
+    if overlaps:
+        ids = ', '.join(f'#{pk}' for pk in overlaps)
+        raise serializers.ValidationError(f"The requested period overlaps existing leave request(s) {ids}.")
+
+
+def check_approved_edit(leave_request, data):
+    """Reject changes to what an approved request debited from the ledger."""
+    if leave_request.status != LeaveRequest.LeaveStatus.APPROVED:
+        return
+    changed = [
+        name for name in APPROVED_LOCKED_FIELDS
+        if name in data and data[name] != getattr(leave_request, name)
+    ]
+    if changed:
+        raise serializers.ValidationError(
+            f"An approved request's {', '.join(changed)} cannot be changed; cancel it and submit a new request."
+        )
+
+
+def calculate_days_requested(employee, start_date, end_date):
+    """Business days covered by a leave request, per the employee's schedule and holidays."""
+    try:
+        days = business_days_for_employee(employee, start_date, end_date)
+    except ValueError as exc:
+        raise serializers.ValidationError(str(exc))
+    if not days:
+        raise serializers.ValidationError("The requested period contains no working days.")
+    return days
+
+
+class LeaveBalanceSerializer(serializers.ModelSerializer):
+    """Serializer for LeaveBalance model."""
+
+    employee_name = serializers.CharField(source='employee.name', read_only=True)
+
+    class Meta:
+        model = LeaveBalance
+        fields = ['id', 'employee', 'employee_name', 'leave_type', 'balance', 'accrued', 'used', 'updated_at']
+        read_only_fields = fields
+
+
+class LeaveLedgerEntrySerializer(serializers.ModelSerializer):
+    """Serializer for LeaveLedgerEntry model."""
+
+    class Meta:
+        model = LeaveLedgerEntry
+        fields = [
+            'id', 'employee', 'leave_type', 'entry_type', 'days',
+            'effective_date', 'leave_request', 'note', 'created_at'
+        ]
+        read_only_fields = fields
+
+
+class HolidaySerializer(serializers.ModelSerializer):
+    """Serializer for Holiday model."""
+
+    # Holidays only apply to existing departments; the (date, department) uniqueness check needs a saved one.
+    department = DepartmentField(allow_create=False, default=None)
+
+    class Meta:
+        model = Holiday
+        fields = ['id', 'name', 'date', 'department', 'created_at', 'updated_at']
+        read_only_fields = ['id', 'created_at', 'updated_at']
+
+
 class WorkScheduleSerializer(serializers.ModelSerializer):
     """Serializer for WorkSchedule model."""
 
@@ -76,7 +188,14 @@ class WorkScheduleSerializer(serializers.ModelSerializer):
         model = WorkSchedule
         fields = [
             'id', 'employee', 'employee_name', 'schedule_type', 'work_days',
-            'start_time', 'end_time', 'break_duration', 'overtime_allowed',
-            'created_at', 'updated_at'
+            'work_days_mask', 'start_time', 'end_time', 'break_duration',
+            'overtime_allowed', 'created_at', 'updated_at'
         ]
-        read_only_fields = ['id', 'created_at', 'updated_at']
+        read_only_fields = ['id', 'work_days_mask', 'created_at', 'updated_at']
+
+    def validate_work_days(self, value):
+        try:
+            parse_work_days(value)
+        except ValueError as exc:
+            raise serializers.ValidationError(str(exc))
+        return value
@@ -0,0 +1,70 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from api.tracking import previous_value, track_previous
+from employees.models import Department, Employee
+from .leaves import invalidate_leave_calendar
+from .models import AttendanceRecord, Holiday, LeaveRequest
+from .rollups import refresh_department_days, refresh_for_department_move, refresh_for_employee_dates
+from .workdays import get_calendar
+
+
+track_previous(AttendanceRecord, 'employee_id', 'date')
+
+
+@receiver(post_save, sender=AttendanceRecord)
+def refresh_rollup_on_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    keys = {(instance.employee_id, instance.date)}
+    previous = previous_value(instance, 'employee_id'), previous_value(instance, 'date')
+    if previous[0] is not None:
+        keys.add(previous)
+    transaction.on_commit(lambda: refresh_for_employee_dates(keys))
+
+
+@receiver(post_delete, sender=AttendanceRecord)
+def refresh_rollup_on_delete(sender, instance, **kwargs):
+    keys = {(instance.employee_id, instance.date)}
+    transaction.on_commit(lambda: refresh_for_employee_dates(keys))
+
+
+@receiver(post_save, sender=Employee)
+def refresh_rollup_on_department_move(sender, instance, raw=False, created=False, **kwargs):
+    """Move the employee's records from the old department's rollup rows to the new one's."""
+    if raw or created or not instance.has_changed('department_id'):
+        return
+    employee_id, departments = instance.pk, (instance.stored_value('department_id'), instance.department_id)
+    transaction.on_commit(lambda: refresh_for_department_move(employee_id, *departments))
+
+
+@receiver(pre_delete, sender=Employee)
+def refresh_rollup_on_employee_delete(sender, instance, **kwargs):
+    """
+    Records deleted with their employee can no longer be traced to a
+    department once the employee is gone; take the rollup keys first.
+    """
+    department_id = instance.stored_value('department_id', instance.department_id)
+    if department_id is None:
+        return
+    days = AttendanceRecord.objects.filter(employee=instance).values_list('date', flat=True).distinct()
+    keys = {(department_id, day) for day in days}
+    if keys:
+        transaction.on_commit(lambda: refresh_department_days(keys))
+
+
+@receiver(post_save, sender=Holiday)
+@receiver(post_delete, sender=Holiday)
+def reset_holiday_calendar(sender, **kwargs):
+    get_calendar().invalidate_holidays()
+
+
+@receiver(post_save, sender=LeaveRequest)
+@receiver(post_delete, sender=LeaveRequest)
+@receiver(post_save, sender=Employee)
+@receiver(post_save, sender=Department)
+@receiver(post_delete, sender=Department)
+def reset_leave_calendar(sender, **kwargs):
+    """Calendars list employee names and filter by department, by id or name."""
+    transaction.on_commit(invalidate_leave_calendar)
@@ -1,3 +1,625 @@
-from django.test import TestCase
+import gzip
+import os
+import tempfile
+from datetime import date, time, timedelta
+from decimal import Decimal
+from io import StringIO
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from api.pagination import HybridPagination
+from api.testing import AuthenticatedAPITestCase, FilterIndexAssertionsMixin, QueryCountAssertionsMixin
+from employees.models import Department, Employee
+from . import partitioning
+from .absences import mark_absences
+from .models import AttendanceRecord, DepartmentAttendanceDaily, Holiday, LeaveBalance, LeaveLedgerEntry, LeaveRequest, WorkSchedule
+from .timesheets import Timesheet
+from .workdays import get_calendar
+from .views import AttendanceRecordViewSet, HolidayViewSet, LeaveRequestViewSet
+
+
+class ListQueryCountTests(QueryCountAssertionsMixin, AuthenticatedAPITestCase):
+    """List endpoints run the same number of queries for any page size."""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        approver = Employee.objects.create(name='Approver', email='approver@example.com')
+        engineering = Department.objects.create(name='Engineering')
+        start = date(2025, 1, 6)
+        for i in range(10):
+            employee = Employee.objects.create(name=f'Employee {i}', email=f'employee{i}@example.com', department=engineering)
+            WorkSchedule.objects.create(employee=employee)
+            AttendanceRecord.objects.create(employee=employee, date=start)
+            LeaveRequest.objects.create(
+                employee=employee, leave_type='Annual', start_date=start + timedelta(days=i),
+                end_date=start + timedelta(days=i), days_requested=1, reason='Rest', approved_by=approver
+            )
+
+    def test_attendance_records(self):
+        self.assertConstantListQueries(self.client, '/api/attendance/attendance-records/')
+
+    def test_attendance_records_keyset(self):
+        self.assertConstantListQueries(self.client, '/api/attendance/attendance-records/?pagination=keyset')
+
+    def test_leave_requests(self):
+        self.assertConstantListQueries(self.client, '/api/attendance/leave-requests/')
+
+    def test_work_schedules(self):
+        self.assertConstantListQueries(self.client, '/api/attendance/work-schedules/')
+
+
+class FilterIndexTests(FilterIndexAssertionsMixin, TestCase):
+    """Every list filter is served by an index."""
+
+    def test_attendance_record_filters(self):
+        self.assertFiltersUseIndexes(AttendanceRecordViewSet)
+
+    def test_leave_request_filters(self):
+        self.assertFiltersUseIndexes(LeaveRequestViewSet)
+
+    def test_holiday_filters(self):
+        self.assertFiltersUseIndexes(HolidayViewSet)
+
+
+class LeaveLedgerTests(AuthenticatedAPITestCase):
+    """Every status change, deletion and cancellation of leave goes through the ledger."""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.employee = Employee.objects.create(name='Employee', email='employee@example.com')
+        WorkSchedule.objects.create(employee=cls.employee)
+
+    def setUp(self):
+        super().setUp()
+        response = self.client.post('/api/attendance/leave-requests/', {
+            'employee': self.employee.pk, 'leave_type': 'Annual', 'start_date': '2025-01-06',
+            'end_date': '2025-01-08', 'reason': 'Rest',
+        }, format='json')
+        self.assertEqual(response.status_code, 201, response.data)
+        self.leave_request = LeaveRequest.objects.get()
+        self.url = f'/api/attendance/leave-requests/{self.leave_request.pk}/'
+
+    def balance(self):
+        return LeaveBalance.objects.filter(employee=self.employee, leave_type='Annual').values_list('balance', flat=True).first()
+
+    def approve(self):
+        self.assertEqual(self.client.post(f'{self.url}approve/').status_code, 200)
+        self.assertEqual(self.balance(), -3)
+
+    def test_status_is_read_only(self):
+        self.client.patch(self.url, {'status': 'Approved'}, format='json')
+        self.leave_request.refresh_from_db()
+        self.assertEqual(self.leave_request.status, 'Pending')
+        self.assertFalse(LeaveLedgerEntry.objects.exists())
+
+    def test_only_pending_requests_are_approved(self):
+        self.approve()
+        response = self.client.post(f'{self.url}approve/')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.balance(), -3)
+        self.client.post(f'{self.url}cancel/')
+        self.assertEqual(self.client.post(f'{self.url}approve/').status_code, 400)
+        self.assertEqual(self.balance(), 0)
+
+    def test_cancel_credits_approved_days_back(self):
+        self.approve()
+        response = self.client.post(f'{self.url}cancel/')
+        self.assertEqual(response.data['status'], 'Cancelled')
+        self.assertEqual(self.balance(), 0)
+        self.assertEqual(
+            list(LeaveLedgerEntry.objects.order_by('id').values_list('entry_type', 'days')),
+            [('Debit', -3), ('Cancellation', 3)]
+        )
+        self.assertEqual(self.client.post(f'{self.url}cancel/').status_code, 400)
+
+    def test_deleting_approved_leave_credits_it_back(self):
+        self.approve()
+        self.assertEqual(self.client.delete(self.url).status_code, 204)
+        self.assertEqual(self.balance(), 0)
+        self.assertEqual(LeaveLedgerEntry.objects.filter(leave_request=None).count(), 2)
+
+    def test_approved_dates_cannot_change(self):
+        self.approve()
+        response = self.client.patch(self.url, {'end_date': '2025-01-10'}, format='json')
+        self.assertEqual(response.status_code, 400)
+        response = self.client.patch(self.url, {'reason': 'Holiday'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.leave_request.refresh_from_db()
+        self.assertEqual((self.leave_request.end_date, self.leave_request.days_requested), (date(2025, 1, 8), 3))
+        self.assertEqual(self.balance(), -3)
+
+
+class BulkDecisionTests(AuthenticatedAPITestCase):
+    """Bulk approval decides pending requests once and reports the others."""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.employees = [
+            Employee.objects.create(name=f'Employee {i}', email=f'employee{i}@example.com') for i in range(3)
+        ]
+
+    def leave(self, employee, status='Pending', day=date(2025, 1, 6)):
+        return LeaveRequest.objects.create(
+            employee=employee, leave_type='Annual', start_date=day, end_date=day, days_requested=1,
+            reason='Rest', status=status
+        )
+
+    def bulk(self, ids, action, **data):
+        response = self.client.post(
+            '/api/attendance/leave-requests/bulk/', {'ids': ids, 'action': action, **data}, format='json'
+        )
+        self.assertEqual(response.status_code, 200, response.data)
+        return response.data
+
+    def test_bulk_approve(self):
+        first, second = self.leave(self.employees[0]), self.leave(self.employees[1])
+        rejected = self.leave(self.employees[2], status='Rejected')
+        data = self.bulk([first.pk, second.pk, rejected.pk, 0, first.pk], 'approve')
+        self.assertEqual(data['updated'], 2)
+        self.assertEqual(
+            [(result['id'], result['outcome'], result['status']) for result in data['results']],
+            [(first.pk, 'updated', 'Approved'), (second.pk, 'updated', 'Approved'),
+             (rejected.pk, 'skipped', 'Rejected'), (0, 'not_found', None)]
+        )
+        self.assertEqual(
+            sorted(LeaveBalance.objects.values_list('employee', 'balance')),
+            [(self.employees[0].pk, -1), (self.employees[1].pk, -1)]
+        )
+        self.assertEqual(self.bulk([first.pk], 'reject')['results'][0]['outcome'], 'skipped')
+
+    def test_bulk_reject(self):
+        leave_request = self.leave(self.employees[0])
+        data = self.bulk([leave_request.pk], 'reject', reason='Busy')
+        self.assertEqual(data['updated'], 1)
+        leave_request.refresh_from_db()
+        self.assertEqual((leave_request.status, leave_request.rejection_reason), ('Rejected', 'Busy'))
+        self.assertFalse(LeaveLedgerEntry.objects.exists())
+
+
+@override_settings(LEAVE_MAX_DEPARTMENT_ABSENCE=0.5)
+class LeaveCoverageTests(AuthenticatedAPITestCase):
+    """Overlapping leave is refused and approvals respect the department leave limit."""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        sales = Department.objects.create(name='Sales')
+        cls.employees = [
+            Employee.objects.create(name=f'Employee {i}', email=f'employee{i}@example.com', department=sales)
+            for i in range(4)
+        ]
+
+    def leave(self, employee, start=date(2025, 1, 6), end=date(2025, 1, 8), status='Pending'):
+        return LeaveRequest.objects.create(
+            employee=employee, leave_type='Annual', start_date=start, end_date=end, days_requested=3,
+            reason='Rest', status=status
+        )
+
+    def test_overlapping_request_is_refused(self):
+        existing = self.leave(self.employees[0])
+        response = self.client.post('/api/attendance/leave-requests/', {
+            'employee': self.employees[0].pk, 'leave_type': 'Sick', 'start_date': '2025-01-08',
+            'end_date': '2025-01-09', 'reason': 'Flu',
+        }, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn(f'#{existing.pk}', str(response.data))
+        response = self.client.post('/api/attendance/leave-requests/', {
+            'employee': self.employees[0].pk, 'leave_type': 'Sick', 'start_date': '2025-01-09',
+            'end_date': '2025-01-09', 'reason': 'Flu',
+        }, format='json')
+        self.assertEqual(response.status_code, 201, response.data)
+
+    def test_approve_over_the_limit_needs_force(self):
+        self.leave(self.employees[0], status='Approved')
+        self.leave(self.employees[1], start=date(2025, 1, 8), end=date(2025, 1, 10), status='Approved')
+        leave_request = self.leave(self.employees[2], start=date(2025, 1, 7), end=date(2025, 1, 9))
+        url = f'/api/attendance/leave-requests/{leave_request.pk}/approve/'
+
+        response = self.client.post(url)
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(
+            (response.data['coverage']['peak_on_leave'], response.data['coverage']['peak_date']), (2, date(2025, 1, 8))
+        )
+        response = self.client.post(url, {'force': True}, format='json')
+        self.assertEqual((response.status_code, response.data['status']), (200, 'Approved'))
+
+    def test_bulk_approval_counts_earlier_approvals_in_the_batch(self):
+        self.leave(self.employees[0], status='Approved')
+        second, third = self.leave(self.employees[1]), self.leave(self.employees[2])
+        url = '/api/attendance/leave-requests/bulk/'
+
+        response = self.client.post(url, {'ids': [second.pk, third.pk], 'action': 'approve'}, format='json')
+        self.assertEqual(
+            [(result['outcome'], result['status']) for result in response.data['results']],
+            [('updated', 'Approved'), ('conflict', 'Pending')]
+        )
+        self.assertEqual(response.data['results'][1]['coverage']['peak_on_leave'], 2)
+        response = self.client.post(url, {'ids': [third.pk], 'action': 'approve', 'force': True}, format='json')
+        self.assertEqual(response.data['updated'], 1)
+
+
+class TimesheetTests(TestCase):
+    """Timesheet figures follow the work schedule and are written back only when they change."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.ann = Employee.objects.create(name='Ann', email='ann@example.com')
+        cls.ben = Employee.objects.create(name='Ben', email='ben@example.com')
+        WorkSchedule.objects.create(
+            employee=cls.ben, start_time=time(22), end_time=time(6), break_duration=30, overtime_allowed=False
+        )
+        for day, check_in, check_out in [
+            (6, time(9), time(17)), (7, time(9, 30), time(18, 30)), (8, time(9), time(12)), (9, time(9, 15), None),
+        ]:
+            AttendanceRecord.objects.create(
+                employee=cls.ann, date=date(2025, 1, day), check_in_time=check_in, check_out_time=check_out,
+                hours_worked=4
+            )
+        AttendanceRecord.objects.create(
+            employee=cls.ben, date=date(2025, 1, 6), check_in_time=time(22), check_out_time=time(7)
+        )
+
+    def figures(self, employee):
+        return list(AttendanceRecord.objects.filter(employee=employee).order_by('date').values_list(
+            'hours_worked', 'late_minutes', 'overtime_hours', 'undertime_hours'
+        ))
+
+    def test_figures_are_written_back(self):
+        timesheet = Timesheet.load(date(2025, 1, 6), date(2025, 1, 12))
+        self.assertEqual(timesheet.write_hours_worked(), 5)
+        self.assertEqual(self.figures(self.ann), [
+            (Decimal('7.00'), 0, Decimal('0.00'), Decimal('0.00')),
+            (Decimal('8.00'), 30, Decimal('1.00'), Decimal('0.00')),
+            (Decimal('2.00'), 0, Decimal('0.00'), Decimal('5.00')),
+            (Decimal('4.00'), 15, Decimal('0.00'), Decimal('0.00')),
+        ])
+        # Overnight shift; overtime is not allowed on Ben's schedule.
+        self.assertEqual(self.figures(self.ben), [(Decimal('8.50'), 0, Decimal('0.00'), Decimal('0.00'))])
+        self.assertEqual(Timesheet.load(date(2025, 1, 6), date(2025, 1, 12)).write_hours_worked(), 0)
+
+    def test_totals_by_employee(self):
+        totals = Timesheet.load(date(2025, 1, 6), date(2025, 1, 12), employee_ids=[self.ann.pk]).totals_by_employee()
+        self.assertEqual(totals[self.ann.pk], {
+            'days': 4, 'worked_hours': 17.0, 'scheduled_hours': 28.0, 'late_minutes': 45.0,
+            'overtime_hours': 1.0, 'undertime_hours': 5.0,
+        })
+
+
+class RollupTests(TestCase):
+    """Department rollups follow records and the employees' departments."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.sales = Department.objects.create(name='Sales')
+        cls.support = Department.objects.create(name='Support')
+        cls.ann = Employee.objects.create(name='Ann', email='ann@example.com', department=cls.sales)
+        cls.ben = Employee.objects.create(name='Ben', email='ben@example.com', department=cls.sales)
+
+    def rollup(self):
+        return sorted(DepartmentAttendanceDaily.objects.values_list('department__name', 'date', 'total_records'))
+
+    def test_department_move_moves_rollup_rows(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            for employee in (self.ann, self.ben):
+                AttendanceRecord.objects.create(employee=employee, date=date(2025, 1, 6))
+            AttendanceRecord.objects.create(employee=self.ann, date=date(2025, 1, 7))
+        self.assertEqual(self.rollup(), [('Sales', date(2025, 1, 6), 2), ('Sales', date(2025, 1, 7), 1)])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.ann.department = self.support
+            self.ann.save()
+        self.assertEqual(self.rollup(), [
+            ('Sales', date(2025, 1, 6), 1), ('Support', date(2025, 1, 6), 1), ('Support', date(2025, 1, 7), 1),
+        ])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.ann.department = None
+            self.ann.save()
+        self.assertEqual(self.rollup(), [('Sales', date(2025, 1, 6), 1)])
+
+    def test_employee_delete_refreshes_rollup(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            for employee in (self.ann, self.ben):
+                AttendanceRecord.objects.create(employee=employee, date=date(2025, 1, 6))
+            AttendanceRecord.objects.create(employee=self.ann, date=date(2025, 1, 7))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.ann.delete()
+        self.assertEqual(self.rollup(), [('Sales', date(2025, 1, 6), 1)])
+
+    def test_moved_record_refreshes_both_days(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            record = AttendanceRecord.objects.create(employee=self.ann, date=date(2025, 1, 6))
+        record.date = date(2025, 1, 7)
+        with self.captureOnCommitCallbacks(execute=True), CaptureQueriesContext(connection) as queries:
+            record.save()
+            # The rollup, metric and trend receivers share one lookup of the stored row.
+            lookups = [q['sql'] for q in queries if q['sql'].startswith('SELECT') and 'attendance_attendancerecord' in q['sql']]
+            self.assertEqual(len(lookups), 1, lookups)
+        self.assertEqual(self.rollup(), [('Sales', date(2025, 1, 7), 1)])
+
+
+class WorkingDaysTests(AuthenticatedAPITestCase):
+    """Expected working days follow each schedule and are paginated by employee."""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.employees = [Employee.objects.create(name=f'Employee {i}', email=f'employee{i}@example.com') for i in range(3)]
+        WorkSchedule.objects.create(employee=cls.employees[1], work_days='Mon,Wed,Fri')
+
+    def setUp(self):
+        super().setUp()
+        self.url = '/api/attendance/work-schedules/working-days/?start=2025-01-06&end=2025-01-19'
+
+    def test_working_days_are_paginated(self):
+        with mock.patch.object(HybridPagination, 'page_size', 2):
+            response = self.client.get(self.url)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual((response.data['count'], response.data['start']), (3, date(2025, 1, 6)))
+            self.assertEqual(response.data['results'], [
+                {'employee': self.employees[0].pk, 'working_days': 10},
+                {'employee': self.employees[1].pk, 'working_days': 6},
+            ])
+            response = self.client.get(response.data['next'])
+        self.assertEqual(response.data['results'], [{'employee': self.employees[2].pk, 'working_days': 10}])
+
+    def test_employee_filter(self):
+        response = self.client.get(f'{self.url}&employee={self.employees[1].pk}')
+        self.assertEqual(response.data['results'], [{'employee': self.employees[1].pk, 'working_days': 6}])
+        response = self.client.get(f'{self.url}&employee=x')
+        self.assertEqual(response.status_code, 400)
+
+
+class AbsenceDetectionTests(TestCase):
+    """Scheduled employees with no record, leave or holiday are marked absent once."""
+
+    day = date(2025, 1, 7)  # a Tuesday
+
+    @classmethod
+    def setUpTestData(cls):
+        sales, support = Department.objects.create(name='Sales'), Department.objects.create(name='Support')
+        Holiday.objects.create(name='Team day', date=cls.day, department=support)
+        employees = {
+            name: Employee.objects.create(name=name, email=f'{name}@example.com', department=sales)
+            for name in ['absent', 'unscheduled', 'pending', 'checked_in', 'on_leave', 'inactive', 'monday', 'holiday']
+        }
+        for name, employee in employees.items():
+            if name != 'unscheduled':
+                WorkSchedule.objects.create(employee=employee, work_days='Monday' if name == 'monday' else 'Monday-Friday')
+        AttendanceRecord.objects.create(employee=employees['checked_in'], date=cls.day)
+        for name, status in [('on_leave', 'Approved'), ('pending', 'Pending')]:
+            LeaveRequest.objects.create(
+                employee=employees[name], leave_type='Annual', start_date=cls.day - timedelta(days=1),
+                end_date=cls.day + timedelta(days=1), days_requested=3, reason='Rest', status=status
+            )
+        Employee.objects.filter(pk=employees['inactive'].pk).update(status=Employee.EmploymentStatus.INACTIVE)
+        Employee.objects.filter(pk=employees['holiday'].pk).update(department=support)
+
+    def test_mark_absences(self):
+        self.assertEqual(mark_absences(self.day), 3)
+        absent = AttendanceRecord.objects.filter(date=self.day, status='Absent').values_list('employee__name', flat=True)
+        self.assertEqual(sorted(absent), ['absent', 'pending', 'unscheduled'])
+        rollup = DepartmentAttendanceDaily.objects.get(department__name='Sales', date=self.day)
+        self.assertEqual((rollup.total_records, rollup.absent_count), (4, 3))
+        self.assertEqual(mark_absences(self.day), 0)
+
+    def test_command(self):
+        output = StringIO()
+        call_command('detect_absences', date=self.day.isoformat(), stdout=output)
+        self.assertIn('Marked 3 employee(s) absent on 2025-01-07', output.getvalue())
+
+
+class AttendanceIngestionTests(AuthenticatedAPITestCase):
+    """Batch events merge into existing records instead of failing on (employee, date)."""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        sales = Department.objects.create(name='Sales')
+        cls.ann = Employee.objects.create(name='Ann', email='ann@example.com', department=sales)
+        AttendanceRecord.objects.create(
+            employee=cls.ann, date=date(2025, 1, 6), check_in_time=time(9), status='Late', notes='Train delay'
+        )
+
+    def record(self, day):
+        return AttendanceRecord.objects.values(
+            'check_in_time', 'check_out_time', 'status', 'notes'
+        ).get(employee=self.ann, date=day)
+
+    def test_events_are_merged(self):
+        response = self.client.post('/api/attendance/attendance-records/batch/', [
+            {'employee': self.ann.pk, 'date': '2025-01-06', 'check_in_time': '09:30', 'check_out_time': '17:00'},
+            {'employee': self.ann.pk, 'date': '2025-01-07', 'check_in_time': '08:55'},
+            {'employee': self.ann.pk, 'date': '2025-01-07', 'check_in_time': '09:10', 'check_out_time': '12:00'},
+            {'employee': self.ann.pk, 'date': '2025-01-07', 'check_out_time': '17:30', 'notes': 'Late finish'},
+            {'employee': 999999, 'date': '2025-01-07'},
+            {'employee': self.ann.pk, 'date': 'not-a-date'},
+        ], format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data['received'], response.data['upserted']), (6, 2))
+        self.assertEqual([error['index'] for error in response.data['errors']], [4, 5])
+        # The stored check-in is kept; fields the event left out are not touched.
+        self.assertEqual(self.record(date(2025, 1, 6)), {
+            'check_in_time': time(9), 'check_out_time': time(17), 'status': 'Late', 'notes': 'Train delay',
+        })
+        # Within a batch the first check-in and the last check-out win.
+        self.assertEqual(self.record(date(2025, 1, 7)), {
+            'check_in_time': time(8, 55), 'check_out_time': time(17, 30), 'status': 'Present', 'notes': 'Late finish',
+        })
+        self.assertEqual(
+            DepartmentAttendanceDaily.objects.get(department__name='Sales', date=date(2025, 1, 7)).total_records, 1
+        )
+
+    def test_no_valid_events(self):
+        response = self.client.post('/api/attendance/attendance-records/batch/', [{'employee': self.ann.pk}], format='json')
+        self.assertEqual((response.status_code, response.data['failed']), (400, 1))
+        response = self.client.post('/api/attendance/attendance-records/batch/', {'employee': self.ann.pk}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+
+@skipUnless(connection.vendor == 'postgresql', 'Attendance partitioning requires PostgreSQL.')
+class PartitioningTests(TestCase):
+    """The attendance table converts to monthly partitions and archives old ones."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.employee = Employee.objects.create(name='Ann', email='ann@example.com')
+        for day in (date(2024, 1, 15), date(2025, 1, 10), date(2025, 3, 5)):
+            AttendanceRecord.objects.create(employee=cls.employee, date=day)
+
+    def partition_of(self, day):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT tableoid::regclass::text FROM {partitioning.TABLE} WHERE employee_id = %s AND date = %s',
+                [self.employee.pk, day]
+            )
+            return cursor.fetchone()[0]
+
+    def test_convert_keeps_rows_and_prunes_by_date(self):
+        self.assertTrue(partitioning.convert_to_partitioned(months_ahead=1))
+        self.assertFalse(partitioning.convert_to_partitioned())
+        self.assertTrue(partitioning.is_partitioned())
+        self.assertEqual(AttendanceRecord.objects.count(), 3)
+        self.assertEqual(self.partition_of(date(2025, 1, 10)), f'{partitioning.TABLE}_p2025_01')
+        created = AttendanceRecord.objects.create(employee=self.employee, date=date(2025, 3, 6))
+        self.assertGreater(created.pk, AttendanceRecord.objects.filter(date=date(2025, 3, 5)).get().pk)
+        plan = AttendanceRecord.objects.filter(date__gte=date(2025, 1, 1), date__lt=date(2025, 2, 1)).explain()
+        self.assertIn('_p2025_01', plan)
+        self.assertNotIn('_p2025_03', plan)
+
+    def test_future_partitions_take_rows_from_the_default_partition(self):
+        partitioning.convert_to_partitioned(months_ahead=0)
+        AttendanceRecord.objects.create(employee=self.employee, date=date(2031, 2, 3))
+        self.assertEqual(self.partition_of(date(2031, 2, 3)), f'{partitioning.TABLE}_default')
+        created = partitioning.ensure_partitions(months_ahead=2, today=date(2031, 1, 20))
+        self.assertEqual(created, [partitioning.partition_name(date(2031, month, 1)) for month in (1, 2, 3)])
+        self.assertEqual(self.partition_of(date(2031, 2, 3)), f'{partitioning.TABLE}_p2031_02')
+
+    def test_archive_exports_then_drops_old_partitions(self):
+        partitioning.convert_to_partitioned(months_ahead=0)
+        with tempfile.TemporaryDirectory() as directory:
+            paths = partitioning.archive_partitions(12, directory, today=date(2025, 6, 1))
+            self.assertEqual(
+                [os.path.basename(path) for path in paths],
+                [f'{partitioning.TABLE}_p2024_{month:02d}.csv.gz' for month in range(1, 6)]
+            )
+            with gzip.open(paths[0], 'rt') as archived:
+                rows = archived.read().splitlines()
+        self.assertTrue(rows[0].startswith('id,'))
+        self.assertEqual(len(rows), 2)
+        self.assertIn('2024-01-15', rows[1])
+        self.assertEqual(
+            list(AttendanceRecord.objects.order_by('date').values_list('date', flat=True)),
+            [date(2025, 1, 10), date(2025, 3, 5)]
+        )
+
+
+class LeaveDaysTests(AuthenticatedAPITestCase):
+    """Leave days are counted server-side from the schedule, skipping company and department holidays."""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.sales, support = Department.objects.create(name='Sales'), Department.objects.create(name='Support')
+        cls.ann = Employee.objects.create(name='Ann', email='ann@example.com', department=cls.sales)
+        cls.ben = Employee.objects.create(name='Ben', email='ben@example.com', department=cls.sales)
+        WorkSchedule.objects.create(employee=cls.ben, work_days='Mon,Wed,Fri')
+        Holiday.objects.create(name='Company day', date=date(2025, 1, 8))
+        Holiday.objects.create(name='Sales day', date=date(2025, 1, 9), department=cls.sales)
+        Holiday.objects.create(name='Support day', date=date(2025, 1, 10), department=support)
+
+    def setUp(self):
+        super().setUp()
+        # The work calendar caches holidays per process; test data is rolled back without signals.
+        get_calendar().invalidate_holidays()
+        self.addCleanup(get_calendar().invalidate_holidays)
+
+    def request_leave(self, employee, start, end):
+        return self.client.post('/api/attendance/leave-requests/', {
+            'employee': employee.pk, 'leave_type': 'Annual', 'start_date': start, 'end_date': end,
+            'reason': 'Rest', 'days_requested': 99,
+        }, format='json')
+
+    def test_days_skip_weekends_and_holidays(self):
+        response = self.request_leave(self.ann, '2025-01-06', '2025-01-12')
+        self.assertEqual((response.status_code, response.data['days_requested']), (201, 3))
+        response = self.request_leave(self.ben, '2025-01-06', '2025-01-12')
+        self.assertEqual((response.status_code, response.data['days_requested']), (201, 2))
+
+    def test_period_without_working_days_is_rejected(self):
+        response = self.request_leave(self.ann, '2025-01-08', '2025-01-09')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('no working days', str(response.data))
+
+    def test_recalculate_after_a_new_holiday(self):
+        self.assertEqual(self.request_leave(self.ann, '2025-01-13', '2025-01-17').data['days_requested'], 5)
+        Holiday.objects.create(name='Offsite', date=date(2025, 1, 14), department=self.sales)
+        output = StringIO()
+        call_command('recalculate_leave_days', stdout=output)
+        self.assertIn('updated 1', output.getvalue())
+        self.assertEqual(LeaveRequest.objects.get(employee=self.ann).days_requested, 4)
+
+
+class LeaveCalendarTests(AuthenticatedAPITestCase):
+    """The leave calendar lists approved leave per day and is cached until leave, names or departments change."""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.sales = Department.objects.create(name='Sales')
+        cls.ann = Employee.objects.create(name='Ann', email='ann@example.com', department=cls.sales)
+        cls.ben = Employee.objects.create(name='Ben', email='ben@example.com')
+        for employee, start, end, status in [
+            (cls.ann, date(2024, 12, 30), date(2025, 1, 7), 'Approved'),
+            (cls.ben, date(2025, 1, 7), date(2025, 1, 8), 'Approved'),
+            (cls.ben, date(2025, 1, 9), date(2025, 1, 9), 'Pending'),
+        ]:
+            LeaveRequest.objects.create(
+                employee=employee, leave_type='Annual', start_date=start, end_date=end, days_requested=1,
+                reason='Rest', status=status
+            )
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.url = '/api/attendance/leave-requests/calendar/?start=2025-01-06&end=2025-01-10'
+
+    def test_calendar(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.data['days'], [[0, [self.ann.pk]], [1, [self.ann.pk, self.ben.pk]], [2, [self.ben.pk]]])
+        self.assertEqual(response.data['employees'], {self.ann.pk: 'Ann', self.ben.pk: 'Ben'})
+        self.assertEqual(self.client.get(f'{self.url}&counts=true').data['counts'], [1, 2, 1, 0, 0])
+        response = self.client.get(f'{self.url}&department=sales&counts=true')
+        self.assertEqual(response.data['counts'], [1, 1, 0, 0, 0])
+
+    def test_calendar_is_cached_until_leave_changes(self):
+        self.client.get(self.url)
+        with self.assertNumQueries(0):
+            self.client.get(self.url)
+        with self.captureOnCommitCallbacks(execute=True):
+            pending = LeaveRequest.objects.get(status='Pending')
+            pending.status = LeaveRequest.LeaveStatus.APPROVED
+            pending.save()
+        self.assertEqual(self.client.get(f'{self.url}&counts=true').data['counts'], [1, 2, 1, 1, 0])
+        with self.captureOnCommitCallbacks(execute=True):
+            pending.delete()
+        self.assertEqual(self.client.get(f'{self.url}&counts=true').data['counts'], [1, 2, 1, 0, 0])
+
+    def test_calendar_is_cached_until_an_employee_changes(self):
+        self.client.get(self.url)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.ann.name = 'Anne'
+            self.ann.save()
+        self.assertEqual(self.client.get(self.url).data['employees'][self.ann.pk], 'Anne')
+        self.client.get(f'{self.url}&department=sales&counts=true')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.ben.department = self.sales
+            self.ben.save()
+        response = self.client.get(f'{self.url}&department=sales&counts=true')
+        self.assertEqual(response.data['counts'], [1, 2, 1, 0, 0])
@@ -0,0 +1,180 @@
+"""
+Vectorised timesheet calculations.
+
+Attendance records and work schedules for a period are loaded with two
+``values_list`` queries into NumPy arrays, and worked hours, lateness,
+overtime and undertime are computed for every record at once. Results can
+be written back to the records' ``hours_worked``, ``late_minutes``,
+``overtime_hours`` and ``undertime_hours`` in bulk.
+
+Worked time is the span between check-in and check-out less the
+schedule's break, which is deducted from every shift.
+"""
+from decimal import Decimal
+
+import numpy as np
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import AttendanceRecord, WorkSchedule
+from .rollups import refresh_for_employee_dates
+
+
+DEFAULT_SCHEDULE = (9 * 60, 17 * 60, 60, True)  # start, end (minutes), break, overtime allowed
+WRITE_BATCH_SIZE = 2000
+
+
+def _minutes(value):
+    return np.nan if value is None else value.hour * 60 + value.minute + value.second / 60
+
+
+class Timesheet:
+    """Per-record timesheet figures for a period, as parallel NumPy arrays.
+
+    All durations are in minutes. Records missing a check-in or check-out
+    have ``NaN`` worked time and no overtime/undertime; lateness only needs
+    the check-in.
+    """
+
+    def __init__(self, records, schedules):
+        count = len(records)
+        self.record_ids = np.fromiter((row[0] for row in records), dtype=np.int64, count=count)
+        self.employee_ids = np.fromiter((row[1] for row in records), dtype=np.int64, count=count)
+        self.dates = np.array([row[2] for row in records], dtype='datetime64[D]').reshape(count)
+        check_in = np.fromiter((_minutes(row[3]) for row in records), dtype=np.float64, count=count)
+        check_out = np.fromiter((_minutes(row[4]) for row in records), dtype=np.float64, count=count)
+
+        start, end, breaks, overtime_allowed = self._schedule_columns(schedules)
+
+        # Overnight shifts: a check-out earlier than the check-in is next day.
+        span = check_out - check_in
+        span = np.where(span < 0, span + 24 * 60, span)
+        scheduled_span = np.where(end > start, end - start, end + 24 * 60 - start)
+        worked = np.clip(span - breaks, 0, None)
+        scheduled = np.clip(scheduled_span - breaks, 0, None)
+        complete = ~np.isnan(worked)
+
+        self.scheduled_minutes = scheduled
+        self.worked_minutes = worked
+        self.late_minutes = np.where(np.isnan(check_in), 0, np.clip(check_in - start, 0, None))
+        self.overtime_minutes = np.where(complete & overtime_allowed, np.clip(worked - scheduled, 0, None), 0)
+        self.undertime_minutes = np.where(complete, np.clip(scheduled - worked, 0, None), 0)
+        self.complete = complete
+
+    def _schedule_columns(self, schedules):
+        """Broadcast each employee's schedule onto the record arrays."""
+        default = np.array(DEFAULT_SCHEDULE, dtype=np.float64)
+        if schedules:
+            schedule_ids = np.array([row[0] for row in schedules], dtype=np.int64)
+            table = np.array(
+                [(_minutes(row[1]), _minutes(row[2]), row[3], row[4]) for row in schedules],
+                dtype=np.float64
+            )
+            order = np.argsort(schedule_ids)
+            schedule_ids, table = schedule_ids[order], table[order]
+            position = np.clip(np.searchsorted(schedule_ids, self.employee_ids), 0, len(schedule_ids) - 1)
+            found = schedule_ids[position] == self.employee_ids
+            columns = np.where(found[:, None], table[position], default)
+        else:
+            columns = np.broadcast_to(default, (len(self.employee_ids), 4))
+        return columns[:, 0], columns[:, 1], columns[:, 2], columns[:, 3].astype(bool)
+
+    @classmethod
+    def load(cls, start, end, employee_ids=None):
+        records = AttendanceRecord.objects.filter(date__gte=start, date__lte=end)
+        schedules = WorkSchedule.objects.all()
+        if employee_ids is not None:
+            records = records.filter(employee_id__in=employee_ids)
+            schedules = schedules.filter(employee_id__in=employee_ids)
+        return cls(
+            list(records.order_by('employee_id', 'date').values_list(
+                'id', 'employee_id', 'date', 'check_in_time', 'check_out_time'
+            )),
+            list(schedules.values_list('employee_id', 'start_time', 'end_time', 'break_duration', 'overtime_allowed')),
+        )
+
+    def __len__(self):
+        return len(self.record_ids)
+
+    def totals_by_employee(self):
+        """Summed hours per employee: ``{employee_id: {...}}``."""
+        if not len(self):
+            return {}
+        employees, index = np.unique(self.employee_ids, return_inverse=True)
+        worked = np.where(self.complete, self.worked_minutes, 0)
+        columns = {
+            'days': np.bincount(index),
+            'worked_hours': np.bincount(index, weights=worked) / 60,
+            'scheduled_hours': np.bincount(index, weights=self.scheduled_minutes) / 60,
+            'late_minutes': np.bincount(index, weights=self.late_minutes),
+            'overtime_hours': np.bincount(index, weights=self.overtime_minutes) / 60,
+            'undertime_hours': np.bincount(index, weights=self.undertime_minutes) / 60,
+        }
+        return {
+            int(employee): {name: round(float(values[i]), 2) for name, values in columns.items()}
+            for i, employee in enumerate(employees)
+        }
+
+    def rows(self):
+        """Per-record figures as dicts, in ``(employee, date)`` order."""
+        return [
+            {
+                'id': int(self.record_ids[i]),
+                'employee': int(self.employee_ids[i]),
+                'date': str(self.dates[i]),
+                'worked_hours': round(float(self.worked_minutes[i]) / 60, 2) if self.complete[i] else None,
+                'late_minutes': round(float(self.late_minutes[i]), 1),
+                'overtime_hours': round(float(self.overtime_minutes[i]) / 60, 2),
+                'undertime_hours': round(float(self.undertime_minutes[i]) / 60, 2),
+            }
+            for i in range(len(self))
+        ]
+
+    def write_hours_worked(self):
+        """Store the computed figures on every record; returns the number of rows changed.
+
+        ``hours_worked`` is only replaced on complete records. Uses
+        ``UPDATE ... FROM`` a ``VALUES`` list in chunks, skipping rows whose
+        stored values already match. ``date`` is part of the join so a
+        partitioned table only touches the partitions in the period.
+        """
+        ids = self.record_ids.tolist()
+        dates = self.dates.astype(object).tolist()
+        hours = [
+            Decimal(f'{value:.2f}') if complete else None
+            for value, complete in zip(np.round(self.worked_minutes / 60, 2), self.complete)
+        ]
+        late = np.rint(self.late_minutes).astype(np.int64).tolist()
+        overtime = [Decimal(f'{value:.2f}') for value in np.round(self.overtime_minutes / 60, 2)]
+        undertime = [Decimal(f'{value:.2f}') for value in np.round(self.undertime_minutes / 60, 2)]
+
+        qn = connection.ops.quote_name
+        table = qn(AttendanceRecord._meta.db_table)
+        now = timezone.now()
+        updated = 0
+        with transaction.atomic(), connection.cursor() as cursor:
+            for start in range(0, len(ids), WRITE_BATCH_SIZE):
+                chunk = range(start, min(start + WRITE_BATCH_SIZE, len(ids)))
+                params = [now]
+                for i in chunk:
+                    params.extend([ids[i], dates[i], hours[i], late[i], overtime[i], undertime[i]])
+                values = ', '.join([
+                    '(%s, %s, CAST(%s AS numeric), CAST(%s AS integer), CAST(%s AS numeric), CAST(%s AS numeric))'
+                ] * len(chunk))
+                # A plain UPDATE (not WITH ... UPDATE) so every backend reports the row count.
+                cursor.execute(
+                    f'UPDATE {table} SET "hours_worked" = COALESCE(v.hours, {table}."hours_worked"), '
+                    f'"late_minutes" = v.late, "overtime_hours" = v.overtime, "undertime_hours" = v.undertime, '
+                    f'"updated_at" = %s FROM (SELECT column1 AS id, column2 AS day, column3 AS hours, '
+                    f'column4 AS late, column5 AS overtime, column6 AS undertime FROM (VALUES {values}) AS rows) AS v '
+                    f'WHERE {table}."id" = v.id AND {table}."date" = v.day '
+                    f'AND ({table}."hours_worked" <> COALESCE(v.hours, {table}."hours_worked") '
+                    f'OR {table}."late_minutes" <> v.late OR {table}."overtime_hours" <> v.overtime '
+                    f'OR {table}."undertime_hours" <> v.undertime)',
+                    params
+                )
+                updated += cursor.rowcount
+            refresh_for_employee_dates(zip(
+                self.employee_ids[self.complete].tolist(), self.dates[self.complete].astype(object).tolist()
+            ))
+        return updated
@@ -1,9 +1,15 @@
 from rest_framework.routers import DefaultRouter
-from .views import AttendanceRecordViewSet, LeaveRequestViewSet, WorkScheduleViewSet
+from .views import (
+    AttendanceRecordViewSet, HolidayViewSet, LeaveBalanceViewSet, LeaveLedgerViewSet,
+    LeaveRequestViewSet, WorkScheduleViewSet
+)
 
 router = DefaultRouter()
 router.register(r'attendance-records', AttendanceRecordViewSet)
 router.register(r'leave-requests', LeaveRequestViewSet)
+router.register(r'holidays', HolidayViewSet)
+router.register(r'leave-balances', LeaveBalanceViewSet)
+router.register(r'leave-ledger', LeaveLedgerViewSet)
 router.register(r'work-schedules', WorkScheduleViewSet)
 
 urlpatterns = router.urls
@@ -1,22 +1,45 @@
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from django.db.models import Count, Avg, Q
+from api.mixins import RelatedFieldsMixin
+from django.db import transaction
+from django.db.models import Sum
 from django.utils import timezone
+from django.utils.dateparse import parse_date
 from datetime import timedelta
-from .models import AttendanceRecord, LeaveRequest, WorkSchedule
+from employees.models import Employee
+from .ingestion import upsert_events, validate_events
+from .leaves import decide_pending, department_coverage, exceeds_leave_limit, leave_calendar
+from .ledger import EntryType, leave_entry, post_entries, record_status_change
+from .models import (
+    AttendanceRecord, DepartmentAttendanceDaily, Holiday, LeaveBalance, LeaveLedgerEntry, LeaveRequest, WorkSchedule
+)
+from .timesheets import Timesheet
+from .workdays import expected_working_days
 from .serializers import (
     AttendanceRecordSerializer, AttendanceRecordCreateSerializer,
+    HolidaySerializer, LeaveBalanceSerializer, LeaveLedgerEntrySerializer,
     LeaveRequestSerializer, LeaveRequestCreateSerializer,
-    WorkScheduleSerializer
+    WorkScheduleSerializer, check_approved_edit
 )
 
 
-class AttendanceRecordViewSet(viewsets.ModelViewSet):
+def is_forced(request):
+    return str(request.data.get('force', '')).lower() in ('1', 'true', 'yes')
+
+
+class AttendanceRecordViewSet(RelatedFieldsMixin, viewsets.ModelViewSet):
     """ViewSet for AttendanceRecord model."""
 
     queryset = AttendanceRecord.objects.all()
     serializer_class = AttendanceRecordSerializer
+    query_filters = {
+        'employee': 'employee',
+        'status': 'status',
+        'department': 'employee__department',
+        'start': 'date__gte',
+        'end': 'date__lte',
+    }
 
     def get_serializer_class(self):
         if self.action == 'create':
@@ -25,26 +48,35 @@ class AttendanceRecordViewSet(viewsets.ModelViewSet):
 
     @action(detail=False, methods=['get'])
     def summary(self, request):
-        """Get attendance summary for dashboard."""
+        """Get attendance summary for dashboard.
+
+        Reads the department-by-day rollup, so any window costs one small
+        grouped query. Defaults to the last 30 days; ``start``/``end``
+        (YYYY-MM-DD) select another range.
+        """
         today = timezone.now().date()
-        month_start = today.replace(day=1)
-        last_30_days = today - timedelta(days=30)
+        try:
+            start = parse_date(request.query_params.get('start', '')) or today - timedelta(days=30)
+            end = parse_date(request.query_params.get('end', '')) or today
+        except ValueError:
+            return Response({'error': 'start and end must be dates in YYYY-MM-DD format.'}, status=status.HTTP_400_BAD_REQUEST)
+        if start > end:
+            return Response({'error': 'start cannot be after end.'}, status=status.HTTP_400_BAD_REQUEST)
 
         # Department attendance data
-        department_data = AttendanceRecord.objects.filter(
-            date__gte=last_30_days
-        ).values('employee__department').annotate(
-            total_records=Count('id'),
-            present_count=Count('id', filter=Q(status='Present')),
-            attendance_rate=Avg('hours_worked')  # Simplified calculation
-        ).filter(employee__department__isnull=False)
+        department_data = DepartmentAttendanceDaily.objects.filter(
+            date__gte=start, date__lte=end
+        ).values('department', 'department__name').annotate(
+            total_records=Sum('total_records'),
+            present_count=Sum('present_count'),
+        ).order_by('department__name')
 
         # Format for frontend
         departments = []
         for dept in department_data:
             rate = (dept['present_count'] / dept['total_records'] * 100) if dept['total_records'] > 0 else 0
             departments.append({
-                'department': dept['employee__department'],
+                'department': dept['department__name'],
                 'performance': round(rate, 1),  # Using attendance rate as performance
                 'headcount': dept['total_records']
             })
@@ -53,42 +85,288 @@ class AttendanceRecordViewSet(viewsets.ModelViewSet):
             'departmentAttendance': departments
         })
 
+    @action(detail=False, methods=['get'])
+    def timesheet(self, request):
+        """Weekly or monthly timesheet for one employee.
+
+        Query parameters: ``employee`` (required), ``period`` (``week`` or
+        ``month``, default ``week``) and ``date`` (any day in the period,
+        default today).
+        """
+        employee = request.query_params.get('employee')
+        period = request.query_params.get('period', 'week')
+        try:
+            day = parse_date(request.query_params.get('date', '')) or timezone.now().date()
+        except ValueError:
+            day = None
+        if not employee or not employee.isdigit() or day is None or period not in ('week', 'month'):
+            return Response(
+                {'error': 'Expected employee=<id>, period=week|month and an optional date=YYYY-MM-DD.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        if period == 'week':
+            start = day - timedelta(days=day.weekday())
+            end = start + timedelta(days=6)
+        else:
+            start = day.replace(day=1)
+            end = (start + timedelta(days=32)).replace(day=1) - timedelta(days=1)
+
+        sheet = Timesheet.load(start, end, employee_ids=[int(employee)])
+        totals = sheet.totals_by_employee().get(int(employee), {})
+        return Response({
+            'employee': int(employee),
+            'period': period,
+            'start': start,
+            'end': end,
+            'days': sheet.rows(),
+            'totals': totals,
+        })
+
+    @action(detail=False, methods=['post'])
+    def batch(self, request):
+        """Ingest many check-in/check-out events with a single upsert.
+
+        Expects a JSON array of events (``employee``, ``date`` and any of
+        ``check_in_time``, ``check_out_time``, ``status``, ``hours_worked``,
+        ``notes``). Existing records for the same employee and date are
+        merged instead of rejected; invalid events are reported by index.
+        """
+        if not isinstance(request.data, list):
+            return Response({'error': 'Expected a JSON array of events.'}, status=status.HTTP_400_BAD_REQUEST)
 
-class LeaveRequestViewSet(viewsets.ModelViewSet):
+        events, errors = validate_events(request.data)
+        upserted = upsert_events([data for _, data in events]) if events else 0
+        return Response({
+            'received': len(request.data),
+            'upserted': upserted,
+            'failed': len(errors),
+            'errors': errors,
+        }, status=status.HTTP_200_OK if upserted else status.HTTP_400_BAD_REQUEST)
+
+
+class LeaveRequestViewSet(RelatedFieldsMixin, viewsets.ModelViewSet):
     """ViewSet for LeaveRequest model."""
 
     queryset = LeaveRequest.objects.all()
     serializer_class = LeaveRequestSerializer
+    # ``start``/``end`` select requests overlapping that period.
+    query_filters = {
+        'employee': 'employee',
+        'status': 'status',
+        'leave_type': 'leave_type',
+        'department': 'employee__department',
+        'start': 'end_date__gte',
+        'end': 'start_date__lte',
+    }
 
     def get_serializer_class(self):
         if self.action == 'create':
             return LeaveRequestCreateSerializer
         return LeaveRequestSerializer
 
+    def _change_status(self, leave_request, status_value, **changes):
+        """Move a request to ``status_value`` and post the ledger movement in one transaction."""
+        with transaction.atomic():
+            leave_request = LeaveRequest.objects.select_for_update().get(pk=leave_request.pk)
+            previous_status = leave_request.status
+            leave_request.status = status_value
+            for name, value in changes.items():
+                setattr(leave_request, name, value)
+            leave_request.save()
+            record_status_change(leave_request, previous_status)
+        return leave_request
+
+    def perform_update(self, serializer):
+        # Re-check under the row lock: the request may have been approved since it was validated.
+        with transaction.atomic():
+            locked = LeaveRequest.objects.select_for_update().get(pk=serializer.instance.pk)
+            check_approved_edit(locked, serializer.validated_data)
+            serializer.save()
+
+    def perform_destroy(self, instance):
+        """Delete a request, crediting back the days of an approved one."""
+        with transaction.atomic():
+            leave_request = LeaveRequest.objects.select_for_update().get(pk=instance.pk)
+            if leave_request.status == LeaveRequest.LeaveStatus.APPROVED:
+                post_entries([leave_entry(leave_request, EntryType.CANCELLATION, 'Leave deleted.')])
+            leave_request.delete()
+
     @action(detail=True, methods=['post'])
     def approve(self, request, pk=None):
-        """Approve a leave request."""
-        leave_request = self.get_object()
-        leave_request.status = 'Approved'
-        leave_request.approved_by = request.user.employee_profile  # Assuming user has employee profile
-        leave_request.approval_date = timezone.now()
-        leave_request.save()
-        serializer = self.get_serializer(leave_request)
-        return Response(serializer.data)
+        """Approve a leave request.
+
+        The response includes the department's leave coverage for the
+        period. If approving would put more than ``LEAVE_MAX_DEPARTMENT_ABSENCE``
+        of the department on leave on any day, responds 409 unless
+        ``force`` is true. Only pending requests can be approved; the
+        status and coverage are read under the request's row lock.
+        """
+        pk = self.get_object().pk
+        with transaction.atomic():
+            leave_request = LeaveRequest.objects.select_for_update(of=('self',)).select_related('employee').get(pk=pk)
+            if leave_request.status != LeaveRequest.LeaveStatus.PENDING:
+                return Response(
+                    {'error': f'{leave_request.status} requests cannot be approved.'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            coverage = department_coverage(leave_request)
+            if exceeds_leave_limit(coverage) and not is_forced(request):
+                return Response({
+                    'error': 'Approving this request exceeds the department leave limit.',
+                    'coverage': coverage,
+                }, status=status.HTTP_409_CONFLICT)
+
+            leave_request = self._change_status(
+                leave_request, LeaveRequest.LeaveStatus.APPROVED,
+                approved_by=Employee.objects.filter(email=request.user.email).first(),
+                approval_date=timezone.now(),
+            )
+        data = self.get_serializer(leave_request).data
+        data['coverage'] = coverage
+        return Response(data)
 
     @action(detail=True, methods=['post'])
     def reject(self, request, pk=None):
         """Reject a leave request."""
-        leave_request = self.get_object()
-        leave_request.status = 'Rejected'
-        leave_request.rejection_reason = request.data.get('reason', '')
-        leave_request.save()
+        leave_request = self._change_status(
+            self.get_object(), LeaveRequest.LeaveStatus.REJECTED,
+            rejection_reason=request.data.get('reason', ''),
+        )
         serializer = self.get_serializer(leave_request)
         return Response(serializer.data)
 
+    @action(detail=True, methods=['post'])
+    def cancel(self, request, pk=None):
+        """Cancel a pending or approved leave request; approved days are credited back."""
+        with transaction.atomic():
+            leave_request = LeaveRequest.objects.select_for_update().get(pk=self.get_object().pk)
+            if leave_request.status not in (LeaveRequest.LeaveStatus.PENDING, LeaveRequest.LeaveStatus.APPROVED):
+                return Response(
+                    {'error': f'{leave_request.status} requests cannot be cancelled.'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            leave_request = self._change_status(leave_request, LeaveRequest.LeaveStatus.CANCELLED)
+        return Response(self.get_serializer(leave_request).data)
+
+    @action(detail=False, methods=['get'])
+    def calendar(self, request):
+        """Who is on approved leave each day between ``start`` and ``end``.
+
+        Optional ``department``; ``counts=true`` returns only a count per day.
+        Days are offsets from ``start``, see ``attendance.leaves.leave_calendar``.
+        """
+        try:
+            start = parse_date(request.query_params.get('start', ''))
+            end = parse_date(request.query_params.get('end', ''))
+        except ValueError:
+            start = end = None
+        if start is None or end is None:
+            return Response({'error': 'start and end are required (YYYY-MM-DD).'}, status=status.HTTP_400_BAD_REQUEST)
+        if start > end:
+            return Response({'error': 'start cannot be after end.'}, status=status.HTTP_400_BAD_REQUEST)
+        if (end - start).days > 366:
+            return Response({'error': 'The range cannot exceed one year.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        counts_only = request.query_params.get('counts', '').lower() in ('1', 'true', 'yes')
+        return Response(leave_calendar(start, end, request.query_params.get('department'), counts_only))
+
+    @action(detail=False, methods=['post'])
+    def bulk(self, request):
+        """Approve or reject many pending requests at once.
+
+        Body: ``{"ids": [...], "action": "approve" | "reject", "reason": "...", "force": false}``.
+        Returns an outcome per id; requests that are no longer pending are
+        skipped, and approvals over the department leave limit are left
+        pending as conflicts unless ``force`` is true.
+        """
+        ids = request.data.get('ids')
+        decision = request.data.get('action')
+        if not isinstance(ids, list) or not ids or not all(isinstance(pk, int) for pk in ids):
+            return Response({'error': 'ids must be a non-empty list of integers.'}, status=status.HTTP_400_BAD_REQUEST)
+        if decision == 'approve':
+            results = decide_pending(
+                ids, LeaveRequest.LeaveStatus.APPROVED, force=is_forced(request),
+                approved_by=Employee.objects.filter(email=request.user.email).first(),
+                approval_date=timezone.now(),
+            )
+        elif decision == 'reject':
+            results = decide_pending(
+                ids, LeaveRequest.LeaveStatus.REJECTED,
+                rejection_reason=request.data.get('reason', ''),
+            )
+        else:
+            return Response({'error': 'action must be "approve" or "reject".'}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({
+            'updated': sum(1 for result in results if result['outcome'] == 'updated'),
+            'results': results,
+        })
+
+
+class LeaveBalanceViewSet(RelatedFieldsMixin, viewsets.ReadOnlyModelViewSet):
+    """Running leave balances; filter with ``?employee=<id>`` and ``?leave_type=``."""
+
+    queryset = LeaveBalance.objects.all()
+    serializer_class = LeaveBalanceSerializer
+    query_filters = {'employee': 'employee', 'leave_type': 'leave_type'}
 
-class WorkScheduleViewSet(viewsets.ModelViewSet):
+
+class LeaveLedgerViewSet(RelatedFieldsMixin, viewsets.ReadOnlyModelViewSet):
+    """Leave ledger history; filter with ``?employee=<id>`` and ``?leave_type=``."""
+
+    queryset = LeaveLedgerEntry.objects.all()
+    serializer_class = LeaveLedgerEntrySerializer
+    query_filters = {'employee': 'employee', 'leave_type': 'leave_type'}
+
+
+class HolidayViewSet(RelatedFieldsMixin, viewsets.ModelViewSet):
+    """ViewSet for Holiday model."""
+
+    queryset = Holiday.objects.all()
+    serializer_class = HolidaySerializer
+    query_filters = {'department': 'department', 'start': 'date__gte', 'end': 'date__lte'}
+
+
+class WorkScheduleViewSet(RelatedFieldsMixin, viewsets.ModelViewSet):
     """ViewSet for WorkSchedule model."""
 
     queryset = WorkSchedule.objects.all()
     serializer_class = WorkScheduleSerializer
+    query_filters = {'employee': 'employee'}
+
+    @action(detail=False, methods=['get'], url_path='working-days')
+    def working_days(self, request):
+        """Expected working days between ``start`` and ``end`` per employee.
+
+        ``employee`` may be a comma-separated list of ids; without it every
+        employee is included. Results are paginated by employee id.
+        """
+        try:
+            start = parse_date(request.query_params.get('start', ''))
+            end = parse_date(request.query_params.get('end', ''))
+        except ValueError:
+            start = end = None
+        if start is None or end is None:
+            return Response({'error': 'start and end are required (YYYY-MM-DD).'}, status=status.HTTP_400_BAD_REQUEST)
+
+        employee_ids = None
+        if request.query_params.get('employee'):
+            try:
+                employee_ids = [int(value) for value in request.query_params['employee'].split(',')]
+            except ValueError:
+                return Response({'error': 'employee must be a comma-separated list of ids.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        employees = Employee.objects.only('pk').order_by('pk')
+        if employee_ids is not None:
+            employees = employees.filter(pk__in=employee_ids)
+        page = self.paginate_queryset(employees)
+        try:
+            counts = expected_working_days(start, end, [employee.pk for employee in page])
+        except ValueError as exc:
+            return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        response = self.get_paginated_response([
+            {'employee': employee.pk, 'working_days': counts[employee.pk]} for employee in page
+        ])
+        response.data.update(start=start, end=end)
+        return response
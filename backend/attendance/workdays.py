@@ -0,0 +1,219 @@
+"""
+Work-day calendars compiled from ``WorkSchedule.work_days``.
+
+``work_days`` strings such as ``"Monday-Friday"`` or ``"Mon,Wed,Fri"`` are
+parsed once into a 7-bit weekday mask (bit 0 = Monday). Working-day counts
+for a date range are read from per-mask prefix sums over a day-indexed
+calendar, so each lookup is two array reads regardless of range length.
+Business-day counts additionally remove ``Holiday`` dates, company-wide
+and per department.
+"""
+import time
+from datetime import date, timedelta
+
+import numpy as np
+
+
+DAY_NAMES = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday']
+DEFAULT_MASK = 0b0011111  # Monday-Friday
+FULL_WEEK = 0b1111111
+
+CALENDAR_START = date(1990, 1, 1)
+CALENDAR_END = date(2100, 12, 31)
+
+# Holidays are reloaded at least this often so other processes' edits show up.
+HOLIDAY_CACHE_SECONDS = 300
+NO_DAYS = np.array([], dtype=np.int64)
+
+
+def _day_index(token):
+    token = token.strip().lower()
+    if len(token) >= 3:
+        for index, name in enumerate(DAY_NAMES):
+            if name.startswith(token):
+                return index
+    raise ValueError(f'Unknown day "{token}".')
+
+
+def parse_work_days(value):
+    """Parse ``"Monday-Friday"``, ``"Mon,Wed,Fri"``, ``"Sat-Mon"`` etc. into a weekday bitmask."""
+    if not value or not value.strip():
+        raise ValueError('Work days cannot be empty.')
+    mask = 0
+    for part in value.split(','):
+        if not part.strip():
+            continue
+        if '-' in part:
+            first, _, last = part.partition('-')
+            start, end = _day_index(first), _day_index(last)
+            day = start
+            while True:
+                mask |= 1 << day
+                if day == end:
+                    break
+                day = (day + 1) % 7
+        else:
+            mask |= 1 << _day_index(part)
+    if not mask:
+        raise ValueError('Work days cannot be empty.')
+    return mask
+
+
+class WorkCalendar:
+    """
+    Day-indexed calendar with lazily built prefix sums per weekday mask.
+
+    ``prefix(mask)[i]`` is the number of working days in
+    ``[CALENDAR_START, CALENDAR_START + i)``, so the count for any range is
+    ``prefix[end + 1] - prefix[start]``.
+    """
+
+    def __init__(self, start=CALENDAR_START, end=CALENDAR_END):
+        self.start = start
+        self.end = end
+        days = (end - start).days + 1
+        self.weekdays = (np.arange(days) + start.weekday()) % 7
+        self._prefix = {}
+        self._business_prefix = {}
+        self._holidays = None
+        self._holidays_loaded_at = 0.0
+
+    def index(self, day):
+        if not self.start <= day <= self.end:
+            raise ValueError(f'{day} is outside the work calendar ({self.start} to {self.end}).')
+        return (day - self.start).days
+
+    def working_day_flags(self, mask):
+        """Boolean array: is each calendar day a working day for ``mask``."""
+        return ((mask >> self.weekdays) & 1).astype(bool)
+
+    def prefix(self, mask):
+        if mask not in self._prefix:
+            flags = self.working_day_flags(mask)
+            self._prefix[mask] = np.concatenate(([0], np.cumsum(flags, dtype=np.int32)))
+        return self._prefix[mask]
+
+    def count(self, mask, start, end):
+        """Working days in ``[start, end]`` (inclusive) for one mask."""
+        if start > end:
+            return 0
+        prefix = self.prefix(mask)
+        return int(prefix[self.index(end) + 1] - prefix[self.index(start)])
+
+    def count_many(self, masks, starts, ends):
+        """Vectorised ``count`` over parallel arrays of masks and day indexes.
+
+        ``starts``/``ends`` are calendar indexes (see ``index``); one prefix
+        array is read per distinct mask.
+        """
+        masks = np.asarray(masks)
+        starts = np.asarray(starts)
+        ends = np.asarray(ends)
+        result = np.zeros(len(masks), dtype=np.int64)
+        for mask in np.unique(masks):
+            selected = masks == mask
+            prefix = self.prefix(int(mask))
+            result[selected] = prefix[ends[selected] + 1] - prefix[starts[selected]]
+        return np.where(ends >= starts, result, 0)
+
+    def invalidate_holidays(self):
+        self._holidays = None
+        self._business_prefix.clear()
+
+    def holidays(self):
+        """``{department_id: array of day indexes}``; ``None`` holds company-wide holidays."""
+        expired = time.monotonic() - self._holidays_loaded_at > HOLIDAY_CACHE_SECONDS
+        if self._holidays is None or expired:
+            from .models import Holiday
+
+            by_department = {}
+            rows = Holiday.objects.filter(date__gte=self.start, date__lte=self.end).values_list('department', 'date')
+            for department_id, day in rows:
+                by_department.setdefault(department_id, []).append((day - self.start).days)
+            self._holidays = {key: np.array(days, dtype=np.int64) for key, days in by_department.items()}
+            self._business_prefix.clear()
+            self._holidays_loaded_at = time.monotonic()
+        return self._holidays
+
+    def business_prefix(self, mask, department_id=None):
+        """Prefix sums of working days for ``mask`` minus the holidays of ``department_id``."""
+        holidays = self.holidays()
+        key = (mask, department_id)
+        if key not in self._business_prefix:
+            flags = self.working_day_flags(mask)
+            flags[holidays.get(None, NO_DAYS)] = False
+            if department_id is not None:
+                flags[holidays.get(department_id, NO_DAYS)] = False
+            self._business_prefix[key] = np.concatenate(([0], np.cumsum(flags, dtype=np.int32)))
+        return self._business_prefix[key]
+
+    def business_days(self, mask, start, end, department_id=None):
+        """Working days in ``[start, end]`` excluding holidays."""
+        if start > end:
+            return 0
+        prefix = self.business_prefix(mask, department_id)
+        return int(prefix[self.index(end) + 1] - prefix[self.index(start)])
+
+    def business_days_many(self, masks, department_ids, starts, ends):
+        """Vectorised ``business_days`` over parallel arrays (day indexes, as in ``count_many``)."""
+        masks = np.asarray(masks)
+        department_ids = np.asarray(department_ids, dtype=object)
+        starts = np.asarray(starts)
+        ends = np.asarray(ends)
+        result = np.zeros(len(masks), dtype=np.int64)
+        for mask, department_id in set(zip(masks.tolist(), department_ids.tolist())):
+            selected = (masks == mask) & (department_ids == department_id)
+            prefix = self.business_prefix(mask, department_id)
+            result[selected] = prefix[ends[selected] + 1] - prefix[starts[selected]]
+        return np.where(ends >= starts, result, 0)
+
+    def is_working_day(self, mask, day):
+        return bool(mask & (1 << day.weekday()))
+
+    def dates(self, mask, start, end):
+        """Working dates in ``[start, end]`` for one mask."""
+        first, last = self.index(start), self.index(end)
+        flags = self.working_day_flags(mask)[first:last + 1]
+        return [start + timedelta(days=int(offset)) for offset in np.flatnonzero(flags)]
+
+
+_calendar = None
+
+
+def get_calendar():
+    """Process-wide shared calendar."""
+    global _calendar
+    if _calendar is None:
+        _calendar = WorkCalendar()
+    return _calendar
+
+
+def expected_working_days(start, end, employee_ids=None):
+    """Expected working days in ``[start, end]`` per employee: ``{employee_id: count}``.
+
+    Company-wide and department holidays are excluded. Employees without
+    a ``WorkSchedule`` use the Monday-Friday default.
+    """
+    from employees.models import Employee
+
+    calendar = get_calendar()
+    employees = Employee.objects.all()
+    if employee_ids is not None:
+        employees = employees.filter(pk__in=employee_ids)
+
+    counts = {}
+    result = {}
+    for employee_id, department_id, mask in employees.values_list('pk', 'department', 'work_schedule__work_days_mask'):
+        key = (mask or DEFAULT_MASK, department_id)
+        if key not in counts:
+            counts[key] = calendar.business_days(key[0], start, end, key[1])
+        result[employee_id] = counts[key]
+    return result
+
+
+def business_days_for_employee(employee, start, end):
+    """Business days in ``[start, end]`` for ``employee`` (schedule and department holidays)."""
+    from .models import WorkSchedule
+
+    mask = WorkSchedule.objects.filter(employee=employee).values_list('work_days_mask', flat=True).first()
+    return get_calendar().business_days(mask or DEFAULT_MASK, start, end, employee.department_id)
@@ -1,9 +1,15 @@
 from django.contrib import admin
-from .models import Employee
+from .models import Department, Employee
+
+
+@admin.register(Department)
+class DepartmentAdmin(admin.ModelAdmin):
+    list_display = ("name", "created_at")
+    search_fields = ("name",)
 
 
 @admin.register(Employee)
 class EmployeeAdmin(admin.ModelAdmin):
     list_display = ("name", "email", "department", "role", "status")
-    search_fields = ("name", "email", "department", "role")
+    search_fields = ("name", "email", "department__name", "role")
     list_filter = ("status", "department")
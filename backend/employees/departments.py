@@ -0,0 +1,17 @@
+"""
+Department name normalisation.
+
+Department names are matched case-insensitively after trimming and
+collapsing whitespace, so " sales  team" and "Sales Team" are the same
+department. The data migrations that turned the old free-text
+``department`` columns into foreign keys carry their own frozen copy.
+"""
+
+
+def normalize_department_name(value):
+    return ' '.join((value or '').split())
+
+
+def department_key(value):
+    return normalize_department_name(value).casefold()
+
@@ -0,0 +1,106 @@
+import csv
+import io
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from rest_framework.exceptions import ValidationError
+
+from .departments import department_key
+from .models import Department, Employee
+from .serializers import EmployeeImportSerializer, generate_initials
+
+
+DEFAULT_BATCH_SIZE = 1000
+
+
+def parse_csv(file_obj):
+    """Read an uploaded CSV file into a list of row dicts (header row required)."""
+    text = io.TextIOWrapper(file_obj, encoding='utf-8-sig', newline='')
+    try:
+        return [
+            {key.strip(): value.strip() for key, value in row.items() if key and value is not None and value.strip() != ''}
+            for row in csv.DictReader(text)
+        ]
+    finally:
+        text.detach()
+
+
+class EmployeeImporter:
+    """
+    Validates and inserts employee rows in ``bulk_create`` batches.
+
+    Rows are validated with the ``EmployeeCreateSerializer`` field rules.
+    Email uniqueness is checked with one ``email__in`` query per batch and
+    against earlier rows of the same file. Invalid rows are reported and
+    skipped; valid rows are still imported.
+    """
+
+    def __init__(self, batch_size=None):
+        # One serializer instance is reused for every row: building the
+        # field set is far more expensive than validating a row with it.
+        self.serializer = EmployeeImportSerializer()
+        self.batch_size = max(1, batch_size or getattr(settings, 'EMPLOYEE_IMPORT_BATCH_SIZE', DEFAULT_BATCH_SIZE))
+
+    def run(self, rows):
+        created = 0
+        errors = []
+        seen_emails = set()
+        for offset in range(0, len(rows), self.batch_size):
+            batch = rows[offset:offset + self.batch_size]
+            employees, batch_errors = self.build_batch(batch, offset, seen_emails)
+            errors.extend(batch_errors)
+            if not employees:
+                continue
+            try:
+                with transaction.atomic():
+                    self.save_new_departments(employees)
+                    Employee.objects.bulk_create([employee for _, employee in employees], batch_size=self.batch_size)
+            except IntegrityError as exc:
+                # Lost a race with a concurrent insert; report the whole batch.
+                errors.extend({'row': index, 'errors': {'non_field_errors': [str(exc)]}} for index, _ in employees)
+                continue
+            created += len(employees)
+        errors.sort(key=lambda error: error['row'])
+        return {'total': len(rows), 'created': created, 'failed': len(errors), 'errors': errors}
+
+    def save_new_departments(self, employees):
+        """
+        Create the new departments a batch names, once each, inside the batch's transaction.
+
+        Validation only looks departments up, so a row that fails, or a
+        batch that is rolled back, leaves no department behind.
+        """
+        created = {}
+        for _, employee in employees:
+            department = employee.department
+            if department is not None and department.pk is None:
+                key = department_key(department.name)
+                if key not in created:
+                    created[key] = Department.resolve(department.name)
+                employee.department = created[key]
+
+    def build_batch(self, batch, offset, seen_emails):
+        valid = []
+        errors = []
+        for index, row in enumerate(batch, start=offset + 1):
+            if not isinstance(row, dict):
+                errors.append({'row': index, 'errors': {'non_field_errors': ['Expected an object.']}})
+                continue
+            try:
+                valid.append((index, self.serializer.run_validation(row)))
+            except ValidationError as exc:
+                errors.append({'row': index, 'errors': exc.detail})
+
+        existing = set(Employee.objects.filter(
+            email__in=[data['email'] for _, data in valid]
+        ).values_list('email', flat=True))
+
+        employees = []
+        for index, data in valid:
+            email = data['email']
+            if email in existing or email in seen_emails:
+                errors.append({'row': index, 'errors': {'email': ['employee with this email already exists.']}})
+                continue
+            seen_emails.add(email)
+            employees.append((index, Employee(initials=generate_initials(data.get('name', '')), **data)))
+        return employees, errors
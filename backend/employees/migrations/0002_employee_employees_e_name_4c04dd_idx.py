@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-17 22:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employees', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='employee',
+            index=models.Index(fields=['name', 'id'], name='employees_e_name_4c04dd_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-17 22:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employees', '0002_employee_employees_e_name_4c04dd_idx'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='employee',
+            index=models.Index(fields=['department'], name='employees_e_departm_e28f46_idx'),
+        ),
+    ]
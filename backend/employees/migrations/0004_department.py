@@ -0,0 +1,93 @@
+from collections import Counter
+
+import django.db.models.deletion
+import django.db.models.functions.text
+from django.db import migrations, models
+from django.db.models import Count
+
+
+# Frozen copy of the department name matching at the time of this migration.
+def department_key(value):
+    return ' '.join((value or '').split()).casefold()
+
+
+def link_department_names(Department, queryset, source, target):
+    """Point ``target`` at the department named by ``source``, creating one per distinct spelling."""
+    rows = list(queryset.values_list(source).annotate(rows=Count('pk')).order_by())
+    spellings = {}
+    for value, count in rows:
+        key = department_key(value)
+        if key:
+            spellings.setdefault(key, Counter())[' '.join(value.split())] += count
+
+    departments = {department_key(department.name): department for department in Department.objects.all()}
+    for key, variants in spellings.items():
+        if key not in departments:
+            name = min(variants.items(), key=lambda item: (-item[1], item[0]))[0]
+            departments[key] = Department.objects.create(name=name)
+
+    linked = 0
+    for value, _ in rows:
+        key = department_key(value)
+        if key:
+            linked += queryset.filter(**{source: value}).update(**{target: departments[key]})
+    return linked
+
+
+def link_employee_departments(apps, schema_editor):
+    Department = apps.get_model('employees', 'Department')
+    Employee = apps.get_model('employees', 'Employee')
+    link_department_names(Department, Employee.objects.all(), 'department', 'department_ref')
+
+
+def restore_employee_departments(apps, schema_editor):
+    Employee = apps.get_model('employees', 'Employee')
+    for employee in Employee.objects.exclude(department_ref=None).select_related('department_ref'):
+        Employee.objects.filter(pk=employee.pk).update(department=employee.department_ref.name)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employees', '0003_employee_employees_e_departm_e28f46_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Department',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, verbose_name='name')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='created at')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='updated at')),
+            ],
+            options={
+                'ordering': ['name'],
+                'constraints': [models.UniqueConstraint(django.db.models.functions.text.Lower('name'), name='unique_department_name')],
+            },
+        ),
+        migrations.AddField(
+            model_name='employee',
+            name='department_ref',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='employees.department'),
+        ),
+        migrations.RunPython(link_employee_departments, restore_employee_departments),
+        migrations.RemoveIndex(
+            model_name='employee',
+            name='employees_e_departm_e28f46_idx',
+        ),
+        migrations.RemoveField(
+            model_name='employee',
+            name='department',
+        ),
+        migrations.RenameField(
+            model_name='employee',
+            old_name='department_ref',
+            new_name='department',
+        ),
+        migrations.AlterField(
+            model_name='employee',
+            name='department',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='employees', to='employees.department'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-17 23:31
+
+import django.utils.timezone
+from django.db import migrations, models
+from django.db.models import F
+
+
+def backfill_status_changed_at(apps, schema_editor):
+    # The best earlier record of a departure is the employee's last change.
+    Employee = apps.get_model('employees', 'Employee')
+    Employee.objects.filter(status='Inactive').update(status_changed_at=F('updated_at'))
+    Employee.objects.exclude(status='Inactive').update(status_changed_at=F('created_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employees', '0005_alter_employee_department'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='employee',
+            name='status_changed_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, verbose_name='status changed at'),
+        ),
+        migrations.RunPython(backfill_status_changed_at, migrations.RunPython.noop),
+    ]
@@ -1,6 +1,47 @@
-from django.db import models
+from django.db import IntegrityError, models, transaction
+from django.db.models.functions import Lower
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
+from .departments import normalize_department_name
+
+
+class Department(models.Model):
+    """Organisational unit referenced by employees, users and dashboard metrics."""
+
+    name = models.CharField(_('name'), max_length=100)
+
+    created_at = models.DateTimeField(_('created at'), auto_now_add=True)
+    updated_at = models.DateTimeField(_('updated at'), auto_now=True)
+
+    class Meta:
+        ordering = ['name']
+        constraints = [
+            models.UniqueConstraint(Lower('name'), name='unique_department_name'),
+        ]
+
+    def __str__(self) -> str:  # pragma: no cover
+        return self.name
+
+    def save(self, *args, **kwargs):
+        self.name = normalize_department_name(self.name)
+        super().save(*args, **kwargs)
+
+    @classmethod
+    def resolve(cls, name):
+        """The department called ``name`` (case-insensitive), created if new; ``None`` if blank."""
+        name = normalize_department_name(name)
+        if not name:
+            return None
+        department = cls.objects.filter(name__iexact=name).first()
+        if department is None:
+            try:
+                with transaction.atomic():
+                    department = cls.objects.create(name=name)
+            except IntegrityError:
+                department = cls.objects.get(name__iexact=name)
+        return department
+
 
 class Employee(models.Model):
     """Basic employee profile used by the dashboard and directory."""
@@ -13,12 +54,17 @@ class Employee(models.Model):
     name = models.CharField(_('name'), max_length=150)
     email = models.EmailField(_('email'), unique=True)
     phone = models.CharField(_('phone'), max_length=30, blank=True)
-    department = models.CharField(_('department'), max_length=100, blank=True)
+    department = models.ForeignKey(
+        Department, on_delete=models.SET_NULL, null=True, blank=True, related_name='employees',
+        verbose_name=_('department')
+    )
     role = models.CharField(_('role'), max_length=100, blank=True)
 
     performance_score = models.PositiveSmallIntegerField(_('performance score'), default=0)
     attendance_rate = models.PositiveSmallIntegerField(_('attendance rate'), default=0)
     status = models.CharField(_('status'), max_length=20, choices=EmploymentStatus.choices, default=EmploymentStatus.ACTIVE)
+    # When ``status`` last changed (for Inactive employees, when they left); set by ``save``.
+    status_changed_at = models.DateTimeField(_('status changed at'), default=timezone.now)
 
     initials = models.CharField(_('initials'), max_length=4, blank=True)
 
@@ -27,6 +73,41 @@ class Employee(models.Model):
 
     class Meta:
         ordering = ['name']
+        indexes = [
+            models.Index(fields=['name', 'id']),
+        ]
+
+    # Fields whose stored value is kept, so saves can tell what changed.
+    TRACKED_FIELDS = ('status', 'department_id')
 
     def __str__(self) -> str:  # pragma: no cover
         return f"{self.name}"
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        employee = super().from_db(db, field_names, values)
+        employee._remember_stored_values()
+        return employee
+
+    def _remember_stored_values(self):
+        self._stored_values = {name: self.__dict__[name] for name in self.TRACKED_FIELDS if name in self.__dict__}
+
+    def stored_value(self, name, default=None):
+        """
+        Value of the tracked field ``name`` as last loaded or saved, or ``default`` if unknown.
+
+        Inside ``save``, including its ``post_save`` signal, this is still the previous value.
+        """
+        return getattr(self, '_stored_values', {}).get(name, default)
+
+    def has_changed(self, name):
+        stored = getattr(self, '_stored_values', {})
+        return name in stored and getattr(self, name) != stored[name]
+
+    def save(self, *args, **kwargs):
+        if self.has_changed('status'):
+            self.status_changed_at = timezone.now()
+            if kwargs.get('update_fields') is not None:
+                kwargs['update_fields'] = {*kwargs['update_fields'], 'status_changed_at'}
+        super().save(*args, **kwargs)
+        self._remember_stored_values()
@@ -0,0 +1,113 @@
+"""
+Employee 360 profile: everything the employee page shows, in one response.
+
+``profile_state`` fetches the employee together with a fingerprint of
+every related table the profile reads (latest ``updated_at`` and row
+count per table, plus the department and the reviewers it names) in a
+single query; its hash is the response's ETag, so
+a revalidation that finds nothing changed costs that one query.
+``build_profile`` then loads the sections with ``Prefetch`` objects over
+sliced or filtered querysets plus one aggregate for attendance: a fixed
+number of queries however much history the employee has.
+"""
+import hashlib
+from datetime import timedelta
+
+from django.db.models import Count, Max, OuterRef, Prefetch, Q, Subquery, Sum, prefetch_related_objects
+from django.db.models.functions import Coalesce
+
+from attendance.models import AttendanceRecord, LeaveRequest
+from attendance.rollups import STATUS_COUNTS
+from performance.models import KPI, Goal, PerformanceReview
+from performance.scoring import with_achievement
+from .models import Employee
+
+ATTENDANCE_DAYS = 30
+
+ACTIVE_GOAL_STATUSES = (Goal.GoalStatus.ACTIVE, Goal.GoalStatus.OVERDUE)
+
+
+def section_querysets(today, reviews):
+    """The related rows each profile section shows, keyed by section name."""
+    return {
+        'reviews': (
+            'performance_reviews',
+            PerformanceReview.objects.select_related('reviewer').order_by('-review_date', '-id')[:reviews],
+        ),
+        'goals': (
+            'goals',
+            Goal.objects.filter(status__in=ACTIVE_GOAL_STATUSES).order_by('target_completion_date', 'id'),
+        ),
+        'kpis': (
+            'kpis',
+            with_achievement(KPI.objects.filter(period_start__lte=today, period_end__gte=today)).order_by('-weight', 'id'),
+        ),
+        'pending_leave': (
+            'leave_requests',
+            LeaveRequest.objects.filter(status=LeaveRequest.LeaveStatus.PENDING).order_by('start_date', 'id'),
+        ),
+    }
+
+
+def _fingerprint(model, **filters):
+    """Latest change and row count of the employee's rows in ``model``, as two subqueries."""
+    rows = model.objects.filter(employee=OuterRef('pk'), **filters).order_by().values('employee')
+    return (
+        Subquery(rows.annotate(latest=Max('updated_at')).values('latest')),
+        Coalesce(Subquery(rows.annotate(rows=Count('id')).values('rows')), 0),
+    )
+
+
+def _reviewer_fingerprint():
+    """Latest change and count of the reviewers named by the employee's reviews, as two subqueries."""
+    reviews = PerformanceReview.objects.filter(employee=OuterRef('pk')).order_by().values('employee')
+    return (
+        Subquery(reviews.annotate(latest=Max('reviewer__updated_at')).values('latest')),
+        Coalesce(Subquery(reviews.annotate(rows=Count('reviewer')).values('rows')), 0),
+    )
+
+
+def profile_state(pk, today, reviews):
+    """``(employee, etag)`` for employee ``pk``, or ``(None, None)`` if there is none."""
+    since = today - timedelta(days=ATTENDANCE_DAYS - 1)
+    tables = {
+        'reviews': _fingerprint(PerformanceReview),
+        'goals': _fingerprint(Goal),
+        'kpis': _fingerprint(KPI),
+        'leave': _fingerprint(LeaveRequest),
+        'attendance': _fingerprint(AttendanceRecord, date__gte=since),
+        'reviewers': _reviewer_fingerprint(),
+    }
+    annotations = {}
+    for name, (latest, rows) in tables.items():
+        annotations[f'_{name}_latest'] = latest
+        annotations[f'_{name}_rows'] = rows
+    employee = Employee.objects.select_related('department').annotate(**annotations).filter(pk=pk).first()
+    if employee is None:
+        return None, None
+    department = employee.department
+    state = [employee.updated_at, department and (department.pk, department.updated_at), today, reviews]
+    state.extend(getattr(employee, name) for name in sorted(annotations))
+    return employee, hashlib.sha1(repr(state).encode()).hexdigest()
+
+
+def attendance_stats(employee, today):
+    since = today - timedelta(days=ATTENDANCE_DAYS - 1)
+    stats = AttendanceRecord.objects.filter(employee=employee, date__gte=since, date__lte=today).aggregate(
+        total_records=Count('id'),
+        hours_worked=Sum('hours_worked'),
+        **{name: Count('id', filter=Q(status=value)) for name, value in STATUS_COUNTS.items()}
+    )
+    total = stats['total_records']
+    stats['hours_worked'] = float(stats['hours_worked'] or 0)
+    stats['attendance_rate'] = round((total - stats['absent_count']) / total * 100, 1) if total else None
+    return {'start': since, 'end': today, **stats}
+
+
+def build_profile(employee, today, reviews):
+    """Attach the profile sections to ``employee``; returns the attendance statistics."""
+    prefetch_related_objects([employee], *[
+        Prefetch(relation, queryset=queryset, to_attr=f'profile_{section}')
+        for section, (relation, queryset) in section_querysets(today, reviews).items()
+    ])
+    return attendance_stats(employee, today)
@@ -1,10 +1,116 @@
+from django.db import transaction
 from rest_framework import serializers
-from .models import Employee
+from .departments import department_key, normalize_department_name
+from .models import Department, Employee
 
 
-class EmployeeSerializer(serializers.ModelSerializer):
+def generate_initials(name):
+    """Up to four upper-case initials taken from the words of ``name``."""
+    words = (name or '').split()
+    return ''.join(word[0].upper() for word in words if word)[:4]
+
+
+class DepartmentField(serializers.RelatedField):
+    """
+    A department foreign key exposed by name.
+
+    Reads give the department's name (``''`` for none); writes accept a
+    name, matched case-insensitively. Validation never writes: a new name
+    becomes an unsaved ``Department`` that ``save_new_departments`` creates
+    when the serializer saves (see ``DepartmentSaveMixin``), unless
+    ``allow_create`` is false, in which case it is an error. Names looked
+    up once are remembered by the field, so a bulk import looks each
+    department up only once.
+    """
+
+    default_error_messages = {
+        'invalid': 'Department must be a name.',
+        'max_length': 'Department names are limited to {max_length} characters.',
+        'does_not_exist': 'Department "{name}" does not exist.',
+    }
+
+    def __init__(self, allow_create=True, **kwargs):
+        if not kwargs.get('read_only'):
+            kwargs.setdefault('queryset', Department.objects.all())
+            kwargs.setdefault('required', False)
+            kwargs.setdefault('allow_null', True)
+        super().__init__(**kwargs)
+        self.allow_create = allow_create
+        self._resolved = {}
+
+    def get_attribute(self, instance):
+        return super().get_attribute(instance) or ''
+
+    def to_representation(self, value):
+        return value.name if isinstance(value, Department) else value
+
+    def to_internal_value(self, data):
+        if not isinstance(data, str):
+            self.fail('invalid')
+        name = normalize_department_name(data)
+        max_length = Department._meta.get_field('name').max_length
+        if len(name) > max_length:
+            self.fail('max_length', max_length=max_length)
+        if not name:
+            return None
+        key = department_key(name)
+        if key not in self._resolved:
+            self._resolved[key] = self.get_queryset().filter(name__iexact=name).first() or Department(name=name)
+        department = self._resolved[key]
+        if department.pk is None and not self.allow_create:
+            self.fail('does_not_exist', name=name)
+        return department
+
+
+def save_new_departments(data):
+    """
+    Create the departments named in ``data`` that do not exist yet; returns ``data``.
+
+    Values of ``data`` that are unsaved departments (from ``DepartmentField``)
+    are replaced with the stored department of that name. The unsaved
+    instances themselves are left untouched, so a rolled back transaction
+    leaves nothing pointing at a department that was never committed.
+    """
+    for name, value in data.items():
+        if isinstance(value, Department) and value.pk is None:
+            data[name] = Department.resolve(value.name)
+    return data
+
+
+class DepartmentSaveMixin:
+    """Creates the new departments a serializer's data names in the same transaction as the save."""
+
+    def save(self, **kwargs):
+        with transaction.atomic():
+            save_new_departments(self.validated_data)
+            return super().save(**kwargs)
+
+
+class DepartmentSerializer(serializers.ModelSerializer):
+    """Serializer for Department model."""
+
+    class Meta:
+        model = Department
+        fields = ['id', 'name', 'created_at', 'updated_at']
+        read_only_fields = ['id', 'created_at', 'updated_at']
+
+    def validate_name(self, value):
+        name = normalize_department_name(value)
+        if not name:
+            raise serializers.ValidationError('This field may not be blank.')
+        departments = Department.objects.filter(name__iexact=name)
+        if self.instance is not None:
+            departments = departments.exclude(pk=self.instance.pk)
+        if departments.exists():
+            raise serializers.ValidationError('A department with this name already exists.')
+        return name
+
+
+class EmployeeSerializer(DepartmentSaveMixin, serializers.ModelSerializer):
     """Serializer for Employee model."""
 
+    department = DepartmentField()
+
     class Meta:
         model = Employee
         fields = [
@@ -15,9 +121,11 @@ class EmployeeSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'created_at', 'updated_at']
 
 
-class EmployeeCreateSerializer(serializers.ModelSerializer):
+class EmployeeCreateSerializer(DepartmentSaveMixin, serializers.ModelSerializer):
     """Serializer for creating employees."""
 
+    department = DepartmentField()
+
     class Meta:
         model = Employee
         fields = [
@@ -26,17 +134,26 @@ class EmployeeCreateSerializer(serializers.ModelSerializer):
         ]
 
     def create(self, validated_data):
-        # Generate initials from name
-        name = validated_data.get('name', '')
-        words = name.split()
-        initials = ''.join(word[0].upper() for word in words if word)[:4]
-        validated_data['initials'] = initials
+        validated_data['initials'] = generate_initials(validated_data.get('name', ''))
         return super().create(validated_data)
 
 
-class EmployeeListSerializer(serializers.ModelSerializer):
+class EmployeeImportSerializer(EmployeeCreateSerializer):
+    """Row-level validation for bulk imports.
+
+    Email uniqueness is checked once per batch by the importer instead of
+    with one query per row.
+    """
+
+    class Meta(EmployeeCreateSerializer.Meta):
+        extra_kwargs = {'email': {'validators': []}}
+
+
+class EmployeeListSerializer(DepartmentSaveMixin, serializers.ModelSerializer):
     """Lightweight serializer for employee lists."""
 
+    department = DepartmentField()
+
     class Meta:
         model = Employee
         fields = [
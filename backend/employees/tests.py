@@ -1,3 +1,172 @@
-from django.test import TestCase
+from datetime import date, timedelta
 
-# Create your tests here.
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TransactionTestCase
+from django.utils import timezone
+
+from api.testing import AuthenticatedAPITestCase
+from attendance.models import AttendanceRecord, LeaveRequest
+from performance.models import KPI, Goal, PerformanceReview
+from .importers import EmployeeImporter
+from .models import Department, Employee
+
+
+class DepartmentTests(AuthenticatedAPITestCase):
+    """Departments are matched by name and only created when a row is saved."""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.sales = Department.objects.create(name='Sales')
+
+    def test_duplicate_department_name_is_rejected(self):
+        response = self.client.post('/api/employees/departments/', {'name': ' sales '}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('name', response.data)
+        response = self.client.post('/api/employees/departments/', {'name': 'Sales  Team'}, format='json')
+        self.assertEqual((response.status_code, response.data['name']), (201, 'Sales Team'))
+
+    def test_employee_department_is_matched_or_created_on_save(self):
+        response = self.client.post('/api/employees/', {
+            'name': 'Ann', 'email': 'ann@example.com', 'department': 'SALES',
+        }, format='json')
+        self.assertEqual((response.status_code, response.data['department']), (201, 'Sales'))
+        response = self.client.post('/api/employees/', {
+            'name': 'Ben', 'email': 'ben@example.com', 'department': 'Support',
+        }, format='json')
+        self.assertEqual((response.status_code, response.data['department']), (201, 'Support'))
+        self.assertEqual(Employee.objects.get(email='ben@example.com').department.name, 'Support')
+
+    def test_invalid_rows_create_no_department(self):
+        response = self.client.post('/api/employees/', {
+            'name': 'Ann', 'email': 'not-an-email', 'department': 'Marketing',
+        }, format='json')
+        self.assertEqual(response.status_code, 400)
+        result = EmployeeImporter().run([
+            {'name': 'Ann', 'email': 'bad', 'department': 'Legal'},
+            {'name': 'Ben', 'email': 'ben@example.com', 'department': 'Finance'},
+            {'name': 'Cid', 'email': 'cid@example.com', 'department': ' finance'},
+        ])
+        self.assertEqual((result['created'], result['failed']), (2, 1))
+        self.assertEqual(list(Department.objects.values_list('name', flat=True)), ['Finance', 'Sales'])
+
+    def test_filter_by_department_name(self):
+        employee = Employee.objects.create(name='Ann', email='ann@example.com', department=self.sales)
+        Employee.objects.create(name='Ben', email='ben@example.com')
+        record = AttendanceRecord.objects.create(employee=employee, date=date(2025, 1, 6))
+        for value in ('sales', str(self.sales.pk)):
+            response = self.client.get(f'/api/attendance/attendance-records/?department={value}')
+            self.assertEqual([row['id'] for row in response.data['results']], [record.pk])
+
+
+class EmployeeImportTests(AuthenticatedAPITestCase):
+    """CSV uploads are imported, and unreadable files are rejected."""
+
+    def upload(self, content):
+        return self.client.post(
+            '/api/employees/import/', {'file': SimpleUploadedFile('employees.csv', content, 'text/csv')},
+            format='multipart'
+        )
+
+    def test_csv_upload(self):
+        response = self.upload(b'\xef\xbb\xbfname,email,department\nAnn,ann@example.com,Sales\nBen,bad,\n')
+        self.assertEqual((response.status_code, response.data['created'], response.data['failed']), (201, 1, 1))
+
+    def test_unreadable_file_is_rejected(self):
+        for content in (b'name,email\n\xff\xfeAnn,ann@example.com\n', b'name,email\n' + b'x' * 200000 + b',a\n'):
+            response = self.upload(content)
+            self.assertEqual(response.status_code, 400, content[:40])
+            self.assertIn('error', response.data)
+
+
+class EmployeeProfileTests(AuthenticatedAPITestCase):
+    """The profile takes a fixed number of queries and its ETag follows every name it shows."""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.sales = Department.objects.create(name='Sales')
+        cls.reviewer = Employee.objects.create(name='Reviewer', email='reviewer@example.com')
+        cls.employee = Employee.objects.create(name='Ann', email='ann@example.com', department=cls.sales)
+        today = timezone.now().date()
+        for days in range(10):
+            day = today - timedelta(days=days)
+            AttendanceRecord.objects.create(employee=cls.employee, date=day, status='Present')
+            PerformanceReview.objects.create(
+                employee=cls.employee, reviewer=cls.reviewer, review_type='Annual', review_date=day,
+                review_period_start=day, review_period_end=day, overall_score=80, overall_rating='Good'
+            )
+            Goal.objects.create(
+                employee=cls.employee, title=f'Goal {days}', description='', start_date=day,
+                target_completion_date=today + timedelta(days=30)
+            )
+            KPI.objects.create(
+                employee=cls.employee, title=f'KPI {days}', description='', category='Productivity',
+                target_value=100, current_value=50, period_start=day, period_end=today + timedelta(days=30)
+            )
+            LeaveRequest.objects.create(
+                employee=cls.employee, leave_type='Annual', start_date=today + timedelta(days=days + 1),
+                end_date=today + timedelta(days=days + 1), days_requested=1, reason='Rest'
+            )
+
+    def setUp(self):
+        super().setUp()
+        self.url = f'/api/employees/{self.employee.pk}/profile/'
+
+    def test_profile_queries(self):
+        with self.assertNumQueries(6):
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['reviews']), 5)
+        self.assertEqual(response.data['attendance']['total_records'], 10)
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_etag_changes_with_department_and_reviewer_names(self):
+        etag = self.client.get(self.url)['ETag']
+        for instance, name in [(self.sales, 'Field Sales'), (self.reviewer, 'Lead Reviewer')]:
+            instance.name = name
+            instance.save()
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, 200, name)
+            self.assertNotEqual(response['ETag'], etag)
+            etag = response['ETag']
+        self.assertEqual(response.data['employee']['department'], 'Field Sales')
+        self.assertEqual(response.data['reviews'][0]['reviewer_name'], 'Lead Reviewer')
+
+
+class DepartmentMigrationTests(TransactionTestCase):
+    """The migration to a Department table merges spellings of the same name."""
+
+    before = [('employees', '0002_employee_employees_e_name_4c04dd_idx')]
+    after = [('employees', '0004_department')]
+
+    def setUp(self):
+        self.executor = MigrationExecutor(connection)
+        self.executor.migrate(self.before)
+        self.addCleanup(self.migrate_to_latest)
+
+    def migrate_to_latest(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(executor.loader.graph.leaf_nodes())
+
+    def test_department_spellings_are_merged(self):
+        Employee = self.executor.loader.project_state(self.before).apps.get_model('employees', 'Employee')
+        for index, name in enumerate(['Sales', 'sales ', ' Sales', 'Sales  Team', '']):
+            Employee.objects.create(name=f'Employee {index}', email=f'employee{index}@example.com', department=name)
+
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.after)
+        apps = executor.loader.project_state(self.after).apps
+        self.assertEqual(
+            sorted(apps.get_model('employees', 'Department').objects.values_list('name', flat=True)),
+            ['Sales', 'Sales Team']
+        )
+        Employee = apps.get_model('employees', 'Employee')
+        self.assertEqual(
+            list(Employee.objects.order_by('name').values_list('department__name', flat=True)),
+            ['Sales', 'Sales', 'Sales', 'Sales Team', None]
+        )
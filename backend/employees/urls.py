@@ -1,7 +1,13 @@
 from django.urls import path
-from .views import EmployeeListCreateView, EmployeeRetrieveUpdateDestroyView
+from .views import (
+    DepartmentListCreateView, EmployeeListCreateView, EmployeeRetrieveUpdateDestroyView, EmployeeBulkImportView,
+    EmployeeProfileView
+)
 
 urlpatterns = [
     path('', EmployeeListCreateView.as_view(), name='employee-list'),
+    path('departments/', DepartmentListCreateView.as_view(), name='department-list'),
+    path('import/', EmployeeBulkImportView.as_view(), name='employee-import'),
     path('<int:pk>/', EmployeeRetrieveUpdateDestroyView.as_view(), name='employee-detail'),
+    path('<int:pk>/profile/', EmployeeProfileView.as_view(), name='employee-profile'),
 ]
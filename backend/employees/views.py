@@ -1,18 +1,126 @@
-from rest_framework import generics
+import csv
+
+from django.utils import timezone
+from django.utils.http import parse_etags, quote_etag
+from rest_framework import generics, status
+from rest_framework.exceptions import NotFound
+from rest_framework.parsers import JSONParser, MultiPartParser
 from rest_framework.permissions import IsAuthenticated
-from .models import Employee
-from .serializers import EmployeeSerializer
+from rest_framework.response import Response
+from attendance.serializers import LeaveRequestSerializer
+from performance.serializers import GoalSerializer, KPISerializer, PerformanceReviewSerializer
+from .importers import EmployeeImporter, parse_csv
+from .models import Department, Employee
+from .profiles import build_profile, profile_state
+from .serializers import DepartmentSerializer, EmployeeSerializer
+
+DEFAULT_PROFILE_REVIEWS = 5
+MAX_PROFILE_REVIEWS = 50
+
+
+class DepartmentListCreateView(generics.ListCreateAPIView):
+    queryset = Department.objects.all()
+    serializer_class = DepartmentSerializer
+    permission_classes = [IsAuthenticated]
 
 
 class EmployeeListCreateView(generics.ListCreateAPIView):
-    queryset = Employee.objects.all()
+    queryset = Employee.objects.select_related('department')
     serializer_class = EmployeeSerializer
     permission_classes = [IsAuthenticated]
 
 
 class EmployeeRetrieveUpdateDestroyView(generics.RetrieveUpdateDestroyAPIView):
-    queryset = Employee.objects.all()
+    queryset = Employee.objects.select_related('department')
     serializer_class = EmployeeSerializer
     permission_classes = [IsAuthenticated]
 
-# Create your views here.
+
+class EmployeeBulkImportView(generics.GenericAPIView):
+    """
+    Bulk employee import.
+
+    Accepts a JSON array of employee objects, or a multipart upload with a
+    CSV ``file`` (header row matching the field names). ``batch_size`` may be
+    passed as a query parameter to tune the ``bulk_create`` batch size.
+    """
+
+    queryset = Employee.objects.all()
+    permission_classes = [IsAuthenticated]
+    parser_classes = [JSONParser, MultiPartParser]
+
+    def post(self, request):
+        if 'file' in request.FILES:
+            try:
+                rows = parse_csv(request.FILES['file'])
+            except (UnicodeDecodeError, csv.Error) as exc:
+                return Response(
+                    {'error': f'The file is not a readable UTF-8 CSV file: {exc}'}, status=status.HTTP_400_BAD_REQUEST
+                )
+        elif isinstance(request.data, list):
+            rows = request.data
+        else:
+            return Response(
+                {'error': 'Expected a JSON array of employees or a CSV file upload.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            batch_size = int(request.query_params.get('batch_size', 0)) or None
+        except ValueError:
+            return Response({'error': 'batch_size must be an integer.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        result = EmployeeImporter(batch_size=batch_size).run(rows)
+        response_status = status.HTTP_201_CREATED if result['created'] else status.HTTP_400_BAD_REQUEST
+        return Response(result, status=response_status)
+
+
+class EmployeeProfileView(generics.GenericAPIView):
+    """
+    Everything the employee page shows, in one response.
+
+    Returns the employee, the latest ``reviews`` (default 5) performance
+    reviews, active and overdue goals, KPIs whose period includes today
+    (with ``achievement``), attendance statistics for the last 30 days and
+    pending leave requests, in a fixed number of queries. Responses carry
+    an ETag; a request whose ``If-None-Match`` still matches gets a 304
+    after a single query.
+    """
+
+    queryset = Employee.objects.all()
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, pk):
+        try:
+            reviews = int(request.query_params.get('reviews', DEFAULT_PROFILE_REVIEWS))
+        except ValueError:
+            return Response({'error': 'reviews must be an integer.'}, status=status.HTTP_400_BAD_REQUEST)
+        if not 1 <= reviews <= MAX_PROFILE_REVIEWS:
+            return Response(
+                {'error': f'reviews must be between 1 and {MAX_PROFILE_REVIEWS}.'}, status=status.HTTP_400_BAD_REQUEST
+            )
+
+        today = timezone.now().date()
+        employee, etag = profile_state(pk, today, reviews)
+        if employee is None:
+            raise NotFound()
+        headers = {'ETag': quote_etag(etag), 'Cache-Control': 'private, no-cache'}
+        if_none_match = parse_etags(request.headers.get('If-None-Match', ''))
+        if headers['ETag'] in if_none_match or '*' in if_none_match:
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+        attendance = build_profile(employee, today, reviews)
+        context = self.get_serializer_context()
+        return Response({
+            'employee': EmployeeSerializer(employee, context=context).data,
+            'reviews': PerformanceReviewSerializer(employee.profile_reviews, many=True, context=context).data,
+            'goals': GoalSerializer(employee.profile_goals, many=True, context=context).data,
+            'kpis': [
+                {**data, 'achievement': round(float(kpi.achievement), 2)}
+                for kpi, data in zip(
+                    employee.profile_kpis, KPISerializer(employee.profile_kpis, many=True, context=context).data
+                )
+            ],
+            'attendance': attendance,
+            'pending_leave': LeaveRequestSerializer(employee.profile_pending_leave, many=True, context=context).data,
+        }, headers=headers)
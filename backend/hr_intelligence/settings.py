@@ -161,7 +161,10 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
+    'DEFAULT_FILTER_BACKENDS': [
+        'api.filters.QueryParamFilterBackend',
+    ],
+    'DEFAULT_PAGINATION_CLASS': 'api.pagination.HybridPagination',
     'PAGE_SIZE': 20,
 }
 
@@ -220,3 +223,44 @@ CSRF_TRUSTED_ORIGINS = [
 
 # Custom User Model
 AUTH_USER_MODEL = 'users.User'
+
+# Bulk employee import: rows per bulk_create batch
+EMPLOYEE_IMPORT_BATCH_SIZE = config('EMPLOYEE_IMPORT_BATCH_SIZE', default=1000, cast=int)
+
+# Attendance table partitioning (PostgreSQL only)
+ATTENDANCE_PARTITIONING = config('ATTENDANCE_PARTITIONING', default=False, cast=bool)
+ATTENDANCE_RETENTION_MONTHS = config('ATTENDANCE_RETENTION_MONTHS', default=24, cast=int)
+ATTENDANCE_ARCHIVE_DIR = config('ATTENDANCE_ARCHIVE_DIR', default=str(BASE_DIR / 'archive' / 'attendance'))
+
+# Leave accrual granted by the accrue_leave command, in days per run per leave type
+LEAVE_ACCRUAL_DAYS = {
+    'Annual': config('LEAVE_ACCRUAL_ANNUAL_DAYS', default=1.75, cast=float),
+    'Sick': config('LEAVE_ACCRUAL_SICK_DAYS', default=1.0, cast=float),
+}
+
+# Largest share of a department that may be on approved leave on the same day
+# before approvals need ``force`` (1.0 = no limit)
+LEAVE_MAX_DEPARTMENT_ABSENCE = config('LEAVE_MAX_DEPARTMENT_ABSENCE', default=1.0, cast=float)
+
+# Uploaded and generated files (reports)
+MEDIA_URL = 'media/'
+MEDIA_ROOT = config('MEDIA_ROOT', default=str(BASE_DIR / 'media'))
+
+# Report generation: background worker threads (0 = generate inline) and rows
+# fetched per database round trip while streaming a report
+REPORT_WORKERS = config('REPORT_WORKERS', default=2, cast=int)
+REPORT_CHUNK_SIZE = config('REPORT_CHUNK_SIZE', default=2000, cast=int)
+# A report left Queued or Generating this long (minutes) is taken to have lost
+# its worker and may be queued again; keep it above the slowest report's run
+REPORT_STALE_MINUTES = config('REPORT_STALE_MINUTES', default=30, cast=int)
+# Generated report files are shared between identical reports; the least
+# recently used ones are deleted once they take more than this many bytes
+REPORT_CACHE_MAX_BYTES = config('REPORT_CACHE_MAX_BYTES', default=1024 ** 3, cast=int)
+
+# Leave calendar responses are cached per range/department until leave changes,
+# and for at most this long (the version key lives in the default cache)
+LEAVE_CALENDAR_CACHE_SECONDS = config('LEAVE_CALENDAR_CACHE_SECONDS', default=300, cast=int)
+
+# Finished performance trend buckets are cached until their reviews change,
+# and for at most this long
+PERFORMANCE_TREND_CACHE_SECONDS = config('PERFORMANCE_TREND_CACHE_SECONDS', default=86400, cast=int)
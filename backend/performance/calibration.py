@@ -0,0 +1,243 @@
+"""
+Review score distributions for calibration.
+
+``calibration_report`` loads the scores of a set of reviews with one
+``values_list`` query into NumPy arrays (missing sub-scores become NaN)
+and computes, for ``overall_score`` and each sub-score:
+
+* the org-wide histogram (10-point bins), mean, standard deviation and
+  percentiles;
+* the same statistics per department and per reviewer: counts, sums and
+  histograms from ``np.bincount`` over group codes, percentiles from one
+  sort of the scores by group;
+* z-scores of every score against the org distribution of its column,
+  with the reviews beyond the threshold on any column listed as outliers;
+* reviewer leniency: the average gap between a reviewer's overall scores
+  and the mean of the reviewee's department, with a z-score telling
+  consistent bias from noise.
+
+Reports are cached until the next review, employee or department is saved
+or deleted, since they carry employee and department names.
+"""
+import hashlib
+import uuid
+
+import numpy as np
+from django.core.cache import cache
+
+SCORE_FIELDS = ('overall_score', 'technical_skills', 'communication', 'teamwork', 'leadership', 'initiative')
+
+PERCENTILES = (10, 25, 50, 75, 90)
+
+HISTOGRAM_BINS = np.arange(0, 101, 10)
+
+CALIBRATION_VERSION_KEY = 'performance:calibration-version'
+
+
+def calibration_version():
+    """Token that changes whenever reviews change; part of report cache keys."""
+    version = cache.get(CALIBRATION_VERSION_KEY)
+    if version is None:
+        version = uuid.uuid4().hex
+        cache.add(CALIBRATION_VERSION_KEY, version, None)
+        version = cache.get(CALIBRATION_VERSION_KEY, version)
+    return version
+
+
+def invalidate_calibration():
+    cache.set(CALIBRATION_VERSION_KEY, uuid.uuid4().hex, None)
+
+
+def _number(value, digits=2):
+    """Round for JSON; NaN (no data) becomes ``None``."""
+    value = float(value)
+    return None if np.isnan(value) else round(value, digits)
+
+
+def distribution(values):
+    """Histogram, mean, spread and percentiles of one score column (NaNs ignored)."""
+    present = values[~np.isnan(values)]
+    if not present.size:
+        return {'count': 0, 'mean': None, 'std': None, 'percentiles': None, 'histogram': None}
+    counts, _ = np.histogram(present, bins=HISTOGRAM_BINS)
+    return {
+        'count': int(present.size),
+        'mean': _number(present.mean()),
+        'std': _number(present.std()),
+        'percentiles': dict(zip(map(str, PERCENTILES), (_number(p) for p in np.percentile(present, PERCENTILES)))),
+        'histogram': counts.tolist(),
+    }
+
+
+def group_statistics(codes, size, scores):
+    """Per-group count, mean and standard deviation of every score column.
+
+    ``codes`` maps each review to a group index below ``size``; ``scores``
+    is a ``(reviews, fields)`` array. Returns three ``(size, fields)``
+    arrays; groups without scores have NaN mean and deviation.
+    """
+    present = ~np.isnan(scores)
+    filled = np.where(present, scores, 0.0)
+    counts = np.stack([np.bincount(codes, present[:, i], size) for i in range(scores.shape[1])], axis=1)
+    sums = np.stack([np.bincount(codes, filled[:, i], size) for i in range(scores.shape[1])], axis=1)
+    squares = np.stack([np.bincount(codes, filled[:, i] ** 2, size) for i in range(scores.shape[1])], axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        means = sums / counts
+        stds = np.sqrt(np.maximum(squares / counts - means ** 2, 0))
+    return counts, means, stds
+
+
+def group_histograms(codes, size, values):
+    """``(size, bins)`` histogram counts of one score column per group, with ``distribution``'s bins."""
+    present = ~np.isnan(values)
+    present[present] = (values[present] >= HISTOGRAM_BINS[0]) & (values[present] <= HISTOGRAM_BINS[-1])
+    width = len(HISTOGRAM_BINS) - 1
+    bins = np.minimum(np.searchsorted(HISTOGRAM_BINS, values[present], side='right') - 1, width - 1)
+    return np.bincount(codes[present] * width + bins, minlength=size * width).reshape(size, width)
+
+
+def group_percentiles(codes, size, values):
+    """
+    ``(size, len(PERCENTILES))`` percentiles of one score column per group.
+
+    The scores are sorted once by group and value; each group's
+    percentiles are then interpolated between neighbouring ranks as
+    ``np.percentile`` does. Groups without scores get NaN.
+    """
+    present = ~np.isnan(values)
+    codes, values = codes[present], values[present]
+    result = np.full((size, len(PERCENTILES)), np.nan)
+    if not values.size:
+        return result
+    values = values[np.lexsort((values, codes))]
+    counts = np.bincount(codes, minlength=size)
+    starts = np.cumsum(counts) - counts
+    positions = (counts[:, None] - 1) * (np.array(PERCENTILES) / 100)
+    lower = np.floor(positions).astype(int)
+    upper = np.minimum(lower + 1, counts[:, None] - 1)
+    fraction = positions - lower
+    filled = counts > 0
+    low = values[(starts[:, None] + lower)[filled]]
+    high = values[(starts[:, None] + upper)[filled]]
+    result[filled] = low + (high - low) * fraction[filled]
+    return result
+
+
+def group_report(labels, codes, scores):
+    """Per-group count, mean, deviation, percentiles and histogram of every score column, as ``distribution``."""
+    size = len(labels)
+    counts, means, stds = group_statistics(codes, size, scores)
+    percentiles = [group_percentiles(codes, size, scores[:, column]) for column in range(scores.shape[1])]
+    histograms = [group_histograms(codes, size, scores[:, column]) for column in range(scores.shape[1])]
+    return [
+        {
+            'name': label,
+            'reviews': int(counts[index, 0]),
+            'scores': {
+                field: {
+                    'count': int(counts[index, column]),
+                    'mean': _number(means[index, column]),
+                    'std': _number(stds[index, column]),
+                    'percentiles': dict(zip(map(str, PERCENTILES), map(_number, percentiles[column][index])))
+                    if counts[index, column] else None,
+                    'histogram': histograms[column][index].tolist() if counts[index, column] else None,
+                }
+                for column, field in enumerate(SCORE_FIELDS)
+            },
+        }
+        for index, label in enumerate(labels)
+    ]
+
+
+def calibration_report(reviews, z_threshold=2.0):
+    """Distributions, group statistics, outliers and reviewer bias for ``reviews``."""
+    rows = list(reviews.order_by().values_list(
+        'id', 'employee_id', 'employee__name', 'employee__department__name',
+        'reviewer_id', 'reviewer__name', *SCORE_FIELDS
+    ))
+    report = {
+        'reviews': len(rows),
+        'distributions': {},
+        'departments': [],
+        'reviewers': [],
+        'outliers': [],
+        'z_threshold': z_threshold,
+    }
+    if not rows:
+        return report
+
+    ids, employee_ids, employee_names, departments, reviewer_ids, reviewer_names, *columns = zip(*rows)
+    scores = np.array(
+        [[np.nan if value is None else value for value in column] for column in columns], dtype=float
+    ).T
+    overall = scores[:, 0]
+
+    report['distributions'] = {field: distribution(scores[:, i]) for i, field in enumerate(SCORE_FIELDS)}
+
+    department_labels, department_codes = np.unique(
+        np.array([name or '' for name in departments], dtype=object), return_inverse=True
+    )
+    report['departments'] = group_report(department_labels.tolist(), department_codes, scores)
+
+    # z-scores of every column against its org-wide distribution (NaN where missing).
+    present = ~np.isnan(scores)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        means = np.where(present, scores, 0.0).sum(axis=0) / present.sum(axis=0)
+        stds = np.sqrt(np.where(present, (scores - means) ** 2, 0.0).sum(axis=0) / present.sum(axis=0))
+        z = np.where(stds > 0, (scores - means) / stds, np.where(present, 0.0, np.nan))
+    extreme = np.abs(np.nan_to_num(z)) >= z_threshold
+    flagged = np.flatnonzero(extreme.any(axis=1))
+    peaks = np.nanmax(np.abs(z[flagged]), axis=1) if flagged.size else np.array([])
+    report['outliers'] = [
+        {
+            'review': ids[i],
+            'employee': employee_ids[i],
+            'employee_name': employee_names[i],
+            'department': departments[i] or '',
+            'reviewer': reviewer_ids[i],
+            'overall_score': int(overall[i]),
+            'z_score': _number(z[i, 0]),
+            'z_scores': {field: _number(z[i, column]) for column, field in enumerate(SCORE_FIELDS)},
+            'flagged': [field for column, field in enumerate(SCORE_FIELDS) if extreme[i, column]],
+        }
+        for i in flagged[np.argsort(-peaks, kind='stable')]
+    ]
+    std = stds[0]
+
+    # Reviewer leniency: gap to the reviewee's department mean.
+    reviewed = np.array([reviewer is not None for reviewer in reviewer_ids])
+    if reviewed.any():
+        reviewer_keys = np.array([reviewer or 0 for reviewer in reviewer_ids])
+        reviewer_labels, reviewer_codes = np.unique(reviewer_keys[reviewed], return_inverse=True)
+        names = dict(zip(reviewer_ids, reviewer_names))
+        department_means = group_statistics(department_codes, len(department_labels), scores[:, :1])[1][:, 0]
+        gaps = (overall - department_means[department_codes])[reviewed]
+        counts = np.bincount(reviewer_codes, minlength=len(reviewer_labels))
+        bias = np.bincount(reviewer_codes, gaps, len(reviewer_labels)) / counts
+        with np.errstate(invalid='ignore', divide='ignore'):
+            bias_z = bias / (std / np.sqrt(counts)) if std else np.zeros_like(bias)
+        statistics = group_report([names[key] for key in reviewer_labels.tolist()], reviewer_codes, scores[reviewed])
+        for index, entry in enumerate(statistics):
+            entry.update({
+                'id': int(reviewer_labels[index]),
+                'bias': _number(bias[index]),
+                'bias_z': _number(bias_z[index]),
+                'leniency': (
+                    'lenient' if bias_z[index] >= z_threshold
+                    else 'severe' if bias_z[index] <= -z_threshold
+                    else 'neutral'
+                ),
+            })
+        report['reviewers'] = sorted(statistics, key=lambda entry: -abs(entry['bias'] or 0))
+    return report
+
+
+def cached_calibration_report(reviews, z_threshold, key):
+    """``calibration_report`` cached under ``key`` (e.g. the request's filters) until reviews change."""
+    digest = hashlib.sha1(f'{key}:{z_threshold}'.encode()).hexdigest()
+    cache_key = f'performance:calibration:{calibration_version()}:{digest}'
+    report = cache.get(cache_key)
+    if report is None:
+        report = calibration_report(reviews, z_threshold)
+        cache.set(cache_key, report, None)
+    return report
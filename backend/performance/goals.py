@@ -0,0 +1,97 @@
+"""
+Goal status changes.
+
+Every status change goes through ``transition`` (many goals, one
+``UPDATE``) or ``transition_goal`` (one goal), which enforce
+``TRANSITIONS`` and write only the columns that change. Completing a goal
+stamps ``actual_completion_date``; making it active again clears the date.
+
+``mark_overdue`` is the scheduled sweep moving active goals past their
+target date to Overdue. It runs batched ``UPDATE ... WHERE id IN (SELECT
+... LIMIT n)`` statements served by the ``(status,
+target_completion_date)`` index, so no goal is loaded into Python.
+"""
+from django.db.models import Subquery
+from django.utils import timezone
+
+from .models import Goal
+
+Status = Goal.GoalStatus
+
+# Allowed moves: current status -> statuses it may change to.
+TRANSITIONS = {
+    Status.DRAFT: {Status.ACTIVE, Status.CANCELLED},
+    Status.ACTIVE: {Status.COMPLETED, Status.OVERDUE, Status.CANCELLED},
+    Status.OVERDUE: {Status.ACTIVE, Status.COMPLETED, Status.CANCELLED},
+    Status.COMPLETED: {Status.ACTIVE},
+    Status.CANCELLED: {Status.DRAFT, Status.ACTIVE},
+}
+
+SWEEP_BATCH_SIZE = 10000
+
+
+class InvalidTransition(ValueError):
+    pass
+
+
+def can_transition(current, status):
+    return status == current or status in TRANSITIONS.get(current, ())
+
+
+def status_changes(status):
+    """Columns set alongside ``status``."""
+    changes = {'status': status, 'updated_at': timezone.now()}
+    if status == Status.COMPLETED:
+        changes['actual_completion_date'] = timezone.now().date()
+    elif status == Status.ACTIVE:
+        changes['actual_completion_date'] = None
+    return changes
+
+
+def transition(goals, status, **changes):
+    """
+    Move the goals in ``goals`` that may change to ``status`` there, with one ``UPDATE``.
+
+    Goals whose current status does not allow the move are left alone.
+    ``changes`` are extra columns to set. Returns the number of goals moved.
+    """
+    sources = [current for current, targets in TRANSITIONS.items() if status in targets]
+    return goals.filter(status__in=sources).update(**status_changes(status), **changes)
+
+
+def transition_goal(goal, status=None, **changes):
+    """
+    Apply ``status`` (default: unchanged) and ``changes`` to ``goal``.
+
+    Raises ``InvalidTransition`` if the status change is not allowed. Only
+    columns whose value differs are written, guarded by the status the
+    goal was read with; returns ``False`` if a concurrent change won.
+    ``goal`` is updated in place.
+    """
+    status = status or goal.status
+    if not can_transition(goal.status, status):
+        raise InvalidTransition(f'A {goal.status} goal cannot become {status}.')
+    if status != goal.status:
+        changes = {**status_changes(status), **changes}
+    changed = {field: value for field, value in changes.items() if getattr(goal, field) != value}
+    if not changed:
+        return True
+    changed.setdefault('updated_at', timezone.now())
+    updated = Goal.objects.filter(pk=goal.pk, status=goal.status).update(**changed)
+    if updated:
+        for field, value in changed.items():
+            setattr(goal, field, value)
+    return bool(updated)
+
+
+def mark_overdue(today=None, batch_size=SWEEP_BATCH_SIZE):
+    """Move every Active goal whose target date is before ``today`` to Overdue; returns the count."""
+    today = today or timezone.now().date()
+    due = Goal.objects.filter(status=Status.ACTIVE, target_completion_date__lt=today).order_by()
+    total = 0
+    while True:
+        batch = Subquery(due.values('pk')[:batch_size])
+        updated = transition(Goal.objects.filter(pk__in=batch), Status.OVERDUE)
+        total += updated
+        if updated < batch_size:
+            return total
@@ -0,0 +1,36 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from performance.goals import SWEEP_BATCH_SIZE, mark_overdue
+
+
+class Command(BaseCommand):
+    help = 'Move Active goals whose target completion date has passed to Overdue.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date', help='Goals due before this day are overdue (YYYY-MM-DD). Defaults to today.')
+        parser.add_argument(
+            '--batch-size', type=int, default=SWEEP_BATCH_SIZE,
+            help=f'Goals updated per statement (default {SWEEP_BATCH_SIZE}).'
+        )
+
+    def handle(self, *args, **options):
+        if options['date']:
+            try:
+                day = parse_date(options['date'])
+            except ValueError:
+                day = None
+            if day is None:
+                raise CommandError('--date must be a date in YYYY-MM-DD format.')
+        else:
+            day = timezone.now().date()
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be positive.')
+
+        started = time.monotonic()
+        updated = mark_overdue(day, options['batch_size'])
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(f'Marked {updated} goal(s) overdue as of {day} in {elapsed:.1f}s.'))
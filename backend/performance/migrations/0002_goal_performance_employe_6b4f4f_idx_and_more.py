@@ -0,0 +1,58 @@
+# Generated by Django 5.2.18 on 2026-10-17 22:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employees', '0003_employee_employees_e_departm_e28f46_idx'),
+        ('performance', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='goal',
+            index=models.Index(fields=['employee', 'status'], name='performance_employe_6b4f4f_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='goal',
+            index=models.Index(fields=['status', '-created_at'], name='performance_status_d2ac16_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='goal',
+            index=models.Index(fields=['goal_type', 'status'], name='performance_goal_ty_a028a1_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='kpi',
+            index=models.Index(fields=['-period_end'], name='performance_period__954f3e_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='kpi',
+            index=models.Index(fields=['period_start', 'period_end'], name='performance_period__bb4719_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='kpi',
+            index=models.Index(fields=['employee', '-period_end'], name='performance_employe_81c84c_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='kpi',
+            index=models.Index(fields=['category', '-period_end'], name='performance_categor_e02a07_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='performancereview',
+            index=models.Index(fields=['-review_date'], name='performance_review__a3a1db_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='performancereview',
+            index=models.Index(fields=['employee', '-review_date'], name='performance_employe_4a1cd5_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='performancereview',
+            index=models.Index(fields=['review_type', '-review_date'], name='performance_review__9fa8b4_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='performancereview',
+            index=models.Index(fields=['is_completed', '-review_date'], name='performance_is_comp_254ae0_idx'),
+        ),
+    ]
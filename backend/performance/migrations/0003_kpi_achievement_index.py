@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-17 22:56
+
+import django.db.models.expressions
+import django.db.models.functions.comparison
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employees', '0004_department'),
+        ('performance', '0002_goal_performance_employe_6b4f4f_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='kpi',
+            index=models.Index(models.Case(models.When(target_value=0, then=models.Value(Decimal('0'))), default=django.db.models.functions.comparison.Least(django.db.models.expressions.CombinedExpression(django.db.models.expressions.CombinedExpression(models.F('current_value'), '*', models.Value(100)), '/', models.F('target_value')), models.Value(Decimal('100'))), output_field=models.DecimalField(decimal_places=2, max_digits=12)), name='kpi_achievement_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 23:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employees', '0004_department'),
+        ('performance', '0003_kpi_achievement_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='goal',
+            index=models.Index(fields=['status', 'target_completion_date'], name='performance_status_e4e3a4_idx'),
+        ),
+    ]
@@ -1,9 +1,22 @@
+from decimal import Decimal
+
 from django.db import models
+from django.db.models import Case, F, Value, When
+from django.db.models.functions import Least
 from django.utils.translation import gettext_lazy as _
 from django.core.validators import MinValueValidator, MaxValueValidator
 from employees.models import Employee
 
 
+def achievement_expression():
+    """Database version of ``KPI.achievement_percentage``, for annotations, filters and ordering."""
+    return Case(
+        When(target_value=0, then=Value(Decimal('0'))),
+        default=Least(F('current_value') * 100 / F('target_value'), Value(Decimal('100'))),
+        output_field=models.DecimalField(max_digits=12, decimal_places=2),
+    )
+
+
 class PerformanceReview(models.Model):
     """Tracks employee performance reviews."""
 
@@ -55,6 +68,12 @@ class PerformanceReview(models.Model):
 
     class Meta:
         ordering = ['-review_date']
+        indexes = [
+            models.Index(fields=['-review_date']),
+            models.Index(fields=['employee', '-review_date']),
+            models.Index(fields=['review_type', '-review_date']),
+            models.Index(fields=['is_completed', '-review_date']),
+        ]
 
     def __str__(self):
         return f"{self.employee.name} - {self.review_type} ({self.review_date})"
@@ -99,6 +118,12 @@ class Goal(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['employee', 'status']),
+            models.Index(fields=['status', '-created_at']),
+            models.Index(fields=['goal_type', 'status']),
+            models.Index(fields=['status', 'target_completion_date']),
+        ]
 
     def __str__(self):
         return f"{self.employee.name} - {self.title}"
@@ -145,6 +170,13 @@ class KPI(models.Model):
 
     class Meta:
         ordering = ['-period_end']
+        indexes = [
+            models.Index(fields=['-period_end']),
+            models.Index(fields=['period_start', 'period_end']),
+            models.Index(fields=['employee', '-period_end']),
+            models.Index(fields=['category', '-period_end']),
+            models.Index(achievement_expression(), name='kpi_achievement_idx'),
+        ]
 
     def __str__(self):
         return f"{self.employee.name} - {self.title}"
@@ -0,0 +1,54 @@
+"""
+Weighted KPI scores computed in the database.
+
+An employee's composite score over a set of KPIs is the weight-averaged
+achievement percentage, ``sum(weight * achievement) / sum(weight)``,
+ignoring zero-weight KPIs. ``composite_scores`` returns it for every
+employee with one grouped query; ``write_back_scores`` stores the rounded
+score in ``Employee.performance_score`` with a single ``UPDATE``. Neither
+loads KPIs into Python.
+"""
+from django.db.models import Count, Exists, F, IntegerField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Cast, Greatest, Round
+from django.utils import timezone
+
+from employees.models import Employee
+from .models import KPI, achievement_expression
+
+
+def with_achievement(kpis=None):
+    """``kpis`` (default: all KPIs) annotated with ``achievement``, the percentage of target reached."""
+    if kpis is None:
+        kpis = KPI.objects.all()
+    if 'achievement' not in kpis.query.annotations:
+        kpis = kpis.annotate(achievement=achievement_expression())
+    return kpis
+
+
+def weighted_score():
+    return Round(Sum(F('weight') * F('achievement')) / Sum('weight'), 2)
+
+
+def composite_scores(kpis=None):
+    """
+    One row per employee: ``employee``, ``employee_name``, ``score``,
+    ``kpi_count`` and ``total_weight``, best score first.
+
+    ``kpis`` restricts the KPIs that count (a period, a department, ...).
+    """
+    return with_achievement(kpis).filter(weight__gt=0).values('employee').annotate(
+        employee_name=F('employee__name'),
+        score=weighted_score(),
+        kpi_count=Count('id'),
+        total_weight=Sum('weight'),
+    ).order_by('-score', 'employee')
+
+
+def write_back_scores(kpis=None):
+    """Set ``performance_score`` of every employee with weighted KPIs in ``kpis``; returns the number updated."""
+    kpis = with_achievement(kpis).filter(weight__gt=0).order_by()
+    scores = kpis.filter(employee=OuterRef('pk')).values('employee').annotate(score=weighted_score()).values('score')
+    return Employee.objects.filter(Exists(kpis.filter(employee=OuterRef('pk')))).update(
+        performance_score=Cast(Greatest(Round(Subquery(scores)), Value(0)), IntegerField()),
+        updated_at=timezone.now(),
+    )
@@ -1,5 +1,7 @@
 from rest_framework import serializers
+from .goals import InvalidTransition, can_transition, transition_goal
 from .models import PerformanceReview, Goal, KPI
+from .scoring import with_achievement
 
 
 class PerformanceReviewSerializer(serializers.ModelSerializer):
@@ -49,7 +51,23 @@ class GoalSerializer(serializers.ModelSerializer):
             'actual_completion_date', 'progress_percentage', 'progress_notes',
             'performance_review', 'created_at', 'updated_at'
         ]
-        read_only_fields = ['id', 'created_at', 'updated_at']
+        read_only_fields = ['id', 'actual_completion_date', 'created_at', 'updated_at']
+
+    def validate_status(self, value):
+        if self.instance is not None and not can_transition(self.instance.status, value):
+            raise serializers.ValidationError(f'A {self.instance.status} goal cannot become {value}.')
+        return value
+
+    def update(self, instance, validated_data):
+        # One guarded UPDATE through transition_goal writes the status and the other fields together.
+        new_status = validated_data.pop('status', instance.status)
+        try:
+            updated = transition_goal(instance, new_status, **validated_data)
+        except InvalidTransition as exc:
+            raise serializers.ValidationError({'status': [str(exc)]})
+        if not updated:
+            raise serializers.ValidationError({'status': ['The goal was changed by someone else; reload and retry.']})
+        return instance
 
 
 class GoalCreateSerializer(serializers.ModelSerializer):
@@ -67,7 +85,10 @@ class KPISerializer(serializers.ModelSerializer):
     """Serializer for KPI model."""
 
     employee_name = serializers.CharField(source='employee.name', read_only=True)
-    achievement_percentage = serializers.ReadOnlyField()
+    # The ``achievement`` annotation of ``performance.scoring.with_achievement``.
+    achievement_percentage = serializers.DecimalField(
+        source='achievement', max_digits=12, decimal_places=2, coerce_to_string=False, read_only=True
+    )
 
     class Meta:
         model = KPI
@@ -79,6 +100,14 @@ class KPISerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['id', 'achievement_percentage', 'created_at', 'updated_at']
 
+    def update(self, instance, validated_data):
+        instance = super().update(instance, validated_data)
+        # The annotation was read before the values it depends on changed.
+        instance.achievement = with_achievement(KPI.objects.filter(pk=instance.pk)).values_list(
+            'achievement', flat=True
+        ).get()
+        return instance
+
 
 class KPICreateSerializer(serializers.ModelSerializer):
     """Serializer for creating KPIs."""
@@ -0,0 +1,44 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from api.tracking import previous_value, track_previous
+from employees.models import Department, Employee
+from .calibration import invalidate_calibration
+from .models import PerformanceReview
+from .trends import invalidate_department_buckets, invalidate_trend_buckets
+
+
+track_previous(PerformanceReview, 'review_date')
+
+
+@receiver(post_save, sender=PerformanceReview)
+@receiver(post_delete, sender=PerformanceReview)
+def reset_trend_buckets(sender, instance, **kwargs):
+    days = (instance.review_date, previous_value(instance, 'review_date'))
+    transaction.on_commit(lambda: invalidate_trend_buckets(*days))
+    transaction.on_commit(invalidate_calibration)
+
+
+@receiver(post_save, sender=Employee)
+@receiver(post_delete, sender=Employee)
+@receiver(post_save, sender=Department)
+@receiver(post_delete, sender=Department)
+def reset_calibration_names(sender, **kwargs):
+    """Calibration reports group and label reviews by department and reviewer names."""
+    transaction.on_commit(invalidate_calibration)
+
+
+@receiver(post_save, sender=Employee)
+def reset_department_buckets_on_move(sender, instance, raw=False, created=False, **kwargs):
+    """An employee's reviews move with them to another department's trend."""
+    if not raw and not created and instance.has_changed('department_id'):
+        transaction.on_commit(invalidate_department_buckets)
+
+
+@receiver(post_save, sender=Department)
+@receiver(post_delete, sender=Department)
+def reset_department_buckets(sender, created=False, **kwargs):
+    """Department trends are keyed by department name."""
+    if not created:
+        transaction.on_commit(invalidate_department_buckets)
@@ -1,3 +1,320 @@
+from datetime import date
+
+import numpy as np
+from django.core.cache import cache
+from django.db import connection
 from django.test import TestCase
+from rest_framework.exceptions import ValidationError
+
+from api.testing import AuthenticatedAPITestCase, FilterIndexAssertionsMixin, QueryCountAssertionsMixin
+from employees.models import Department, Employee
+from .calibration import SCORE_FIELDS, cached_calibration_report, calibration_report, distribution
+from .goals import InvalidTransition, mark_overdue, transition_goal
+from .models import PerformanceReview, Goal, KPI
+from .scoring import composite_scores, with_achievement, write_back_scores
+from .serializers import GoalSerializer
+from .trends import review_trend
+from .views import GoalViewSet, KPIViewSet, PerformanceReviewViewSet
+
+
+class ListQueryCountTests(QueryCountAssertionsMixin, AuthenticatedAPITestCase):
+    """List endpoints run the same number of queries for any page size."""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        reviewer = Employee.objects.create(name='Reviewer', email='reviewer@example.com')
+        for i in range(10):
+            employee = Employee.objects.create(name=f'Employee {i}', email=f'employee{i}@example.com')
+            PerformanceReview.objects.create(
+                employee=employee, reviewer=reviewer, review_type='Annual', review_date=date(2025, 1, 1),
+                review_period_start=date(2024, 1, 1), review_period_end=date(2024, 12, 31),
+                overall_score=80, overall_rating='Good'
+            )
+            Goal.objects.create(
+                employee=employee, title='Ship it', description='', start_date=date(2025, 1, 1),
+                target_completion_date=date(2025, 6, 30)
+            )
+            KPI.objects.create(
+                employee=employee, title='Tickets', description='', category='Productivity',
+                target_value=100, current_value=50, period_start=date(2025, 1, 1), period_end=date(2025, 3, 31)
+            )
+
+    def test_performance_reviews(self):
+        self.assertConstantListQueries(self.client, '/api/performance/performance-reviews/')
+
+    def test_goals(self):
+        self.assertConstantListQueries(self.client, '/api/performance/goals/')
+
+    def test_kpis(self):
+        self.assertConstantListQueries(self.client, '/api/performance/kpis/')
+
+
+class FilterIndexTests(FilterIndexAssertionsMixin, TestCase):
+    """Every list filter is served by an index."""
+
+    def test_performance_review_filters(self):
+        # SQLite compiles ``is_completed = true`` to a bare column test, which it
+        # never answers from the (is_completed, -review_date) index.
+        self.assertFiltersUseIndexes(PerformanceReviewViewSet, postgresql_only=('completed',))
+
+    def test_goal_filters(self):
+        self.assertFiltersUseIndexes(GoalViewSet)
+
+    def test_kpi_filters(self):
+        # On SQLite the filtered annotation compiles with different CAST wrappers
+        # than the kpi_achievement_idx expression, so the index never matches.
+        self.assertFiltersUseIndexes(KPIViewSet, postgresql_only=('min_achievement', 'max_achievement'))
+
+    def test_kpi_achievement_index(self):
+        with connection.cursor() as cursor:
+            constraints = connection.introspection.get_constraints(cursor, KPI._meta.db_table)
+            self.assertTrue(constraints['kpi_achievement_idx']['index'])
+            if connection.vendor != 'sqlite':
+                return
+            # SQLite only matches the index's own expression text, so plan a filter written with it.
+            cursor.execute("SELECT sql FROM sqlite_master WHERE name = 'kpi_achievement_idx'")
+            expression = cursor.fetchone()[0].split(f'"{KPI._meta.db_table}" ', 1)[1][1:-1]
+            cursor.execute(f'EXPLAIN QUERY PLAN SELECT id FROM "{KPI._meta.db_table}" WHERE {expression} >= 50')
+            plan = ' '.join(str(row[-1]) for row in cursor.fetchall())
+        self.assertIn('USING INDEX kpi_achievement_idx', plan)
+
+
+class KPIScoringTests(AuthenticatedAPITestCase):
+    """Weighted KPI scores are computed and written back in the database."""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.first = Employee.objects.create(name='First', email='first@example.com')
+        cls.second = Employee.objects.create(name='Second', email='second@example.com')
+        cls.idle = Employee.objects.create(name='Idle', email='idle@example.com', performance_score=42)
+        for employee, current, target, weight in [
+            (cls.first, 50, 100, 1), (cls.first, 150, 100, 1), (cls.first, 0, 100, 0),
+            (cls.second, 40, 80, 2), (cls.second, 5, 0, 2),
+        ]:
+            KPI.objects.create(
+                employee=employee, title='KPI', description='', category='Quality', target_value=target,
+                current_value=current, weight=weight, period_start=date(2025, 1, 1), period_end=date(2025, 3, 31)
+            )
+
+    def test_achievement_annotation_matches_property(self):
+        for kpi in with_achievement():
+            self.assertEqual(kpi.achievement, kpi.achievement_percentage)
+
+    def test_kpi_endpoint_serializes_the_annotation(self):
+        response = self.client.get('/api/performance/kpis/?ordering=achievement')
+        self.assertEqual(response.status_code, 200)
+        expected = sorted(float(kpi.achievement) for kpi in with_achievement())
+        self.assertEqual([row['achievement_percentage'] for row in response.data['results']], expected)
+        kpi = KPI.objects.get(employee=self.second, target_value=80)
+        response = self.client.patch(f'/api/performance/kpis/{kpi.pk}/', {'current_value': 60}, format='json')
+        self.assertEqual((response.status_code, response.data['achievement_percentage']), (200, 75))
+
+    def test_composite_scores(self):
+        scores = [(row['employee'], row['score'], row['kpi_count']) for row in composite_scores()]
+        self.assertEqual(scores, [(self.first.pk, 75, 2), (self.second.pk, 25, 2)])
+
+    def test_scores_endpoint_has_one_row_per_employee(self):
+        for query in ('', '?pagination=keyset'):
+            response = self.client.get(f'/api/performance/kpis/scores/{query}')
+            self.assertEqual(response.status_code, 200)
+            rows = [(row['employee'], row['score'], row['kpi_count']) for row in response.data['results']]
+            self.assertEqual(rows, [(self.first.pk, 75, 2), (self.second.pk, 25, 2)])
+
+    def test_write_back_scores(self):
+        self.assertEqual(write_back_scores(), 2)
+        scores = dict(Employee.objects.values_list('pk', 'performance_score'))
+        self.assertEqual(scores, {self.first.pk: 75, self.second.pk: 25, self.idle.pk: 42})
+
+
+class ReviewTrendTests(AuthenticatedAPITestCase):
+    """Review trends are bucketed, zero-filled and cached per closed bucket."""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.employee = Employee.objects.create(name='Employee', email='employee@example.com')
+        for review_date, score in [(date(2025, 1, 10), 70), (date(2025, 1, 20), 90), (date(2025, 3, 5), 60)]:
+            cls.review(review_date, score)
+
+    @classmethod
+    def review(cls, review_date, score):
+        return PerformanceReview.objects.create(
+            employee=cls.employee, review_type='Annual', review_date=review_date,
+            review_period_start=review_date, review_period_end=review_date,
+            overall_score=score, overall_rating='Good'
+        )
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+
+    def test_monthly_buckets_are_zero_filled(self):
+        series = review_trend('month', 3, date(2025, 3, 31))['series'][None]
+        self.assertEqual(
+            [(point['period'], point['score'], point['reviews']) for point in series],
+            [(date(2025, 1, 1), 80, 2), (date(2025, 2, 1), 0, 0), (date(2025, 3, 1), 60, 1)]
+        )
+
+    def test_closed_buckets_come_from_cache(self):
+        review_trend('quarter', 4, date(2025, 12, 31))
+        with self.assertNumQueries(0):
+            review_trend('quarter', 4, date(2025, 12, 31))
+
+    def test_saving_a_review_refreshes_its_bucket(self):
+        review_trend('month', 3, date(2025, 3, 31))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.review(date(2025, 2, 14), 50)
+        series = review_trend('month', 3, date(2025, 3, 31))['series'][None]
+        self.assertEqual([point['score'] for point in series], [80, 50, 60])
+
+    def test_department_buckets_follow_department_changes(self):
+        sales, support = Department.objects.create(name='Sales'), Department.objects.create(name='Support')
+        self.employee.department = sales
+        self.employee.save()
+        self.assertEqual(set(review_trend('month', 3, date(2025, 3, 31), 'department')['series']), {'Sales'})
+        with self.captureOnCommitCallbacks(execute=True):
+            self.employee.department = support
+            self.employee.save()
+        self.assertEqual(set(review_trend('month', 3, date(2025, 3, 31), 'department')['series']), {'Support'})
+        with self.captureOnCommitCallbacks(execute=True):
+            support.name = 'Customer Care'
+            support.save()
+        self.assertEqual(set(review_trend('month', 3, date(2025, 3, 31), 'department')['series']), {'Customer Care'})
+
+    def test_summary_rejects_invalid_end(self):
+        for end in ('garbage', '2025-13-01'):
+            response = self.client.get(f'/api/performance/kpis/summary/?end={end}')
+            self.assertEqual(response.status_code, 400, end)
+        response = self.client.get('/api/performance/kpis/summary/?end=2025-03-31&periods=3')
+        self.assertEqual([point['score'] for point in response.data['performanceCategories']], [80, 0, 60])
+
+
+class CalibrationReportTests(AuthenticatedAPITestCase):
+    """Calibration statistics come from one query and are cached until reviews change."""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.lenient = Employee.objects.create(name='Lenient', email='lenient@example.com')
+        cls.strict = Employee.objects.create(name='Strict', email='strict@example.com')
+        for i in range(20):
+            employee = Employee.objects.create(name=f'Employee {i}', email=f'employee{i}@example.com')
+            reviewer, score = (cls.lenient, 80) if i % 2 else (cls.strict, 60)
+            PerformanceReview.objects.create(
+                employee=employee, reviewer=reviewer, review_type='Annual', review_date=date(2025, 1, 1),
+                review_period_start=date(2024, 1, 1), review_period_end=date(2024, 12, 31),
+                overall_score=score if i else 0, overall_rating='Good', teamwork=70 if i < 10 else None
+            )
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+
+    def test_report(self):
+        with self.assertNumQueries(1):
+            report = calibration_report(PerformanceReview.objects.all())
+        self.assertEqual(report['distributions']['overall_score']['count'], 20)
+        self.assertEqual(report['distributions']['teamwork']['count'], 10)
+        self.assertEqual([outlier['overall_score'] for outlier in report['outliers']], [0])
+        leniency = {entry['name']: entry['leniency'] for entry in report['reviewers']}
+        self.assertEqual(leniency, {'Lenient': 'lenient', 'Strict': 'severe'})
+
+    def test_group_statistics_match_each_group(self):
+        for index, pk in enumerate(PerformanceReview.objects.order_by('pk').values_list('pk', flat=True)):
+            PerformanceReview.objects.filter(pk=pk).update(technical_skills=index * 37 % 101)
+        report = calibration_report(PerformanceReview.objects.all())
+        for entry in report['reviewers']:
+            reviews = PerformanceReview.objects.filter(reviewer=entry['id'])
+            for field in SCORE_FIELDS:
+                values = np.array([np.nan if value is None else value for value in reviews.values_list(field, flat=True)])
+                expected, statistics = distribution(values), entry['scores'][field]
+                for key in ('count', 'percentiles', 'histogram'):
+                    self.assertEqual(statistics[key], expected[key], (entry['name'], field, key))
+                for key in ('mean', 'std'):
+                    self.assertAlmostEqual(statistics[key] or 0, expected[key] or 0, places=1)
+
+    def test_sub_score_outliers(self):
+        PerformanceReview.objects.update(teamwork=70, overall_score=70)
+        odd = PerformanceReview.objects.order_by('pk').last()
+        PerformanceReview.objects.filter(pk=odd.pk).update(teamwork=10)
+        outliers = calibration_report(PerformanceReview.objects.all())['outliers']
+        self.assertEqual([(outlier['review'], outlier['flagged']) for outlier in outliers], [(odd.pk, ['teamwork'])])
+        self.assertLess(outliers[0]['z_scores']['teamwork'], -2)
+        self.assertEqual(outliers[0]['z_scores']['overall_score'], 0)
+        self.assertIsNone(outliers[0]['z_scores']['leadership'])
+
+    def test_report_is_cached_until_a_review_changes(self):
+        reviews = PerformanceReview.objects.all()
+        cached_calibration_report(reviews, 2.0, 'all')
+        with self.assertNumQueries(0):
+            cached_calibration_report(reviews, 2.0, 'all')
+        with self.captureOnCommitCallbacks(execute=True):
+            PerformanceReview.objects.first().save()
+        with self.assertNumQueries(1):
+            cached_calibration_report(reviews, 2.0, 'all')
+
+    def test_report_is_cached_until_a_name_changes(self):
+        reviews = PerformanceReview.objects.all()
+        cached_calibration_report(reviews, 2.0, 'all')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.lenient.name = 'Generous'
+            self.lenient.save()
+        report = cached_calibration_report(reviews, 2.0, 'all')
+        self.assertIn('Generous', {entry['name'] for entry in report['reviewers']})
+
+    def test_z_must_be_finite(self):
+        for z in ('nan', 'inf', '-1', 'abc'):
+            response = self.client.get(f'/api/performance/performance-reviews/calibration/?z={z}')
+            self.assertEqual(response.status_code, 400, z)
+
+
+class GoalStatusTests(TestCase):
+    """Goal status changes follow the transition table."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.employee = Employee.objects.create(name='Employee', email='employee@example.com')
+
+    def goal(self, status, due):
+        return Goal.objects.create(
+            employee=self.employee, title='Goal', description='', status=status,
+            start_date=date(2025, 1, 1), target_completion_date=due
+        )
+
+    def test_mark_overdue_moves_only_active_goals_past_due(self):
+        late = [self.goal('Active', date(2025, 1, day)) for day in range(1, 6)]
+        on_time = self.goal('Active', date(2025, 2, 1))
+        draft = self.goal('Draft', date(2025, 1, 1))
+        with self.assertNumQueries(3):
+            self.assertEqual(mark_overdue(date(2025, 1, 15), batch_size=2), 5)
+        statuses = dict(Goal.objects.values_list('pk', 'status'))
+        self.assertEqual({statuses[goal.pk] for goal in late}, {'Overdue'})
+        self.assertEqual((statuses[on_time.pk], statuses[draft.pk]), ('Active', 'Draft'))
+
+    def test_transition_goal(self):
+        goal = self.goal('Overdue', date(2025, 1, 1))
+        self.assertTrue(transition_goal(goal, 'Completed', progress_percentage=100))
+        goal.refresh_from_db()
+        self.assertEqual((goal.status, goal.progress_percentage), ('Completed', 100))
+        self.assertIsNotNone(goal.actual_completion_date)
+        with self.assertRaises(InvalidTransition):
+            transition_goal(self.goal('Draft', date(2025, 1, 1)), 'Completed')
+
+    def test_update_writes_status_and_fields_in_one_statement(self):
+        goal = self.goal('Active', date(2025, 3, 1))
+        serializer = GoalSerializer(goal, data={'status': 'Completed', 'progress_percentage': 100}, partial=True)
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+        with self.assertNumQueries(1):
+            serializer.save()
+        goal.refresh_from_db()
+        self.assertEqual((goal.status, goal.progress_percentage), ('Completed', 100))
 
-# Create your tests here.
+        Goal.objects.filter(pk=goal.pk).update(status='Active')
+        serializer = GoalSerializer(goal, data={'title': 'Renamed'}, partial=True)
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+        with self.assertRaises(ValidationError):
+            serializer.save()
+        goal.refresh_from_db()
+        self.assertEqual((goal.status, goal.title), ('Active', 'Goal'))
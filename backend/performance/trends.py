@@ -0,0 +1,158 @@
+"""
+Performance review trends in week, month or quarter buckets.
+
+``review_trend`` returns the average review score per bucket, optionally
+per department or review type, with empty buckets filled with zeros.
+Finished buckets are cached for ``PERFORMANCE_TREND_CACHE_SECONDS``, one
+cache entry per bucket, so a dashboard refresh only queries the bucket
+that is still open. Saving or deleting a review drops the cached buckets
+containing its review date (see ``performance.signals``), so a late
+review for a past period is still picked up. Department buckets also
+carry a version that moving an employee to another department, or
+renaming or deleting a department, replaces.
+"""
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Avg, Count, Q
+from django.db.models.functions import TruncMonth, TruncQuarter, TruncWeek
+from django.utils import timezone
+
+from .models import PerformanceReview
+
+
+BUCKETS = {
+    'week': TruncWeek,
+    'month': TruncMonth,
+    'quarter': TruncQuarter,
+}
+
+# ``split`` values and the review field each one groups by.
+SPLITS = {
+    'department': 'employee__department__name',
+    'review_type': 'review_type',
+}
+
+
+def bucket_start(day, bucket):
+    """First day of the ``bucket`` containing ``day`` (weeks start on Monday)."""
+    if bucket == 'week':
+        return day - timedelta(days=day.weekday())
+    if bucket == 'quarter':
+        return day.replace(month=(day.month - 1) // 3 * 3 + 1, day=1)
+    return day.replace(day=1)
+
+
+def next_bucket(start, bucket):
+    if bucket == 'week':
+        return start + timedelta(days=7)
+    months = 3 if bucket == 'quarter' else 1
+    month = start.month - 1 + months
+    return start.replace(year=start.year + month // 12, month=month % 12 + 1)
+
+
+def previous_bucket(start, bucket):
+    if bucket == 'week':
+        return start - timedelta(days=7)
+    months = 3 if bucket == 'quarter' else 1
+    month = start.month - 1 - months
+    return start.replace(year=start.year + month // 12, month=month % 12 + 1)
+
+
+DEPARTMENT_VERSION_KEY = 'performance:trend-department-version'
+
+
+def department_version():
+    """Version of the department buckets; replaced whenever reviews change department."""
+    version = cache.get(DEPARTMENT_VERSION_KEY)
+    if version is None:
+        version = uuid.uuid4().hex
+        cache.add(DEPARTMENT_VERSION_KEY, version, None)
+        version = cache.get(DEPARTMENT_VERSION_KEY, version)
+    return version
+
+
+def invalidate_department_buckets():
+    """Forget every cached department bucket."""
+    cache.set(DEPARTMENT_VERSION_KEY, uuid.uuid4().hex, None)
+
+
+def bucket_key(bucket, split, start):
+    if split == 'department':
+        split = f'department:{department_version()}'
+    return f'performance:trend:{bucket}:{split or "all"}:{start.isoformat()}'
+
+
+def invalidate_trend_buckets(*days):
+    """Forget the cached buckets containing any of ``days``."""
+    cache.delete_many([
+        bucket_key(bucket, split, bucket_start(day, bucket))
+        for day in days if day is not None
+        for bucket in BUCKETS
+        for split in (None, *SPLITS)
+    ])
+
+
+def aggregate_buckets(starts, bucket, split=None):
+    """``{bucket start: {group: {'score', 'reviews'}}}`` for ``starts``, in one grouped query."""
+    ranges = []
+    for start in sorted(starts):
+        end = next_bucket(start, bucket)
+        if ranges and ranges[-1][1] == start:
+            ranges[-1][1] = end
+        else:
+            ranges.append([start, end])
+    condition = Q()
+    for start, end in ranges:
+        condition |= Q(review_date__gte=start, review_date__lt=end)
+
+    group = SPLITS.get(split)
+    fields = ['bucket', group] if group else ['bucket']
+    rows = PerformanceReview.objects.filter(condition).annotate(
+        bucket=BUCKETS[bucket]('review_date')
+    ).order_by().values(*fields).annotate(score=Avg('overall_score'), reviews=Count('id'))
+
+    results = {start: {} for start in starts}
+    for row in rows:
+        if row['bucket'] in results:
+            results[row['bucket']][(row[group] or '') if group else None] = {
+                'score': round(float(row['score']), 1), 'reviews': row['reviews'],
+            }
+    return results
+
+
+def review_trend(bucket='month', periods=6, end=None, split=None):
+    """
+    Average review score for the ``periods`` buckets ending with the one containing ``end``.
+
+    Returns ``{'buckets': [start, ...], 'series': {group: [{'period', 'score', 'reviews'}]}}``;
+    without ``split`` the only group is ``None``.
+    """
+    today = timezone.now().date()
+    last = bucket_start(end or today, bucket)
+    starts = [last]
+    while len(starts) < periods:
+        starts.append(previous_bucket(starts[-1], bucket))
+    starts.reverse()
+
+    keys = {start: bucket_key(bucket, split, start) for start in starts}
+    cached = cache.get_many(list(keys.values()))
+    buckets = {start: cached[key] for start, key in keys.items() if key in cached}
+    missing = [start for start in starts if start not in buckets]
+    if missing:
+        computed = aggregate_buckets(missing, bucket, split)
+        buckets.update(computed)
+        cache.set_many({
+            keys[start]: groups for start, groups in computed.items()
+            if next_bucket(start, bucket) <= today
+        }, settings.PERFORMANCE_TREND_CACHE_SECONDS)
+
+    groups = sorted({group for values in buckets.values() for group in values}, key=str) if split else [None]
+    empty = {'score': 0, 'reviews': 0}
+    series = {
+        group: [{'period': start, **buckets[start].get(group, empty)} for start in starts]
+        for group in groups
+    }
+    return {'buckets': starts, 'series': series}
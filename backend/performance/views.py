@@ -1,10 +1,18 @@
-from rest_framework import viewsets
+import math
+
+from rest_framework import status, viewsets
 from rest_framework.decorators import action
+from rest_framework.filters import OrderingFilter
+from rest_framework.pagination import PageNumberPagination
 from rest_framework.response import Response
-from django.db.models import Avg, Count
-from django.utils import timezone
-from datetime import timedelta
+from api.filters import QueryParamFilterBackend
+from api.mixins import RelatedFieldsMixin
+from django.utils.dateparse import parse_date
+from .calibration import cached_calibration_report
+from .goals import InvalidTransition, transition_goal
 from .models import PerformanceReview, Goal, KPI
+from .scoring import composite_scores, with_achievement, write_back_scores
+from .trends import BUCKETS, SPLITS, review_trend
 from .serializers import (
     PerformanceReviewSerializer, PerformanceReviewCreateSerializer,
     GoalSerializer, GoalCreateSerializer,
@@ -12,17 +20,50 @@ from .serializers import (
 )
 
 
-class PerformanceReviewViewSet(viewsets.ModelViewSet):
+MAX_TREND_PERIODS = 104
+
+
+class PerformanceReviewViewSet(RelatedFieldsMixin, viewsets.ModelViewSet):
     """ViewSet for PerformanceReview model."""
 
     queryset = PerformanceReview.objects.all()
     serializer_class = PerformanceReviewSerializer
+    query_filters = {
+        'employee': 'employee',
+        'reviewer': 'reviewer',
+        'review_type': 'review_type',
+        'completed': 'is_completed',
+        'start': 'review_date__gte',
+        'end': 'review_date__lte',
+    }
 
     def get_serializer_class(self):
         if self.action == 'create':
             return PerformanceReviewCreateSerializer
         return PerformanceReviewSerializer
 
+    @action(detail=False, methods=['get'])
+    def calibration(self, request):
+        """
+        Score distributions for calibration over the filtered reviews.
+
+        Histograms and percentiles of the overall score and each sub-score,
+        the same statistics per department and per reviewer, reviews with
+        any score ``z`` (default 2) or more standard deviations from that
+        score's mean, and each reviewer's leniency relative to the reviewees'
+        departments. Cached until the next review, employee or department
+        is saved.
+        """
+        try:
+            z_threshold = float(request.query_params.get('z', 2))
+        except ValueError:
+            return Response({'error': 'z must be a number.'}, status=status.HTTP_400_BAD_REQUEST)
+        if not math.isfinite(z_threshold) or z_threshold <= 0:
+            return Response({'error': 'z must be a positive finite number.'}, status=status.HTTP_400_BAD_REQUEST)
+        reviews = self.filter_queryset(self.get_queryset())
+        filters = sorted((key, value) for key, value in request.query_params.items() if key != 'z')
+        return Response(cached_calibration_report(reviews, z_threshold, filters))
+
     @action(detail=True, methods=['post'])
     def acknowledge(self, request, pk=None):
         """Employee acknowledges the review."""
@@ -33,11 +74,16 @@ class PerformanceReviewViewSet(viewsets.ModelViewSet):
         return Response(serializer.data)
 
 
-class GoalViewSet(viewsets.ModelViewSet):
+class GoalViewSet(RelatedFieldsMixin, viewsets.ModelViewSet):
     """ViewSet for Goal model."""
 
     queryset = Goal.objects.all()
     serializer_class = GoalSerializer
+    query_filters = {
+        'employee': 'employee',
+        'status': 'status',
+        'goal_type': 'goal_type',
+    }
 
     def get_serializer_class(self):
         if self.action == 'create':
@@ -46,55 +92,104 @@ class GoalViewSet(viewsets.ModelViewSet):
 
     @action(detail=True, methods=['post'])
     def update_progress(self, request, pk=None):
-        """Update goal progress."""
+        """Update goal progress; reaching 100% completes the goal."""
         goal = self.get_object()
-        goal.progress_percentage = request.data.get('progress_percentage', goal.progress_percentage)
-        goal.progress_notes = request.data.get('progress_notes', goal.progress_notes)
-        if goal.progress_percentage >= 100:
-            goal.status = 'Completed'
-            goal.actual_completion_date = timezone.now().date()
-        goal.save()
+        try:
+            progress = int(request.data.get('progress_percentage', goal.progress_percentage))
+        except (TypeError, ValueError):
+            return Response({'error': 'progress_percentage must be an integer.'}, status=status.HTTP_400_BAD_REQUEST)
+        if not 0 <= progress <= 100:
+            return Response({'error': 'progress_percentage must be between 0 and 100.'}, status=status.HTTP_400_BAD_REQUEST)
+        new_status = Goal.GoalStatus.COMPLETED if progress >= 100 else goal.status
+        try:
+            updated = transition_goal(
+                goal, new_status, progress_percentage=progress,
+                progress_notes=request.data.get('progress_notes', goal.progress_notes)
+            )
+        except InvalidTransition as exc:
+            return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        if not updated:
+            return Response({'error': 'The goal was changed by someone else; reload and retry.'}, status=status.HTTP_409_CONFLICT)
         serializer = self.get_serializer(goal)
         return Response(serializer.data)
 
 
-class KPIViewSet(viewsets.ModelViewSet):
+class KPIViewSet(RelatedFieldsMixin, viewsets.ModelViewSet):
     """ViewSet for KPI model."""
 
-    queryset = KPI.objects.all()
+    queryset = with_achievement()
     serializer_class = KPISerializer
+    filter_backends = [QueryParamFilterBackend, OrderingFilter]
+    # ``start``/``end`` select KPIs whose period overlaps that range;
+    # achievement filters and ordering run on the indexed annotation.
+    query_filters = {
+        'employee': 'employee',
+        'department': 'employee__department',
+        'category': 'category',
+        'start': 'period_end__gte',
+        'end': 'period_start__lte',
+        'min_achievement': 'achievement__gte',
+        'max_achievement': 'achievement__lte',
+    }
+    ordering_fields = ['achievement', 'period_end', 'weight']
 
     def get_serializer_class(self):
         if self.action == 'create':
             return KPICreateSerializer
         return KPISerializer
 
+    @action(detail=False, methods=['get', 'post'])
+    def scores(self, request):
+        """
+        Weighted KPI score per employee over the filtered KPIs, best first.
+
+        Takes the list filters, so ``start``/``end`` pick the period and
+        ``department`` the team. POST stores the rounded scores in each
+        employee's ``performance_score`` and returns how many were updated.
+        """
+        kpis = self.filter_queryset(self.get_queryset()).order_by()
+        if request.method == 'POST':
+            return Response({'updated': write_back_scores(kpis)})
+        # Page numbers only: keyset pagination adds ``id`` to the ordering, which
+        # would also group these per-employee rows by KPI.
+        paginator = PageNumberPagination()
+        page = paginator.paginate_queryset(composite_scores(kpis), request, view=self)
+        return paginator.get_paginated_response(page)
+
     @action(detail=False, methods=['get'])
     def summary(self, request):
-        """Get performance summary for dashboard."""
-        today = timezone.now().date()
-        last_6_months = today - timedelta(days=180)
-
-        # Get performance review data for the last 6 months
-        performance_data = PerformanceReview.objects.filter(
-            review_date__gte=last_6_months
-        ).order_by('review_date').values('review_date').annotate(
-            avg_score=Avg('overall_score')
-        )[:6]  # Last 6 data points
-
-        # Format for frontend chart
-        performance_categories = []
-        for i, data in enumerate(performance_data):
-            performance_categories.append({
-                'score': round(data['avg_score'], 1)
-            })
-
-        # If not enough data, add some mock data for demo
-        while len(performance_categories) < 6:
-            performance_categories.append({
-                'score': 75 + (len(performance_categories) * 5)  # Increasing trend
-            })
-
-        return Response({
-            'performanceCategories': performance_categories
-        })
+        """
+        Average review score over time for the dashboard.
+
+        ``bucket`` is ``week``, ``month`` (default) or ``quarter``;
+        ``periods`` buckets (default 6) are returned, ending with the one
+        containing ``end`` (YYYY-MM-DD, default today). Empty buckets have
+        a score of 0. ``split=department`` or ``split=review_type`` adds a
+        ``series`` entry per department or review type.
+        """
+        bucket = request.query_params.get('bucket', 'month')
+        split = request.query_params.get('split') or None
+        if bucket not in BUCKETS:
+            return Response({'error': f'bucket must be one of: {", ".join(BUCKETS)}.'}, status=status.HTTP_400_BAD_REQUEST)
+        if split is not None and split not in SPLITS:
+            return Response({'error': f'split must be one of: {", ".join(SPLITS)}.'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            periods = int(request.query_params.get('periods', 6))
+            end = request.query_params.get('end') or None
+            if end is not None:
+                end = parse_date(end)
+                if end is None:
+                    raise ValueError(end)
+        except ValueError:
+            return Response({'error': 'periods must be an integer and end a date in YYYY-MM-DD format.'}, status=status.HTTP_400_BAD_REQUEST)
+        if not 1 <= periods <= MAX_TREND_PERIODS:
+            return Response({'error': f'periods must be between 1 and {MAX_TREND_PERIODS}.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        response = {
+            'bucket': bucket,
+            'performanceCategories': review_trend(bucket, periods, end)['series'][None],
+        }
+        if split:
+            response['split'] = split
+            response['series'] = review_trend(bucket, periods, end, split)['series']
+        return Response(response)
@@ -2,11 +2,12 @@ from rest_framework import viewsets
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAdminUser
+from api.mixins import RelatedFieldsMixin
 from .models import SystemSettings, NotificationSettings
 from .serializers import SystemSettingsSerializer, NotificationSettingsSerializer
 
 
-class SystemSettingsViewSet(viewsets.ModelViewSet):
+class SystemSettingsViewSet(RelatedFieldsMixin, viewsets.ModelViewSet):
     """ViewSet for SystemSettings model."""
 
     queryset = SystemSettings.objects.all()
@@ -21,7 +22,7 @@ class SystemSettingsViewSet(viewsets.ModelViewSet):
         return Response(serializer.data)
 
 
-class NotificationSettingsViewSet(viewsets.ModelViewSet):
+class NotificationSettingsViewSet(RelatedFieldsMixin, viewsets.ModelViewSet):
     """ViewSet for NotificationSettings model."""
 
     queryset = NotificationSettings.objects.all()
@@ -29,7 +30,7 @@ class NotificationSettingsViewSet(viewsets.ModelViewSet):
 
     def get_queryset(self):
         """Users can only see their own notification settings."""
-        return self.queryset.filter(user=self.request.user)
+        return super().get_queryset().filter(user=self.request.user)
 
     @action(detail=False, methods=['get'])
     def my_settings(self, request):
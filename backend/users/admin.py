@@ -10,7 +10,7 @@ class CustomUserAdmin(UserAdmin):
     """
     list_display = ('email', 'first_name', 'last_name', 'department', 'is_active', 'is_staff')
     list_filter = ('is_active', 'is_staff', 'department', 'created_at')
-    search_fields = ('email', 'first_name', 'last_name', 'department')
+    search_fields = ('email', 'first_name', 'last_name', 'department__name')
     ordering = ('-created_at',)
 
     fieldsets = UserAdmin.fieldsets + (
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-17 23:27
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employees', '0005_alter_employee_department'),
+        ('users', '0002_user_department'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='user',
+            name='department',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='users', to='employees.department', verbose_name='department'),
+        ),
+    ]
@@ -9,7 +9,10 @@ class User(AbstractUser):
     """
     email = models.EmailField(_('email address'), unique=True)
     phone = models.CharField(_('phone number'), max_length=20, blank=True)
-    department = models.CharField(_('department'), max_length=100, blank=True)
+    department = models.ForeignKey(
+        'employees.Department', on_delete=models.SET_NULL, null=True, blank=True, related_name='users',
+        verbose_name=_('department')
+    )
     bio = models.TextField(_('bio'), blank=True)
     location = models.CharField(_('location'), max_length=100, blank=True)
 
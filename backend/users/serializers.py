@@ -1,13 +1,15 @@
 from rest_framework import serializers
 from django.contrib.auth import authenticate
+from employees.serializers import DepartmentField, DepartmentSaveMixin
 from .models import User
 
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(DepartmentSaveMixin, serializers.ModelSerializer):
     """
     Serializer for User model
     """
     password = serializers.CharField(write_only=True, required=False)
+    department = DepartmentField()
     full_name = serializers.SerializerMethodField()
 
     class Meta:
@@ -46,10 +48,12 @@ class UserSerializer(serializers.ModelSerializer):
         return user
 
 
-class UserProfileSerializer(serializers.ModelSerializer):
+class UserProfileSerializer(DepartmentSaveMixin, serializers.ModelSerializer):
     """
     Serializer for user profile updates (limited fields)
     """
+    department = DepartmentField()
+
     class Meta:
         model = User
         fields = [